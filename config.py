@@ -6,6 +6,9 @@
 # ============ 窗口配置 ============
 WIDTH, HEIGHT = 900, 650
 FPS = 60
+SIM_HZ = 30                   # 模拟频率：游戏逻辑固定每秒更新30次，与渲染帧率无关
+SIM_DT = 1.0 / SIM_HZ
+SIM_MAX_STEPS_PER_FRAME = 5   # 单帧最多追赶的模拟步数，防止卡顿后越追越慢
 BG_COLOR = (20, 30, 50)
 WATER_TOP = 90
 
@@ -26,12 +29,66 @@ AUDIO_SMOOTH_FRAMES = 30
 AUDIO_RMS_DIVISOR = 30  # 用于将 RMS 转换为 0-100 的音量
 AUDIO_MAX_VOLUME = 100
 
+# ============ 启动配置 ============
+STARTUP_FONT_SIZES = (14, 16, 18, 20, 22)  # 启动时在后台预加载的字号
+SPRITE_FRAMES = 8                     # 每条鱼预渲染的尾巴摆动帧数
+
+# ============ 性能分析配置 ============
+PROFILER_WINDOW = 300                 # 按 F3 打开的性能分析保留最近多少帧（30 帧/秒约 10 秒）
+PROFILER_REFRESH_FRAMES = 10          # 浮层文字每隔多少帧刷新一次
+
+# ============ 内存诊断配置 ============
+ALLOC_DIAGNOSTICS = False             # 统计每帧创建的 Surface 和分配的内存，退出时写入 data/alloc_report.txt（会明显变慢）
+ALLOC_SOAK = False                    # 长时间运行检查：定期采样内存，持续增长时打印警告（同时打开上面的统计）
+ALLOC_TOP_SITES = 10                  # 报告中列出分配最多的多少个位置
+ALLOC_SOAK_INTERVAL_SECONDS = 300     # 每隔多久采样一次内存
+ALLOC_SOAK_MIN_SAMPLES = 12           # 至少多少个样本后才判断是否持续增长（约 1 小时）
+ALLOC_SOAK_GROWTH_MB_PER_HOUR = 5     # 每小时增长超过多少 MB 算持续增长
+
+# ============ 监控指标配置 ============
+METRICS_ENABLED = False               # 是否导出帧率、音量、鱼数量等指标（Prometheus 文本格式）
+METRICS_INTERVAL_SECONDS = 15         # 每隔多久重写一次 data/metrics.prom
+METRICS_HTTP_PORT = 0                 # 大于 0 时在 127.0.0.1:端口/metrics 提供指标
+
+# ============ 控制接口配置 ============
+CONTROL_API_ENABLED = False           # 在 data/control.sock 上提供本机控制接口（JSON Lines：查询状态、开关番茄钟、订阅变化）
+CONTROL_STATUS_INTERVAL = 0.5         # 没有状态变化时，每隔多久刷新一次查询到的状态（音量、番茄钟剩余时间）
+CONTROL_NOTIFY_INTERVAL = 0.2         # 两次推送之间至少间隔多久，期间的变化合并成一次
+CONTROL_MAX_CLIENTS = 32              # 最多同时连接多少个客户端
+
+# ============ 主循环配置 ============
+ASYNC_LOOP = False                    # 用 asyncio 运行主循环：麦克风在单独线程读取，番茄钟等是定时回调，磁盘 IO 放到线程池
+ASYNC_IO_WORKERS = 2                  # asyncio 主循环中执行磁盘/网络 IO 的线程数
+
+# ============ 分进程配置 ============
+SPLIT_PROCESS = False                 # 音频、种群、统计和番茄钟放在单独的模拟进程中，主进程只负责画图（多核电脑上更流畅）
+SIM_PROCESS_STOP_SECONDS = 10         # 退出时最多等待模拟进程保存数据多久
+
+# ============ 轨迹录制配置 ============
+TRACE_RECORD = False                  # 录制每帧的时长、音量和按键到 data/traces/，用 python -m tools.replay 回放
+TRACE_KEEP = 10                       # 最多保留多少个轨迹文件
+
 # ============ 鱼的行为配置 ============
 FISH_INITIAL_COUNT = 1  # 初始只有1条鱼
 FISH_BUBBLE_CHANCE = 0.25
 BUBBLE_SPAWN_CHANCE = 0.015
+BUBBLE_CAPACITY = 4096         # 气泡粒子池容量
+BUBBLE_TRAIL_RATE = {          # 各稀有度鱼的气泡拖尾（每秒气泡数），未列出的没有拖尾
+    "legendary": 1.5,
+    "mythic": 6.0,
+}
 FISH_GLOW_AGE_THRESHOLD = 0.3  # 鱼需要显示多久后才显示发光效果
 
+# ============ 鱼群行为配置 ============
+SCHOOL_RADIUS = 80             # 邻居感知半径（像素），同时也是空间网格的格子大小
+SCHOOL_SEPARATION = 28         # 小于该距离时互相避让
+SCHOOL_MAX_NEIGHBORS = 12      # 每条鱼最多参考的邻居数量，鱼很密集时限制计算量
+SCHOOL_COHESION = 0.6          # 向同品质鱼群中心靠拢的力度
+SCHOOL_ALIGNMENT = 1.2         # 与同品质鱼群上下游动保持一致的力度
+SCHOOL_AVOIDANCE = 90          # 避让力度（像素/秒²）
+SCHOOL_MAX_VY = 35             # 上下游动的最大速度（像素/秒）
+SCHOOL_TURN_RATE = 0.4         # 同品质鱼大多反向游时，每秒掉头的概率
+
 # ============ 时间配置 ============
 NIGHT_START_HOUR = 23
 NIGHT_END_HOUR = 6
@@ -40,6 +97,45 @@ NIGHT_END_HOUR = 6
 DATA_DIR = "data"
 STATS_FILE = "stats.json"
 ACHIEVEMENTS_FILE = "achievements.json"
+EVENT_LOG_FILE = "events.log"
+EVENT_SNAPSHOT_FILE = "events_snapshot.json"
+HISTORY_DB_FILE = "history.db"
+VOLUME_LOG_FILE = "volume.ring"
+TANK_SNAPSHOT_FILE = "tank.bin"
+AUDIO_DEVICE_CACHE_FILE = "audio_device.json"  # 上次成功打开的麦克风
+SPRITE_CACHE_DIR = "sprite_cache"     # 预渲染精灵的缓存目录（data/sprite_cache/）
+ALLOC_REPORT_FILE = "alloc_report.txt"  # 内存诊断报告
+METRICS_FILE = "metrics.prom"         # 监控指标（原子替换，可交给 node_exporter 收集）
+TRACES_DIR = "traces"                 # 会话轨迹（gzip 压缩的二进制文件）
+CONTROL_SOCKET = "control.sock"       # 控制接口的 Unix 域套接字
+PROFILE_INDEX_FILE = "profiles.json"  # 档案列表（只有名字和最近使用时间）
+PROFILES_DIR = "profiles"             # 其他档案的数据放在 data/profiles/<id>/ 下
+
+# ============ 鱼缸快照配置 ============
+TANK_SNAPSHOT_SECONDS = 30            # 每隔多久在后台保存一次鱼缸快照
+TANK_RESTORE_MAX_MINUTES = 12 * 60    # 快照在这段时间内才恢复，太旧就重新开始
+
+# ============ 档案配置 ============
+DEFAULT_PROFILE_ID = "default"        # 默认档案直接使用 data/ 目录，兼容旧数据
+DEFAULT_PROFILE_NAME = "默认"
+
+# ============ 自动保存配置 ============
+AUTOSAVE_INTERVAL_SECONDS = 30        # 统计数据有改动时，最长多久在后台保存一次
+
+# ============ 历史数据库配置 ============
+HISTORY_DB_ENABLED = True             # 是否把历史记录写入 SQLite（data/history.db）
+HISTORY_FLUSH_SECONDS = 10            # 最长多久把缓冲的记录交给后台写入
+
+# ============ 音量记录配置 ============
+VOLUME_RECORDER_ENABLED = True        # 是否把音量历史写入 data/volume.ring
+VOLUME_RAW_SLOTS = 24 * 3600          # 秒级记录保留 1 天（约 420 KB）
+VOLUME_MINUTE_SLOTS = 90 * 24 * 60    # 分钟汇总保留 90 天（约 1.3 MB）
+VOLUME_HOUR_SLOTS = 2 * 365 * 24      # 小时汇总保留 2 年（约 170 KB）
+
+# ============ 事件日志配置 ============
+EVENT_LOG_BUFFER_SIZE = 64            # 缓冲多少条事件后写入文件
+EVENT_LOG_FLUSH_SECONDS = 5           # 最长多久写入一次
+EVENT_LOG_COMPACT_BYTES = 256 * 1024  # 日志超过该大小后压缩进快照
 
 # ============ 稀有度定义 ============
 RARITY = {
@@ -99,13 +195,6 @@ RARITY = {
     }
 }
 
-# 稀有度权重列表（用于快速查找）
-# 权重值越大，出现概率越高
-RARITY_WEIGHTS = []
-for key, data in RARITY.items():
-    for _ in range(data["weight"]):
-        RARITY_WEIGHTS.append(key)
-
 # 初始鱼数量配置
 FISH_INITIAL_COUNT = 3  # 初始只有3条鱼，该死无疑
 
@@ -126,18 +215,77 @@ BASE_WEIGHT_INTERVAL = 10  # 基础周期10秒
 VOLUME_ADD_MULTIPLIER = 1.0   # 安静时加权倍数
 VOLUME_REMOVE_MULTIPLIER = 2.0  # 吵闹时减权倍数（减得更快）
 
+# ============ 鱼群生成配置 ============
+# 以下参数由 models/population.py 的 PopulationEngine 使用
+# [可调整] 各品质解锁所需的累计安静时间（分钟），参见 doc/fish_probability.md 第6.1节
+RARITY_UNLOCK_MINUTES = {
+    "common": 0,
+    "rare": 2,
+    "epic": 5,
+    "legendary": 10,
+    "mythic": 20,
+}
+
+# [可调整] 基础权重，参见 doc/fish_probability.md 第6.2节
+SPAWN_BASE_WEIGHTS = {
+    "common": 35,
+    "rare": 30,
+    "epic": 20,
+    "legendary": 10,
+    "mythic": 5,
+}
+
+# [可调整] 时间对权重的影响：权重 = 基础权重 * (1 + time_factor * 系数)
+# 参见 doc/fish_probability.md 第6.3节
+SPAWN_TIME_GROWTH = {
+    "common": -0.7,   # 普通鱼权重随时间大幅降低
+    "rare": 0.2,
+    "epic": 0.6,
+    "legendary": 4,   # 传说鱼30分钟时权重翻5倍
+    "mythic": 8,      # 神话鱼30分钟时权重翻9倍
+}
+SPAWN_TIME_FACTOR_MINUTES = 30  # time_factor 达到最大值所需的安静时间（分钟）
+
+# [可调整] 加鱼难度，参见 doc/fish_probability.md 第6.4节
+SPAWN_BASE_SCORE = 10            # 基础需要积分
+SPAWN_SCORE_STEP = 5             # 每个阶段增加的积分
+SPAWN_SCORE_STEP_MINUTES = 5     # 每隔多少分钟进入下一阶段
+
+# [可调整] 积分积累速度，参见 doc/fish_probability.md 第6.5节
+QUIET_SCORE_BASE_RATE = 0.2      # 最小积累速度（每秒）
+QUIET_SCORE_QUIET_RATE = 0.5     # 安静度带来的额外速度
+
+FISH_REMOVE_RATE = 2             # 吵闹时每秒最多移除的鱼数
+MAX_FISH_LIMIT = 50              # 鱼群上限
+
 # ============ 成就定义 ============
+# 每个成就是一条规则，只在订阅的事件发生时检查（models/achievements.py）：
+#   "on"     订阅的事件：fish_caught / fish_count / quiet_time / pomodoro / hour / session_start
+#   "stat"   检查 stats.json 中的字段 >= "min"
+#   "rarity" 检查该稀有度累计获得数量 >= "min"
+#   "hours"  检查当前小时是否在 [开始, 结束) 时段内（可跨零点）
+#   只有 "min" 时，直接比较事件携带的数值（当前鱼数、累计安静秒数）
 ACHIEVEMENTS = {
-    "first_fish": {"name": "首次见面", "desc": "获得第一条鱼", "icon": "🐟"},
-    "rare_hunter": {"name": "稀有猎人", "desc": "获得第一条稀有鱼", "icon": "🎣"},
-    "collector_10": {"name": "鱼类收藏家", "desc": "同时拥有10条鱼", "icon": "🐠"},
-    "collector_20": {"name": "水族馆馆长", "desc": "同时拥有20条鱼", "icon": "🐡"},
-    "legendary_sight": {"name": "见证传说", "desc": "获得第一条传说鱼", "icon": "👑"},
-    "quiet_master": {"name": "安静大师", "desc": "累计安静1小时", "icon": "🧘‍♂️"},
-    "focus_warrior": {"name": "专注战士", "desc": "完成5个番茄钟", "icon": "⏱️"},
-    "night_owl": {"name": "夜猫子", "desc": "深夜时段（23-6点）使用", "icon": "🌙"},
-    "streak_3": {"name": "三天打鱼", "desc": "连续3天使用", "icon": "📅"},
-    "total_fish_100": {"name": "百鱼斩", "desc": "累计获得100条鱼", "icon": "🐋"},
+    "first_fish": {"name": "首次见面", "desc": "获得第一条鱼", "icon": "🐟",
+                   "on": "fish_caught", "stat": "total_fish_caught", "min": 1},
+    "rare_hunter": {"name": "稀有猎人", "desc": "获得第一条稀有鱼", "icon": "🎣",
+                    "on": "fish_caught", "rarity": "rare", "min": 1},
+    "collector_10": {"name": "鱼类收藏家", "desc": "同时拥有10条鱼", "icon": "🐠",
+                     "on": "fish_count", "min": 10},
+    "collector_20": {"name": "水族馆馆长", "desc": "同时拥有20条鱼", "icon": "🐡",
+                     "on": "fish_count", "min": 20},
+    "legendary_sight": {"name": "见证传说", "desc": "获得第一条传说鱼", "icon": "👑",
+                        "on": "fish_caught", "rarity": "legendary", "min": 1},
+    "quiet_master": {"name": "安静大师", "desc": "累计安静1小时", "icon": "🧘‍♂️",
+                     "on": "quiet_time", "min": 3600},
+    "focus_warrior": {"name": "专注战士", "desc": "完成5个番茄钟", "icon": "⏱️",
+                      "on": "pomodoro", "stat": "pomodoro_completed", "min": 5},
+    "night_owl": {"name": "夜猫子", "desc": "深夜时段（23-6点）使用", "icon": "🌙",
+                  "on": "hour", "hours": (NIGHT_START_HOUR, NIGHT_END_HOUR)},
+    "streak_3": {"name": "三天打鱼", "desc": "连续3天使用", "icon": "📅",
+                 "on": "session_start", "stat": "streak_days", "min": 3},
+    "total_fish_100": {"name": "百鱼斩", "desc": "累计获得100条鱼", "icon": "🐋",
+                       "on": "fish_caught", "stat": "total_fish_caught", "min": 100},
 }
 
 # ============ 等级定义 ============
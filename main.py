@@ -3,64 +3,174 @@
 主程序入口
 """
 
+import os
+import sys
 import pygame
 import random
 import math
+import multiprocessing
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # 导入配置
 from config import (
     WIDTH, HEIGHT, FPS, BG_COLOR, WATER_TOP,
+    SIM_DT, SIM_MAX_STEPS_PER_FRAME, SCHOOL_RADIUS,
     SILENCE_THRESHOLD, MAX_FISH, MIN_FISH,
     POMODORO_WORK_MINUTES, POMODORO_BREAK_MINUTES,
     ACHIEVEMENTS, FISH_INITIAL_COUNT, FISH_BUBBLE_CHANCE,
-    BUBBLE_SPAWN_CHANCE, NIGHT_START_HOUR, NIGHT_END_HOUR,
+    BUBBLE_SPAWN_CHANCE,
     RARITY, FISH_RARITY_WEIGHT, BASE_WEIGHT_INTERVAL,
     VOLUME_ADD_MULTIPLIER, VOLUME_REMOVE_MULTIPLIER,
-    AUDIO_MAX_VOLUME
+    DATA_DIR, VOLUME_LOG_FILE, VOLUME_RECORDER_ENABLED,
+    TANK_SNAPSHOT_FILE, TANK_SNAPSHOT_SECONDS, TANK_RESTORE_MAX_MINUTES,
+    AUDIO_DEVICE_CACHE_FILE, STARTUP_FONT_SIZES, SPRITE_CACHE_DIR,
+    ALLOC_DIAGNOSTICS, ALLOC_SOAK, ALLOC_REPORT_FILE, METRICS_ENABLED,
+    TRACE_RECORD, TRACE_KEEP, TRACES_DIR, SPLIT_PROCESS, SIM_PROCESS_STOP_SECONDS,
+    ASYNC_LOOP, CONTROL_API_ENABLED, CONTROL_SOCKET
 )
 
 # 导入模块
-from models.audio import AudioMonitor
+from models import tank_snapshot
+from models.autosave import AutoSaver
 from models.fish import Fish
-from models.bubble import Bubble
+from models.bubble import BubbleSystem
+from models.profiler import FrameProfiler
+from models.profiles import ProfileIndex
+from models.population import PopulationEngine, SPAWN, REMOVE, QUIET, initial_rarity
+from models.spatial import SpatialGrid
 from models.stats import StatsManager
 from ui.font_manager import FontManager
 from ui.panel import UIPanel
 
 
 class QuietFishApp:
-    def __init__(self):
+    def __init__(self, replay=None):
+        # 启动分阶段计时（毫秒），首帧画完后打印
+        self._startup_t0 = time.perf_counter()
+        self.startup_timings = {}
+
         pygame.init()
+        # 内存诊断：要在创建字体之前替换 Surface/Font，平时为 None
+        self.alloc_tracker = None
+        if ALLOC_DIAGNOSTICS or ALLOC_SOAK:
+            from models.alloc_tracker import AllocTracker
+            self.alloc_tracker = AllocTracker(soak=ALLOC_SOAK)
+            self.alloc_tracker.start()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("安静养鱼 - 自习神器")
         self.clock = pygame.time.Clock()
 
-        # 初始化模块
-        self.font_manager = FontManager()
+        # 第一阶段：先显示窗口和背景
+        self.screen.fill(BG_COLOR)
+        self._draw_water()
+        pygame.display.flip()
+        self._mark_startup("window")
+
+        # 第二阶段：字体加载、音频设备探测、鱼精灵加载、统计数据读取在后台并行进行
+        startup = ThreadPoolExecutor(max_workers=4, thread_name_prefix="Startup")
+        fonts = startup.submit(lambda: FontManager().preload(STARTUP_FONT_SIZES))
+        # 分进程模式下麦克风由模拟进程打开
+        split = SPLIT_PROCESS and replay is None
+        audio = startup.submit(self._open_audio) if not split else None
+        self._audio_future = audio
+        self._sprites_future = startup.submit(self._load_sprites)
+        # 档案：启动时只读档案列表，选中后才加载该档案的数据；
+        # 只有一个档案时不用选择，和字体同时读取统计数据
+        self.profiles = ProfileIndex()
+        stats = None
+        if not split and len(self.profiles) <= 1:
+            stats = startup.submit(StatsManager, self.profiles.data_dir_for(self.profiles.last))
+        startup.shutdown(wait=False)
+
+        self.font_manager = fonts.result()
+        self._mark_startup("fonts")
         self.ui = UIPanel(self.font_manager)
-        self.audio = AudioMonitor()
-        self.stats = StatsManager()
+        self.profile_picker = None
+        self.profile_id = self._choose_profile()
+        self.profiles.select(self.profile_id)
+        self.sim_process = None
+        if split:
+            self._start_simulation_process()
+        elif stats is not None:
+            self.stats = stats.result()
+        else:
+            self.stats = StatsManager(self.profiles.data_dir_for(self.profile_id))
+        self._mark_startup("stats")
+        self._update_caption()
+        # 音频设备探测完成前音量按 0 处理，不阻塞首帧
+        self._init_state(audio)
+        # 本帧的 pygame ticks（毫秒），番茄钟用它计时，回放时来自轨迹
+        self.ticks = pygame.time.get_ticks()
+        # 渲染插值比例：0 表示上一个模拟步，1 表示当前模拟步
+        self.render_alpha = 1.0
+        # 还没有推进的模拟时间（秒）
+        self._accumulator = 0.0
+        # 监控指标（可选）：主线程每帧更新，后台线程写文件/提供 HTTP 接口
+        self.metrics = None
+        self.metrics_exporter = None
+        if METRICS_ENABLED:
+            from models.metrics import AppMetrics, MetricsExporter, MetricsRegistry
+            registry = MetricsRegistry()
+            self.metrics = AppMetrics(registry)
+            self.metrics_exporter = MetricsExporter(registry).start()
+        # 本机控制接口（可选）：后台线程处理连接，命令在主线程每帧执行；回放时不接受外部命令
+        self.control = None
+        if CONTROL_API_ENABLED and replay is None:
+            from models.control_api import ControlServer
+            self.control = ControlServer(os.path.join(DATA_DIR, CONTROL_SOCKET)).start()
+
+        # 水面光斑效果初始化
+        self.light_spots = []
+        self._init_light_spots()
+
+        if self.sim_process is None:
+            self._init_simulation()
+
+        # 轨迹：回放时从轨迹记下的种子和鱼缸开始，录制时重新设定种子并记下当前鱼缸
+        self.replay = replay
+        self.trace_recorder = None
+        if replay is not None:
+            self._begin_trace(replay.seed, replay.snapshot)
+        elif TRACE_RECORD and self.sim_process is None:
+            from models.trace import TraceRecorder, new_trace_path
+            seed = random.getrandbits(32)
+            snapshot = self._begin_trace(seed)
+            path = new_trace_path(os.path.join(DATA_DIR, TRACES_DIR), TRACE_KEEP)
+            self.trace_recorder = TraceRecorder(path, seed, snapshot)
+
+    def _init_state(self, audio):
+        """不依赖窗口的运行状态（模拟进程中的 SimulationApp 也用它初始化）
+
+        audio: 后台打开麦克风的 Future，为 None 时不使用麦克风
+        """
+        # 切换档案时后台加载好的 (编号, StatsManager)，以及后台加载/保存的线程
+        self._loaded_profile = None
+        self._profile_threads = []
+        # 加载档案期间又选择的档案，当前这次切换完成后再加载
+        self._next_profile_id = None
+        # 历史面板第一次打开时才创建
+        self.dashboard = None
+        # 性能分析：关闭时计时调用都是空函数，浮层第一次打开时才创建
+        self.profiler = FrameProfiler()
+        self.profiler_overlay = None
+        # asyncio 主循环（models.async_loop.AsyncRunner）运行时由它设置，负责定时器和磁盘 IO
+        self.runtime = None
+
+        self._audio_future = audio
+        self.volume_recorder = None
+        self.audio = None
 
         # 游戏状态
         self.fish_list = []
-        self.bubbles = []
+        self.bubbles = BubbleSystem()
         self.quiet_time_this_session = 0
         self.last_time = time.time()
         self.is_quiet = True
-        
-        # 权重系统：记录每种鱼的累计权重值
-        self.fish_weights = {rarity: 0.0 for rarity in RARITY.keys()}
-        self.last_weight_update = time.time()
-        # 安静积分：用于计算加鱼的全局进度
-        self.quiet_score = 0
-        # 当前阶段需要的积分
-        self.current_required_score = 10
-        # 本次安静累计时间（秒）
-        self.session_quiet_time = 0
-        # 最大鱼数
-        self.max_fish_limit = 50
+        # 本帧读取的音量（每帧只读取一次麦克风）
+        self.volume = 0
 
         # 番茄钟状态
         self.pomodoro = {
@@ -74,6 +184,13 @@ class QuietFishApp:
         self.new_achievements = []
         self.achievement_flash_timer = 0
 
+    def _init_simulation(self):
+        """种群引擎、空间网格和鱼缸快照（分进程模式下只在模拟进程中创建）"""
+        # 种群引擎：安静积分、品质解锁、加鱼/减鱼都在这里计算
+        self.population = PopulationEngine()
+        # 鱼群邻居查询用的空间网格（覆盖整个水体）
+        self.fish_grid = SpatialGrid(WIDTH, WATER_TOP, HEIGHT, SCHOOL_RADIUS)
+
         # 检查连续天数
         self.stats.check_streak()
 
@@ -81,20 +198,70 @@ class QuietFishApp:
         self._bubble_x_range = (100, WIDTH - 100)
         self._bubble_small_x_range = (50, WIDTH - 50)
 
-        # 水面光斑效果初始化
-        self.light_spots = []
-        self._init_light_spots()
-
-        # 初始鱼 - 只生成普通或稀有（不会出现史诗及以上）
-        for _ in range(FISH_INITIAL_COUNT):
-            fish = self._create_initial_fish()
-            self.fish_list.append(fish)
-
-    def handle_events(self):
-        for event in pygame.event.get():
+        # 鱼缸快照：定期在后台保存，重启时恢复上次的鱼缸
+        self.tank_saver = AutoSaver(TANK_SNAPSHOT_SECONDS)
+        self.tank_saver.register("tank", os.path.join(DATA_DIR, TANK_SNAPSHOT_FILE),
+                                 lambda: tank_snapshot.pack(self.fish_list, self.population))
+        # 切换档案后的档案列表也由它在后台写入
+        self.tank_saver.register("profiles", self.profiles.path, lambda: self.profiles.data,
+                                 ensure_ascii=False, indent=2)
+
+        if not self._restore_tank():
+            # 初始鱼 - 只生成普通或稀有（不会出现史诗及以上）
+            for _ in range(FISH_INITIAL_COUNT):
+                fish = self._create_initial_fish()
+                self.fish_list.append(fish)
+                self.population.add(fish.rarity)
+        self.stats.record_fish_count(len(self.fish_list))
+
+    def _start_simulation_process(self):
+        """分进程模式：音频、种群引擎、统计和番茄钟放到模拟进程，本进程只读共享内存画图"""
+        from models.shared_state import PopulationView, SharedTankState, StatsView
+        from models.sim_process import run_simulation
+        context = multiprocessing.get_context("spawn")
+        self.shared_state = SharedTankState()
+        self.sim_commands = context.Queue()
+        self.sim_process = context.Process(
+            target=run_simulation, name="QuietFishSim",
+            args=(self.shared_state.name, self.profile_id, self.sim_commands))
+        self.sim_process.start()
+        # 统计面板和鱼群面板显示的数字，每个模拟步从共享内存更新
+        self.stats = StatsView()
+        self.population = PopulationView()
+        # 最新模拟步的时间（time.monotonic），用于渲染插值
+        self._sim_step_time = time.monotonic()
+
+    def _stop_simulation_process(self):
+        """通知模拟进程保存数据并退出"""
+        self.sim_commands.put("quit")
+        self.sim_process.join(SIM_PROCESS_STOP_SECONDS)
+        if self.sim_process.is_alive():
+            print("[QuietFish] 模拟进程没有按时退出，强制结束")
+            self.sim_process.terminate()
+            self.sim_process.join()
+        self.sim_commands.close()
+        self.shared_state.close()
+
+    def _read_simulation(self):
+        """读取模拟进程发布的最新状态，返回模拟进程是否还在运行"""
+        step_time = self.shared_state.read(self)
+        if step_time is not None:
+            self._sim_step_time = step_time
+        self.render_alpha = min(1.0, max(0.0, (time.monotonic() - self._sim_step_time) / SIM_DT))
+        return self.sim_process.is_alive()
+
+    def handle_events(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
 
+            # 档案选择界面打开时，按键都交给它
+            if self.profile_picker is not None and self.profile_picker.visible:
+                chosen = self.profile_picker.handle_event(event)
+                if chosen is not None:
+                    self.switch_profile(chosen)
+                continue
+
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_q:
                     return False
@@ -102,18 +269,212 @@ class QuietFishApp:
                     self.toggle_pomodoro()
                 elif event.key == pygame.K_s:
                     self.save_screenshot()
+                elif event.key in (pygame.K_h, pygame.K_p) and self.sim_process is not None:
+                    # 历史记录和档案数据都在模拟进程中
+                    print("[QuietFish] 分进程模式下不能打开历史面板或切换档案")
+                elif event.key == pygame.K_h:
+                    self._toggle_dashboard()
+                elif event.key == pygame.K_p:
+                    self._get_profile_picker().open(self.profile_id)
+                elif event.key == pygame.K_F3:
+                    self._toggle_profiler()
+
+        return True
+
+    def _mark_startup(self, stage):
+        self.startup_timings[stage] = (time.perf_counter() - self._startup_t0) * 1000
+
+    def _open_audio(self):
+        """在后台线程中创建音量记录器和音频监控（探测设备较慢）"""
+        from models.audio import AudioMonitor
+        recorder = None
+        if VOLUME_RECORDER_ENABLED:
+            from models.volume_recorder import VolumeRecorder
+            recorder = VolumeRecorder(os.path.join(DATA_DIR, VOLUME_LOG_FILE))
+        audio = AudioMonitor(recorder=recorder,
+                             device_cache=os.path.join(DATA_DIR, AUDIO_DEVICE_CACHE_FILE))
+        return recorder, audio
+
+    def _load_sprites(self):
+        """在后台线程中加载（或首次烘焙）鱼精灵，完成前鱼按原来的方式逐帧绘制
+
+        返回完成时间（perf_counter），启动计时由主线程在 _poll_sprites() 中记录
+        """
+        from models.sprite_cache import load_or_bake
+        Fish.atlas = load_or_bake(os.path.join(DATA_DIR, SPRITE_CACHE_DIR))
+        return time.perf_counter()
+
+    def _poll_sprites(self):
+        """精灵加载完成后记录启动计时；首帧之后才完成时单独打印"""
+        if self._sprites_future is None or not self._sprites_future.done():
+            return
+        done_at = self._sprites_future.result()
+        self._sprites_future = None
+        if done_at is None:
+            return
+        self.startup_timings["sprites"] = (done_at - self._startup_t0) * 1000
+        if "first_frame" in self.startup_timings:
+            print(f"[QuietFish] 精灵就绪: {self.startup_timings['sprites']:.0f}ms")
+
+    def _poll_audio(self, wait=False):
+        """后台音频初始化完成后接管音频监控"""
+        if self._audio_future is None or not (wait or self._audio_future.done()):
+            return
+        self.volume_recorder, self.audio = self._audio_future.result()
+        self._audio_future = None
+        if self.dashboard is not None:
+            self.dashboard.volume_recorder = self.volume_recorder
+        self._mark_startup("audio")
+        print(f"[QuietFish] 音频就绪: {self.startup_timings['audio']:.0f}ms")
+
+    def _get_profile_picker(self):
+        if self.profile_picker is None:
+            from ui.profile_picker import ProfilePicker
+            self.profile_picker = ProfilePicker(self.font_manager, self.profiles)
+        return self.profile_picker
+
+    def _toggle_dashboard(self):
+        if self.dashboard is None:
+            from ui.dashboard import HistoryDashboard
+            self.dashboard = HistoryDashboard(self.font_manager, self.stats.history,
+                                              self.volume_recorder)
+        self.dashboard.toggle()
+
+    def _toggle_profiler(self):
+        if self.profiler_overlay is None:
+            from ui.profiler_overlay import ProfilerOverlay
+            self.profiler_overlay = ProfilerOverlay(self.font_manager, self.profiler)
+        self.profiler.toggle()
+
+    def _choose_profile(self):
+        """启动时选择档案（只有一个档案时直接使用）"""
+        if len(self.profiles) <= 1:
+            return self.profiles.last
+        picker = self._get_profile_picker()
+        picker.open(self.profiles.last)
+        while picker.visible:
+            self.clock.tick(FPS)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    # 后台打开的麦克风（连同音量记录器）也要关闭
+                    if self._audio_future is not None:
+                        audio = self._audio_future.result()[1]
+                        if audio is not None:
+                            audio.close()
+                    pygame.quit()
+                    sys.exit()
+                chosen = picker.handle_event(event)
+                if chosen is not None:
+                    return chosen
+            self.screen.fill(BG_COLOR)
+            picker.draw(self.screen)
+            pygame.display.flip()
+        return self.profiles.last
+
+    def _update_caption(self):
+        name = self.profiles.get(self.profile_id)["name"]
+        pygame.display.set_caption(f"安静养鱼 - 自习神器 [{name}]")
+
+    def switch_profile(self, profile_id):
+        """在后台加载新档案，加载完成后在 update() 中切换"""
+        if self._loaded_profile is not None or any(
+                t.name == "ProfileLoader" and t.is_alive() for t in self._profile_threads):
+            # 正在加载另一个档案：记下最后一次的选择，切换完成后接着加载
+            self._next_profile_id = profile_id
+            print(f"[QuietFish] 正在加载档案，完成后切换到 {self.profiles.get(profile_id)['name']}")
+            return
+        self._next_profile_id = None
+        if profile_id == self.profile_id:
+            return
 
+        # 档案列表只在主线程读写（档案选择界面也在用），后台线程只加载统计数据
+        data_dir = self.profiles.data_dir_for(profile_id)
+
+        def load():
+            stats = StatsManager(data_dir)
+            stats.check_streak()
+            self._loaded_profile = (profile_id, stats)
+
+        self._start_profile_thread(load, "ProfileLoader")
+
+    def _start_profile_thread(self, target, name):
+        self._profile_threads = [t for t in self._profile_threads if t.is_alive()]
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._profile_threads.append(thread)
+
+    def _swap_profile(self):
+        """切换到后台加载好的档案，旧档案在后台保存"""
+        old = self.stats
+        self.profile_id, self.stats = self._loaded_profile
+        self._loaded_profile = None
+        # 真正切换后才记为最近使用的档案，档案列表交给后台线程写盘
+        self.profiles.select(self.profile_id, save=False)
+        self.tank_saver.mark_dirty("profiles")
+        self.tank_saver.flush(wait=False)
+        if self.dashboard is not None:
+            self.dashboard.set_history(self.stats.history)
+        if old.history is not None:
+            # 历史面板的查询连接是在主线程创建的，只能在主线程关闭
+            old.history.close_reader()
+        self.stats.record_fish_count(len(self.fish_list))
+        if self.runtime is not None:
+            # asyncio 主循环中整点检查是定时回调，新档案先检查一次当前小时
+            self.stats.check_hour()
+        self._update_caption()
+        self._start_profile_thread(old.close, "ProfileSaver")
+        if self._next_profile_id is not None:
+            self.switch_profile(self._next_profile_id)
+
+    def _restore_tank(self):
+        """从快照恢复鱼群和会话状态，没有可用的快照时返回 False"""
+        snapshot = tank_snapshot.load(os.path.join(DATA_DIR, TANK_SNAPSHOT_FILE),
+                                      TANK_RESTORE_MAX_MINUTES * 60)
+        if snapshot is None:
+            return False
+        self._load_tank(*snapshot)
         return True
 
+    def _load_tank(self, header, records):
+        """用快照中的鱼群和种群状态替换当前鱼缸"""
+        self.fish_list = []
+        self.fish_grid = SpatialGrid(WIDTH, WATER_TOP, HEIGHT, SCHOOL_RADIUS)
+        for record in records:
+            fish = tank_snapshot.restore_fish(
+                self._create_fish(tank_snapshot.RARITY_KEYS[record[0]]), record)
+            self.fish_list.append(fish)
+            self.population.add(fish.rarity)
+            self.bubbles.attach(fish)
+        tank_snapshot.restore_population(self.population, header)
+
+    def _begin_trace(self, seed, snapshot=None):
+        """把模拟重置到确定的起点（随机种子 + 鱼缸快照），返回起点的快照
+
+        录制时也从打包后的快照重新加载鱼缸（坐标等存成 float32），
+        这样录制和回放的起点完全相同。
+        """
+        if snapshot is None:
+            snapshot = tank_snapshot.pack(self.fish_list, self.population, saved_at=0)
+        tank = tank_snapshot.unpack(snapshot)
+        if tank is None:
+            raise ValueError("damaged tank snapshot in trace")
+        random.seed(seed)
+        self.population = PopulationEngine(seed=seed)
+        self.bubbles = BubbleSystem()
+        self.light_spots = []
+        self._init_light_spots()
+        self.pomodoro.update(active=False, is_break=False, start_time=0, end_time=0)
+        self.new_achievements = []
+        self.achievement_flash_timer = 0
+        self._load_tank(*tank)
+        return snapshot
+
     def _create_initial_fish(self):
         """创建初始鱼 - 只可能是普通或稀有"""
-        import random
-        # 只从普通和稀有中选择
-        initial_rarities = ["common", "rare"]
-        # 普通概率 70%，稀有概率 30%
-        rarity = random.choices(initial_rarities, weights=[70, 30])[0]
+        return self._create_fish(initial_rarity(random))
 
-        # 创建鱼并强制设置稀有度
+    def _create_fish(self, rarity):
+        """创建指定稀有度的鱼"""
         fish = Fish()
         fish.rarity = rarity
         data = RARITY[rarity]
@@ -142,7 +503,7 @@ class QuietFishApp:
 
     def _update_and_draw_light_spots(self, dt):
         """更新并绘制水面光斑"""
-        current_time = time.time()
+        current_time = self.last_time
         for spot in self.light_spots:
             # 缓慢移动
             spot['x'] += math.sin(current_time * 0.5 + spot['phase']) * spot['speed'] * dt
@@ -177,7 +538,10 @@ class QuietFishApp:
 
     def toggle_pomodoro(self):
         """切换番茄钟"""
-        now = pygame.time.get_ticks()
+        if self.sim_process is not None:
+            self.sim_commands.put("toggle_pomodoro")
+            return
+        now = self.ticks
         if self.pomodoro["active"]:
             # 停止番茄钟
             self.pomodoro["active"] = False
@@ -188,13 +552,15 @@ class QuietFishApp:
             self.pomodoro["is_break"] = False
             self.pomodoro["start_time"] = now
             self.pomodoro["end_time"] = now + POMODORO_WORK_MINUTES * 60 * 1000
+        if self.runtime is not None:
+            self.runtime.pomodoro_changed()
 
     def check_pomodoro_complete(self):
         """检查番茄钟是否完成"""
         if not self.pomodoro["active"]:
             return
 
-        now = pygame.time.get_ticks()
+        now = self.ticks
         if now >= self.pomodoro["end_time"]:
             if self.pomodoro["is_break"]:
                 # 休息结束，回到工作
@@ -214,12 +580,16 @@ class QuietFishApp:
     def save_screenshot(self):
         """保存截图"""
         filename = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        pygame.image.save(self.screen, filename)
+        if self.runtime is not None:
+            # 编码和写盘放到线程池，不占用这一帧
+            self.runtime.run_io(pygame.image.save, self.screen.copy(), filename)
+        else:
+            pygame.image.save(self.screen, filename)
 
     def update(self, dt):
-        # 获取音量
-        volume = self.audio.get_volume()
-        was_quiet = self.is_quiet
+        """推进一个固定的模拟步"""
+        lap = self.profiler.lap
+        volume = self.volume
         self.is_quiet = volume < SILENCE_THRESHOLD
 
         # 安静时间统计
@@ -227,196 +597,68 @@ class QuietFishApp:
             self.quiet_time_this_session += dt
             self.stats.record_quiet_time(dt)
 
-        # 番茄钟检查
-        self.check_pomodoro_complete()
-
-        # ========== 权重系统：基于权重的鱼数量动态调整 ==========
-        fish_list = self.fish_list
-        stats = self.stats
-
-        # 计算时间差
-        now = time.time()
-        time_delta = now - self.last_weight_update
-        self.last_weight_update = now
+        # 后台加载的档案已就绪
+        if self._loaded_profile is not None:
+            self._swap_profile()
 
-        # 根据声音计算加权/减权速度
-        normalized_volume = min(1.0, volume / AUDIO_MAX_VOLUME)  # 归一化到 0-1
+        # 番茄钟检查（asyncio 主循环中由定时回调检查）
+        if self.runtime is None:
+            self.check_pomodoro_complete()
 
-        # 安静度：0-1，越安静越接近1
-        quietness = 1 - (normalized_volume ** 0.5)
+        # 定期写入事件日志
+        self.stats.tick(poll_hour=self.runtime is None)
+        # 鱼缸每一步都在变化，到时间后在后台保存快照
+        self.tank_saver.mark_dirty("tank")
+        self.tank_saver.tick()
+        lap("stats")
 
-        # 统计当前各稀有度鱼的数量
-        rarity_counts = {r: 0 for r in RARITY.keys()}
-        for fish in fish_list:
-            rarity_counts[fish.rarity] += 1
-
-        # 检测从吵闹恢复到安静的状态转换
-        if self.is_quiet and not was_quiet:
-            # 刚刚恢复安静，清零安静积分，但保留本次会话累计时间
-            self.quiet_score = 0
-
-        # 计算净权重变化速度
-        # 安静时：慢慢积累权重
-        # 吵闹时：快速失去鱼，权重清零
-        if self.is_quiet:
-            # 安静环境：慢慢积累权重
-            # [可调整] 如需修改积分积累速度，参见 doc/fish_probability.md 第6.5节
-            # 基础积累速度：每秒积累 0.2-0.8 点权重（很慢）
-            base_accumulation = 0.2 + quietness * 0.5  # [可调整] 0.3是最小速度，0.5是速度范围
-            net_weight_change = base_accumulation * time_delta
-            # 积累安静积分
-            self.quiet_score += net_weight_change
-            # 累计本次安静时间
-            self.session_quiet_time += time_delta
-        else:
-            # 吵闹环境：清零所有权重和安静积分
-            net_weight_change = 0
-            for rarity in self.fish_weights:
-                self.fish_weights[rarity] = 0
-            self.quiet_score = 0
-
-        # 更新每种鱼的权重（只在安静时积累）
-        if self.is_quiet:
-            for rarity in self.fish_weights:
-                self.fish_weights[rarity] += net_weight_change
-                self.fish_weights[rarity] = min(100, self.fish_weights[rarity])
-
-        # === 基于累计安静时间的品质解锁系统 ===
-        # 30分钟(1800秒)内渐进解锁高品质鱼
-        # [可调整] 如需修改品质解锁时间，参见 doc/fish_probability.md 第6.1节
-        quiet_minutes = self.session_quiet_time / 60
-
-        # 根据累计安静时间确定可出现的最高品质
-        # [可调整] 以下时间阈值控制各品质鱼的解锁时机
-        # 0-2分钟：只有普通
-        # 2-5分钟：解锁稀有
-        # 5-10分钟：解锁史诗
-        # 10-20分钟：解锁传说
-        # 20-30分钟：解锁神话
-        if quiet_minutes < 2:           # [可调整] 普通鱼解锁时间(分钟)
-            max_unlocked_rarity = "common"
-        elif quiet_minutes < 5:         # [可调整] 稀有鱼解锁时间(分钟)
-            max_unlocked_rarity = "rare"
-        elif quiet_minutes < 10:        # [可调整] 史诗鱼解锁时间(分钟)
-            max_unlocked_rarity = "epic"
-        elif quiet_minutes < 20:        # [可调整] 传说鱼解锁时间(分钟)
-            max_unlocked_rarity = "legendary"
-        else:                           # [可调整] 神话鱼解锁时间(分钟)
-            max_unlocked_rarity = "mythic"
-
-        # 构建允许的稀有度列表
-        rarity_order = ["common", "rare", "epic", "legendary", "mythic"]
-        max_index = rarity_order.index(max_unlocked_rarity)
-        allowed_rarities = rarity_order[:max_index + 1]
-
-        # 根据累计时间调整加鱼难度（越往后越难加，但品质越高）
-        # [可调整] 如需修改加鱼难度规则，参见 doc/fish_probability.md 第6.4节
-        # 基础需要积分：10点
-        # 每过5分钟增加5点难度
-        difficulty_increase = int(quiet_minutes / 5) * 5  # [可调整] 修改 /5 和 *5 改变难度增长
-        self.current_required_score = 10 + difficulty_increase  # [可调整] 修改 10 改变基础难度
-
-        # === 加鱼逻辑 ===
-        if len(fish_list) < self.max_fish_limit and self.is_quiet and net_weight_change > 0:
-            # 检查是否达到加鱼条件
-            if self.quiet_score >= self.current_required_score:
-                # 根据累计安静时间调整权重
-                # 时间越长，高品质概率越高
-                time_factor = min(1.0, quiet_minutes / 30)  # 0-1，30分钟达到最大
-
-                # 基础权重 - 调整后30分钟高品质概率更高
-                # [可调整] 如需修改基础权重，参见 doc/fish_probability.md 第6.2节
-                base_weights = {
-                    "common": 35,      # [可调整] 普通鱼基础权重
-                    "rare": 30,        # [可调整] 稀有鱼基础权重
-                    "epic": 20,        # [可调整] 史诗鱼基础权重
-                    "legendary": 10,   # [可调整] 传说鱼基础权重
-                    "mythic": 5        # [可调整] 神话鱼基础权重
-                }
-
-                # 根据时间调整权重（时间越长，高品质权重越高）
-                # [可调整] 如需修改时间对权重的影响，参见 doc/fish_probability.md 第6.3节
-                rarity_weights = {}
-                for rarity in allowed_rarities:
-                    if rarity == "common":
-                        # 普通鱼权重随时间大幅降低
-                        rarity_weights[rarity] = base_weights[rarity] * (1 - time_factor * 0.7)  # [可调整] 0.7控制普通鱼权重下降速度
-                    elif rarity == "rare":
-                        rarity_weights[rarity] = base_weights[rarity] * (1 + time_factor * 0.2)  # [可调整] 0.2控制稀有鱼权重增长速度
-                    elif rarity == "epic":
-                        rarity_weights[rarity] = base_weights[rarity] * (1 + time_factor * 0.6)  # [可调整] 0.6控制史诗鱼权重增长速度
-                    elif rarity == "legendary":
-                        # 传说鱼30分钟时权重翻倍
-                        rarity_weights[rarity] = base_weights[rarity] * (1 + time_factor * 4)    # [可调整] 4控制传说鱼权重增长速度
-                    elif rarity == "mythic":
-                        # 神话鱼30分钟时权重翻5倍
-                        rarity_weights[rarity] = base_weights[rarity] * (1 + time_factor * 8)    # [可调整] 8控制神话鱼权重增长速度
-
-                # 只选择允许的稀有度
-                available_rarities = [r for r in allowed_rarities]
-                available_weights = [rarity_weights[r] for r in available_rarities]
-
-                # 按权重随机选择
-                chosen_rarity = random.choices(available_rarities, weights=available_weights)[0]
-
-                # 创建指定稀有度的鱼
-                fish = Fish()
-                fish.rarity = chosen_rarity
-                data = RARITY[chosen_rarity]
-                fish.color = random.choice(data["colors"])
-                fish.size = random.randint(*data["size"])
-                fish.speed = random.uniform(0.4, 0.7) * data["speed"]
-                fish.threshold_mult = data["threshold"]
-                fish.has_glow = data["glow"]
-                fish.glow_color = data.get("glow_color", (255, 255, 255, 100))
-                fish.points = data.get("points", 10)
+        # ========== 鱼群数量：交给种群引擎计算 ==========
+        fish_list = self.fish_list
+        stats = self.stats
 
+        for kind, rarity in self.population.step(dt, volume):
+            if kind == SPAWN:
+                fish = self._create_fish(rarity)
                 fish_list.append(fish)
                 stats.record_fish(fish)
-                # 消耗安静积分，清零重新开始积累
-                self.quiet_score = 0
+                self.bubbles.attach(fish)
 
                 # occasional bubble
                 if random.random() < FISH_BUBBLE_CHANCE:
-                    self.bubbles.append(Bubble(
-                        random.randint(*self._bubble_x_range),
-                        HEIGHT, WIDTH
-                    ))
-
-        elif not self.is_quiet and len(fish_list) > 0:
-            # 吵闹时：快速失去鱼，从高品质开始
-            remove_chance = (1 - quietness) * dt * 2  # 每秒可能移除2条
-            if random.random() < remove_chance:
-                # 按稀有度从高到低移除
-                for rarity in ["mythic", "legendary", "epic", "rare", "common"]:
-                    if rarity_counts[rarity] > 0:
-                        # 找到并移除该稀有度的鱼
-                        for i, fish in enumerate(fish_list):
-                            if fish.rarity == rarity:
-                                fish_list.pop(i)
-                                break
-                        break  # 每次只移除一条
-
-        # 更新鱼
+                    self.bubbles.spawn(random.randint(*self._bubble_x_range), HEIGHT)
+            elif kind == REMOVE:
+                # 移除该稀有度的第一条鱼
+                for i, fish in enumerate(fish_list):
+                    if fish.rarity == rarity:
+                        removed = fish_list.pop(i)
+                        self.fish_grid.remove(removed)
+                        self.bubbles.detach(removed)
+                        break
+                stats.record_fish_lost(rarity)
+            else:
+                stats.record_quiet_change(kind == QUIET)
+                continue
+            stats.record_fish_count(len(fish_list))
+        lap("population")
+
+        # 更新鱼：邻居来自空间网格，移动后增量更新网格
+        grid = self.fish_grid
         for fish in fish_list:
-            fish.update(volume, dt, WATER_TOP)
+            fish.update(volume, dt, WATER_TOP, grid.nearby(fish.x, fish.y))
+            grid.move(fish, fish.x, fish.y)
+        lap("fish_update")
 
         # 更新气泡
-        self.bubbles = [b for b in self.bubbles if b.draw(self.screen, WATER_TOP)]
-        if random.random() < BUBBLE_SPAWN_CHANCE:
-            self.bubbles.append(Bubble(
-                random.randint(*self._bubble_small_x_range),
-                HEIGHT, WIDTH
-            ))
-
-        # 检查成就 - 缓存当前时间
-        current_hour = datetime.now().hour
-        is_night = current_hour >= NIGHT_START_HOUR or current_hour < NIGHT_END_HOUR
-        quiet_hours = stats.stats["total_quiet_seconds"] / 3600
-        
-        new_achs = stats.check_achievements(len(fish_list), quiet_hours, is_night)
+        self.bubbles.update(dt, WATER_TOP)
+        # BUBBLE_SPAWN_CHANCE 是按 60 帧/秒设定的每帧概率，折算到当前步长
+        if random.random() < BUBBLE_SPAWN_CHANCE * 60 * dt:
+            self.bubbles.spawn(random.randint(*self._bubble_small_x_range), HEIGHT)
+        lap("bubbles")
+
+        # 成就由事件驱动解锁，这里只取走新解锁的成就
+        new_achs = stats.pop_new_achievements()
         if new_achs:
-            self.new_achievements.extend(new_achs)
+            self.new_achievements.extend(k for k in new_achs if k not in self.new_achievements)
             self.achievement_flash_timer = 2.0
 
         # 更新成就通知计时
@@ -424,27 +666,21 @@ class QuietFishApp:
             self.achievement_flash_timer -= dt
             if self.achievement_flash_timer < 0:
                 self.new_achievements = []
+        lap("stats")
 
     def draw_background(self):
         """绘制背景"""
+        lap = self.profiler.lap
         self.screen.fill(BG_COLOR)
-
-        # 水面渐变 - 使用预计算颜色减少每帧计算
-        water_height = HEIGHT - WATER_TOP
-        for y in range(WATER_TOP, HEIGHT, 3):
-            ratio = (y - WATER_TOP) / water_height
-            color = (
-                int(30 + ratio * 25),
-                int(80 + ratio * 40),
-                int(130 + ratio * 50)
-            )
-            pygame.draw.line(self.screen, color, (0, y), (WIDTH, y), 3)
+        self._draw_water()
+        lap("background")
 
         # 水面光斑 - 在鱼下面绘制
         self._update_and_draw_light_spots(1 / FPS)
+        lap("light_spots")
 
         # 水草
-        current_time = time.time()
+        current_time = self.last_time
         for i in range(0, WIDTH, 90):
             base_height = WATER_TOP + 15 + 12 * (i % 3)
             sway = math.sin(current_time * 1.5 + i * 0.08) * 18
@@ -454,22 +690,43 @@ class QuietFishApp:
                 (i + 35 + sway * 1.6, base_height)
             ]
             pygame.draw.lines(self.screen, (45, 150, 90), False, points, 4)
+        lap("background")
+
+    def _draw_water(self):
+        # 水面渐变 - 使用预计算颜色减少每帧计算
+        water_height = HEIGHT - WATER_TOP
+        for y in range(WATER_TOP, HEIGHT, 3):
+            ratio = (y - WATER_TOP) / water_height
+            color = (
+                int(30 + ratio * 25),
+                int(80 + ratio * 40),
+                int(130 + ratio * 50)
+            )
+            pygame.draw.line(self.screen, color, (0, y), (WIDTH, y), 3)
 
     def draw(self):
+        lap = self.profiler.lap
         self.draw_background()
 
         # 画鱼
+        alpha = self.render_alpha
         for fish in self.fish_list:
-            fish.draw(self.screen)
+            fish.draw(self.screen, alpha)
+        lap("fish_draw")
+
+        # 气泡
+        self.bubbles.draw(self.screen, alpha)
+        lap("bubbles_draw")
 
         # UI
-        volume = self.audio.get_volume()
+        volume = self.volume
         self.ui.draw_stats_panel(self.screen, self.stats, volume, len(self.fish_list),
                                  self.is_quiet, self.pomodoro)
-        self.ui.draw_fish_panel(self.screen, self.fish_list, self.fish_weights,
-                                self.quiet_score, self.current_required_score,
-                                self.max_fish_limit, self.session_quiet_time, self.is_quiet)
-        self.ui.draw_pomodoro(self.screen, self.pomodoro)
+        population = self.population
+        self.ui.draw_fish_panel(self.screen, self.fish_list, population.fish_weights,
+                                population.quiet_score, population.current_required_score,
+                                population.max_fish, population.session_quiet_time, self.is_quiet)
+        self.ui.draw_pomodoro(self.screen, self.pomodoro, self.ticks)
         self.ui.draw_volume_meter(self.screen, volume)
         self.ui.draw_rarity_legend(self.screen)
         self.ui.draw_help(self.screen)
@@ -477,28 +734,138 @@ class QuietFishApp:
         # 成就通知
         if self.new_achievements and self.achievement_flash_timer > 0:
             self.ui.draw_achievements(self.screen, self.new_achievements, self.achievement_flash_timer / 2.0)
+        lap("ui")
+
+        # 历史面板和档案选择盖在最上层
+        if self.dashboard is not None:
+            self.dashboard.draw(self.screen)
+        if self.profile_picker is not None:
+            self.profile_picker.draw(self.screen)
+        lap("overlays")
+        if self.profiler_overlay is not None and self.profiler.enabled:
+            self.profiler_overlay.draw(self.screen, self.clock.get_fps())
+            lap("profiler")
 
         pygame.display.flip()
+        lap("flip")
 
     def run(self):
         running = True
+        replay = self.replay
         while running:
-            dt = self.clock.tick(FPS) / 1000.0
-            self.last_time = time.time()
-
-            running = self.handle_events()
-            self.update(dt)
-            self.draw()
-
-        # 保存数据
-        self.stats.save_stats()
-        self.audio.close()
+            if replay is None:
+                frame_time = self.clock.tick(FPS) / 1000.0
+                self.last_time = time.time()
+                self.ticks = pygame.time.get_ticks()
+                running = self.frame(frame_time, pygame.event.get())
+            else:
+                # 回放：帧时长、时间、音量和按键都来自轨迹，窗口仍然可以关闭
+                frame = replay.next_frame()
+                if frame is None or any(e.type == pygame.QUIT for e in pygame.event.get()):
+                    break
+                frame_time, self.last_time, self.ticks, volume, events = frame
+                self.clock.tick()
+                running = self.frame(frame_time, events, volume)
+        self.close()
+
+    def frame(self, frame_time, events, volume=None):
+        """处理一帧：事件、音量、固定步长模拟、绘制，返回是否继续运行
+
+        volume 为 None 时在这里读取麦克风（分进程模式下读取模拟进程发布的状态）。
+        """
+        profiler = self.profiler
+        profiler.begin_frame()
+        if self.alloc_tracker is not None:
+            self.alloc_tracker.begin_frame()
+
+        running = self.handle_events(events)
+        profiler.lap("events")
+        if volume is not None:
+            self.volume = volume
+        elif self.sim_process is not None:
+            # 音量、鱼群等都由模拟进程计算
+            if not self._read_simulation():
+                print("[QuietFish] 模拟进程已退出")
+                running = False
+        else:
+            if self.audio is None:
+                self._poll_audio()
+            self.volume = self.audio.get_volume() if self.audio is not None else 0
+        if self.trace_recorder is not None:
+            self.trace_recorder.frame(frame_time, self.last_time, self.ticks, self.volume, events)
+        profiler.lap("audio")
+
+        # 固定步长模拟：渲染快慢不影响游戏逻辑
+        if self.sim_process is None:
+            self._accumulator += min(frame_time, SIM_DT * SIM_MAX_STEPS_PER_FRAME)
+            while self._accumulator >= SIM_DT:
+                self.update(SIM_DT)
+                self._accumulator -= SIM_DT
+            self.render_alpha = self._accumulator / SIM_DT
+        self.draw()
+        profiler.end_frame()
+        if self.alloc_tracker is not None:
+            self.alloc_tracker.end_frame()
+        if self.metrics is not None:
+            self.metrics.update(self, frame_time)
+        if self.control is not None:
+            self.control.update(self)
+        self._poll_sprites()
+        if "first_frame" not in self.startup_timings:
+            self._mark_startup("first_frame")
+            print("[QuietFish] 启动耗时: " + ", ".join(
+                f"{stage} {ms:.0f}ms" for stage, ms in self.startup_timings.items()))
+        return running
+
+    def close(self):
+        """退出：保存数据、停止后台线程和进程"""
+        if self.trace_recorder is not None:
+            from models.trace import state_digest
+            self.trace_recorder.close(state_digest(self.fish_list, self.population))
+        if self.sim_process is not None:
+            self._stop_simulation_process()
+        else:
+            self._close_simulation()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.close()
+        if self.control is not None:
+            self.control.close()
+        if self.alloc_tracker is not None:
+            self._write_alloc_report(self.alloc_tracker.stop())
         pygame.quit()
 
+    def _close_simulation(self):
+        """保存数据（等待后台加载/保存档案的线程结束）并关闭麦克风"""
+        for thread in self._profile_threads:
+            thread.join()
+        if self._loaded_profile is not None:
+            self._loaded_profile[1].close()
+        self.stats.close()
+        self.tank_saver.close()
+        self._poll_audio(wait=True)
+        if self.audio is not None:
+            self.audio.close()
+
+    def _write_alloc_report(self, lines):
+        print("\n".join(lines))
+        path = os.path.join(DATA_DIR, ALLOC_REPORT_FILE)
+        try:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except IOError as e:
+            print(f"[QuietFish] 无法写入内存诊断报告: {e}")
+
 
 def main():
+    # 打包成 exe 后，spawn 启动的模拟进程会重新执行入口，这里让它直接转去运行子进程
+    multiprocessing.freeze_support()
     app = QuietFishApp()
-    app.run()
+    if ASYNC_LOOP:
+        from models.async_loop import AsyncRunner
+        AsyncRunner(app).run()
+    else:
+        app.run()
 
 
 if __name__ == "__main__":
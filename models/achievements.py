@@ -0,0 +1,102 @@
+"""事件驱动的成就引擎
+
+config.ACHIEVEMENTS 中的每条规则订阅一个事件，只有该事件发生时才检查；
+规则解锁后立即退订，全部解锁后每个事件的开销只剩一次字典查找。
+
+只比较事件数值的规则（例如累计安静时长）会维护一个最低门槛，
+数值没到门槛时直接返回，可以每个模拟步都调用。
+"""
+import math
+
+from config import ACHIEVEMENTS
+
+# 事件类型
+FISH_CAUGHT = "fish_caught"
+FISH_COUNT = "fish_count"
+QUIET_TIME = "quiet_time"
+POMODORO = "pomodoro"
+HOUR = "hour"
+SESSION_START = "session_start"
+
+_NONE = ()
+
+
+def _in_hours(hour, hours):
+    start, end = hours
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class AchievementEngine:
+    def __init__(self, stats, unlocked, rules=ACHIEVEMENTS):
+        self.stats = stats
+        self.unlocked = unlocked
+        # 事件 -> [(成就, 规则), ...]
+        self._subscribers = {}
+        # 事件 -> 订阅规则中最小的数值门槛（只对纯数值规则有效）
+        self._thresholds = {}
+
+        for key, rule in rules.items():
+            if unlocked.get(key, False) or "on" not in rule:
+                continue
+            self._subscribers.setdefault(rule["on"], []).append((key, rule))
+        for event in self._subscribers:
+            self._update_threshold(event)
+
+    def _update_threshold(self, event):
+        subscribers = self._subscribers.get(event)
+        if not subscribers:
+            self._subscribers.pop(event, None)
+            self._thresholds.pop(event, None)
+            return
+        if all(self._is_value_rule(rule) for _, rule in subscribers):
+            self._thresholds[event] = min(rule["min"] for _, rule in subscribers)
+        else:
+            self._thresholds[event] = -math.inf
+
+    @staticmethod
+    def _is_value_rule(rule):
+        return "stat" not in rule and "rarity" not in rule and "hours" not in rule
+
+    def _check(self, rule, value):
+        if "stat" in rule:
+            return self.stats.get(rule["stat"], 0) >= rule["min"]
+        if "rarity" in rule:
+            return self.stats["fish_by_rarity"].get(rule["rarity"], 0) >= rule["min"]
+        if "hours" in rule:
+            return value is not None and _in_hours(value, rule["hours"])
+        return value is not None and value >= rule["min"]
+
+    def emit(self, event, value=None):
+        """触发事件，返回本次新解锁的成就列表"""
+        threshold = self._thresholds.get(event)
+        if threshold is None or (value is not None and value < threshold):
+            return _NONE
+
+        unlocked_now = []
+        remaining = []
+        for key, rule in self._subscribers[event]:
+            if self._check(rule, value):
+                self.unlocked[key] = True
+                unlocked_now.append(key)
+            else:
+                remaining.append((key, rule))
+
+        if unlocked_now:
+            # 已解锁的规则退订
+            self._subscribers[event] = remaining
+            self._update_threshold(event)
+        return unlocked_now
+
+    def sweep(self):
+        """检查所有只依赖统计数据的规则（启动时用，补上旧数据已满足的成就）"""
+        unlocked_now = []
+        for event, subscribers in list(self._subscribers.items()):
+            if any("stat" in rule or "rarity" in rule for _, rule in subscribers):
+                unlocked_now.extend(self.emit(event))
+        return unlocked_now
+
+    def is_idle(self):
+        """所有成就都已解锁"""
+        return not self._subscribers
@@ -0,0 +1,295 @@
+"""每帧内存分配和 Surface 创建统计（诊断模式）
+
+config.ALLOC_DIAGNOSTICS 打开后：
+- 用 tracemalloc 统计每帧临时分配的 Python 内存（帧内峰值减去帧开始时的用量）
+- 把 pygame.Surface、pygame.font.Font 换成带计数的子类，并包装 pygame.transform 中
+  返回新 Surface 的函数，按调用位置统计每帧创建的 Surface 数量和像素字节数
+  （只统计主线程帧内的创建；对已有 Surface 调用 copy()/subsurface() 看不到）
+- 退出时打印并写入 data/alloc_report.txt：创建 Surface 最多的位置、Python 堆增长最多的位置
+
+config.ALLOC_SOAK 打开后还会每隔一段时间采样一次内存（Python 堆和进程 RSS），
+样本足够多时按最小二乘拟合每小时的增长量，持续增长超过阈值就打印警告和增长最多的位置。
+
+SDL 的像素内存不经过 Python 的分配器，tracemalloc 看不到，所以 Surface 单独统计，
+长时间运行的内存也同时看 RSS。
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from array import array
+
+import pygame
+
+from config import (
+    PROFILER_WINDOW, ALLOC_TOP_SITES, ALLOC_SOAK_INTERVAL_SECONDS,
+    ALLOC_SOAK_GROWTH_MB_PER_HOUR, ALLOC_SOAK_MIN_SAMPLES
+)
+
+# pygame.transform 中返回新 Surface 的函数
+TRANSFORM_FUNCTIONS = (
+    "scale", "smoothscale", "rotate", "rotozoom", "flip", "scale2x", "chop", "laplacian"
+)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rss_bytes():
+    """进程当前占用的物理内存（只支持 Linux，其他系统返回 None）"""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _site_name(code, lineno):
+    path = code.co_filename
+    if path.startswith(_PROJECT_ROOT):
+        path = os.path.relpath(path, _PROJECT_ROOT)
+    return f"{path}:{lineno} {code.co_name}"
+
+
+def growth_per_hour(samples):
+    """[(小时, 字节), ...] 的最小二乘斜率，单位 MB/小时"""
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in samples) / n
+    mean_v = sum(v for _, v in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var == 0:
+        return 0.0
+    cov = sum((t - mean_t) * (v - mean_v) for t, v in samples)
+    return cov / var / (1024 * 1024)
+
+
+def _snapshot():
+    """当前的 tracemalloc 快照，去掉 tracemalloc 和本模块自己的分配"""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+
+
+def _steady(values):
+    """至少四分之三的相邻样本在增长"""
+    rises = sum(1 for a, b in zip(values, values[1:]) if b > a)
+    return rises * 4 >= (len(values) - 1) * 3
+
+
+class AllocTracker:
+    def __init__(self, soak=False, window=PROFILER_WINDOW, top=ALLOC_TOP_SITES):
+        self.soak = soak
+        self.window = window
+        self.top = top
+        self.running = False
+
+        # 调用位置 (code, 行号) -> [次数, 像素字节数]
+        self.sites = {}
+        self.frames = 0
+        self.total_surfaces = 0
+        self.total_surface_bytes = 0
+        self.max_surfaces = 0
+
+        # 最近 window 帧：创建的 Surface 数、Python 临时分配字节数
+        self.frame_surfaces = array('l', bytes(array('l').itemsize * window))
+        self.frame_bytes = array('q', bytes(8 * window))
+        self.pos = 0
+        self.count = 0
+
+        self._in_frame = False
+        self._main_thread = threading.get_ident()
+        self._surfaces = 0
+        self._frame_start_bytes = 0
+        self._originals = {}
+
+        self._start_time = 0.0
+        self._baseline_snapshot = None
+        # 长时间运行：[(小时, Python 堆字节, RSS 字节), ...]
+        self.soak_samples = []
+        self._next_soak = 0.0
+        self._soak_snapshot = None
+        self.soak_warnings = []
+        self._warned_at = 0
+
+    # ---------- 安装/卸载 ----------
+
+    def start(self):
+        if self.running:
+            return
+        self.install_hooks()
+        tracemalloc.start(1)
+        self._baseline_snapshot = _snapshot()
+        self._start_time = time.monotonic()
+        self._next_soak = self._start_time + ALLOC_SOAK_INTERVAL_SECONDS
+        if self.soak:
+            self._soak_sample(self._start_time)
+        self.running = True
+
+    def stop(self):
+        """卸载钩子并停止 tracemalloc，返回报告的各行"""
+        if not self.running:
+            return []
+        lines = self.report()
+        tracemalloc.stop()
+        self._uninstall_hooks()
+        self.running = False
+        return lines
+
+    def install_hooks(self):
+        """替换 Surface/Font/transform；字体在替换之后创建，其 render 才会被统计"""
+        if self._originals:
+            return
+        tracker = self
+        surface_class = pygame.Surface
+        font_class = pygame.font.Font
+
+        class TrackedSurface(surface_class):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                tracker._record(self, sys._getframe(1))
+
+        class TrackedFont(font_class):
+            def render(self, *args, **kwargs):
+                surf = super().render(*args, **kwargs)
+                tracker._record(surf, sys._getframe(1))
+                return surf
+
+        def wrap(func):
+            def tracked(*args, **kwargs):
+                surf = func(*args, **kwargs)
+                tracker._record(surf, sys._getframe(1))
+                return surf
+            return tracked
+
+        self._originals = {(pygame, "Surface"): surface_class, (pygame.font, "Font"): font_class}
+        pygame.Surface = TrackedSurface
+        pygame.font.Font = TrackedFont
+        for name in TRANSFORM_FUNCTIONS:
+            func = getattr(pygame.transform, name, None)
+            if func is not None:
+                self._originals[pygame.transform, name] = func
+                setattr(pygame.transform, name, wrap(func))
+
+    def _uninstall_hooks(self):
+        for (module, name), original in self._originals.items():
+            setattr(module, name, original)
+        self._originals = {}
+
+    # ---------- 统计 ----------
+
+    def _record(self, surf, frame):
+        if not self._in_frame or threading.get_ident() != self._main_thread:
+            return
+        size = surf.get_width() * surf.get_height() * surf.get_bytesize()
+        key = (frame.f_code, frame.f_lineno)
+        site = self.sites.get(key)
+        if site is None:
+            self.sites[key] = [1, size]
+        else:
+            site[0] += 1
+            site[1] += size
+        self._surfaces += 1
+        self.total_surface_bytes += size
+
+    def begin_frame(self):
+        self._surfaces = 0
+        self._frame_start_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._in_frame = True
+
+    def end_frame(self):
+        self._in_frame = False
+        allocated = tracemalloc.get_traced_memory()[1] - self._frame_start_bytes
+        pos = self.pos
+        self.frame_surfaces[pos] = self._surfaces
+        self.frame_bytes[pos] = allocated
+        self.pos = (pos + 1) % self.window
+        if self.count < self.window:
+            self.count += 1
+        self.frames += 1
+        self.total_surfaces += self._surfaces
+        if self._surfaces > self.max_surfaces:
+            self.max_surfaces = self._surfaces
+
+        if self.soak:
+            now = time.monotonic()
+            if now >= self._next_soak:
+                self._next_soak = now + ALLOC_SOAK_INTERVAL_SECONDS
+                self._soak_sample(now)
+
+    def frame_stats(self):
+        """最近 window 帧的 {"surfaces": (p50, p95), "kb": (p50, p95)}"""
+        def p50_p95(values):
+            if not values:
+                return 0, 0
+            ordered = sorted(values)
+            return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+        surfaces = p50_p95(self.frame_surfaces[:self.count])
+        kb = tuple(v / 1024 for v in p50_p95(self.frame_bytes[:self.count]))
+        return {"surfaces": surfaces, "kb": kb}
+
+    # ---------- 长时间运行 ----------
+
+    def _soak_sample(self, now):
+        hours = (now - self._start_time) / 3600
+        traced = tracemalloc.get_traced_memory()[0]
+        rss = _rss_bytes()
+        self.soak_samples.append((hours, traced, rss))
+        snapshot = _snapshot()
+        previous, self._soak_snapshot = self._soak_snapshot, snapshot
+
+        samples = self.soak_samples
+        # 样本太少，或者刚警告过（每攒够一批新样本才再判断一次）
+        if len(samples) - self._warned_at < ALLOC_SOAK_MIN_SAMPLES:
+            return
+        for label, index in (("Python 堆", 1), ("RSS", 2)):
+            if samples[-1][index] is None:
+                continue
+            series = [(s[0], s[index]) for s in samples]
+            rate = growth_per_hour(series)
+            if rate > ALLOC_SOAK_GROWTH_MB_PER_HOUR and _steady([v for _, v in series]):
+                warning = (f"[AllocTracker] {label}持续增长: {rate:.1f} MB/小时 "
+                           f"（{len(samples)} 个样本，{hours:.1f} 小时）")
+                print(warning)
+                self.soak_warnings.append(warning)
+                self._warned_at = len(samples)
+                for stat in snapshot.compare_to(previous, "lineno")[:5]:
+                    print(f"    {stat}")
+
+    # ---------- 报告 ----------
+
+    def report(self):
+        lines = []
+        frames = max(1, self.frames)
+        stats = self.frame_stats()
+        lines.append(f"[AllocTracker] 共统计 {self.frames} 帧")
+        lines.append(f"  每帧创建 Surface: 平均 {self.total_surfaces / frames:.1f}, "
+                     f"p50 {stats['surfaces'][0]}, p95 {stats['surfaces'][1]}, 最多 {self.max_surfaces}；"
+                     f"像素 {self.total_surface_bytes / frames / 1024:.1f} KB/帧")
+        lines.append(f"  每帧 Python 临时分配: p50 {stats['kb'][0]:.1f} KB, p95 {stats['kb'][1]:.1f} KB")
+
+        lines.append("  创建 Surface 最多的位置（每帧次数、每帧像素 KB）:")
+        ranked = sorted(self.sites.items(), key=lambda item: item[1][1], reverse=True)
+        for (code, lineno), (count, size) in ranked[:self.top]:
+            lines.append(f"    {count / frames:8.2f} {size / frames / 1024:10.1f}  {_site_name(code, lineno)}")
+
+        if self._baseline_snapshot is not None and tracemalloc.is_tracing():
+            lines.append("  Python 堆增长最多的位置（开始统计以来）:")
+            snapshot = _snapshot()
+            for stat in snapshot.compare_to(self._baseline_snapshot, "lineno")[:self.top]:
+                if stat.size_diff <= 0:
+                    break
+                lines.append(f"    {stat.size_diff / 1024:+10.1f} KB {stat.count_diff:+8d} 块  {stat.traceback}")
+
+        if self.soak_samples:
+            samples = self.soak_samples
+            lines.append(f"  长时间运行: {len(samples)} 个样本，{samples[-1][0]:.1f} 小时")
+            lines.append(f"    Python 堆增长 {growth_per_hour([(t, v) for t, v, _ in samples]):.2f} MB/小时")
+            if samples[-1][2] is not None:
+                lines.append(f"    RSS 增长 {growth_per_hour([(t, r) for t, _, r in samples]):.2f} MB/小时")
+            lines.extend(f"  {warning}" for warning in self.soak_warnings)
+        return lines
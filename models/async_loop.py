@@ -0,0 +1,170 @@
+"""asyncio 主循环
+
+config.ASYNC_LOOP 打开后由 AsyncRunner 驱动 QuietFishApp，代替 run() 中的同步循环：
+- 渲染是一个按 FPS 定时的任务，每帧调用 app.frame()（事件、模拟、绘制仍在主线程）
+- 麦克风在专用线程里连续读取，音量通过 asyncio.Queue 交给渲染任务，帧里不再阻塞等待音频
+- 番茄钟到点和整点成就检查是事件循环上的定时回调，模拟步里不再轮询
+- 截图等磁盘 IO 交给线程池（app.runtime.run_io），后台任务再多，每帧也只做固定的工作
+
+窗口和 pygame 的绘制都只在事件循环所在的主线程中进行。
+"""
+import asyncio
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from config import FPS, ASYNC_IO_WORKERS
+
+# 音量队列只保留最近几次读数，渲染任务每帧取最新的一个
+AUDIO_QUEUE_SIZE = 4
+
+
+class AsyncRunner:
+    def __init__(self, app):
+        self.app = app
+        self.loop = None
+        self.audio_levels = None
+        self.volume = 0
+        self._audio_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AudioReader")
+        self.io_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_WORKERS, thread_name_prefix="AsyncIO")
+        self._pomodoro_timer = None
+        self._hour_timer = None
+        # 麦克风出错时设置，渲染任务看到后结束主循环
+        self.audio_error = None
+
+    def run(self):
+        asyncio.run(self.main())
+        self.app.close()
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.audio_levels = asyncio.Queue(AUDIO_QUEUE_SIZE)
+        app = self.app
+        app.runtime = self
+
+        # 分进程模式下麦克风、番茄钟和统计都在模拟进程中
+        audio = None
+        if app.sim_process is None:
+            self.pomodoro_changed()
+            self._schedule_hour()
+            audio = asyncio.create_task(self._read_audio())
+        try:
+            await self._render()
+        finally:
+            if audio is not None:
+                audio.cancel()
+                await asyncio.gather(audio, return_exceptions=True)
+            for timer in (self._pomodoro_timer, self._hour_timer):
+                if timer is not None:
+                    timer.cancel()
+            # 等正在读的一次音频和排队的磁盘 IO 结束，再关闭麦克风、退出
+            self._audio_executor.shutdown(wait=True)
+            self.io_executor.shutdown(wait=True)
+            app.runtime = None
+
+    # ---------- 渲染 ----------
+
+    async def _render(self):
+        app = self.app
+        loop = self.loop
+        interval = 1 / FPS
+        next_frame = loop.time()
+        last = time.perf_counter()
+        running = True
+        while running:
+            next_frame += interval
+            delay = next_frame - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # 落后超过一帧时不再补帧，但仍让出一次，让其他任务有机会运行
+                if -delay > interval:
+                    next_frame = loop.time()
+                await asyncio.sleep(0)
+
+            now = time.perf_counter()
+            frame_time = now - last
+            last = now
+            app.clock.tick()
+            app.last_time = time.time()
+            app.ticks = pygame.time.get_ticks()
+            running = app.frame(frame_time, pygame.event.get(),
+                                None if app.sim_process is not None else self._latest_volume())
+            # 麦克风坏了就不能再把音量当作 0（会一直算作安静），和同步主循环一样退出
+            running = running and self.audio_error is None
+
+    def _latest_volume(self):
+        levels = self.audio_levels
+        while not levels.empty():
+            self.volume = levels.get_nowait()
+        return self.volume
+
+    # ---------- 音频 ----------
+
+    async def _read_audio(self):
+        """等后台探测完麦克风后，在专用线程中连续读取音量放进队列"""
+        try:
+            await self._read_audio_levels()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.audio_error = e
+            # 出错的 Future 不再交给 _poll_audio，退出时也不会再抛一次
+            self.app._audio_future = None
+            print(f"[AsyncRunner] 错误: 读取麦克风失败，程序将退出: {e!r}")
+            traceback.print_exc()
+
+    async def _read_audio_levels(self):
+        app = self.app
+        if app._audio_future is not None:
+            await asyncio.wrap_future(app._audio_future)
+            app._poll_audio()
+        audio = app.audio
+        if audio is None:
+            return
+        levels = self.audio_levels
+        while True:
+            level = await self.loop.run_in_executor(self._audio_executor, audio.get_volume)
+            if levels.full():
+                levels.get_nowait()
+            levels.put_nowait(level)
+
+    # ---------- 定时器 ----------
+
+    def pomodoro_changed(self):
+        """番茄钟开始/停止/切换阶段后，重新安排到点回调"""
+        if self._pomodoro_timer is not None:
+            self._pomodoro_timer.cancel()
+            self._pomodoro_timer = None
+        pomodoro = self.app.pomodoro
+        if pomodoro["active"]:
+            delay = max(0, pomodoro["end_time"] - pygame.time.get_ticks()) / 1000
+            self._pomodoro_timer = self.loop.call_later(delay, self._pomodoro_due)
+
+    def _pomodoro_due(self):
+        self._pomodoro_timer = None
+        app = self.app
+        app.ticks = pygame.time.get_ticks()
+        app.check_pomodoro_complete()
+        self.pomodoro_changed()
+
+    def _schedule_hour(self):
+        """整点触发小时事件（夜猫子等成就），然后安排下一个整点"""
+        next_hour = self.app.stats.check_hour()
+        self._hour_timer = self.loop.call_later(max(0, next_hour - time.time()), self._schedule_hour)
+
+    # ---------- 磁盘/网络 IO ----------
+
+    def run_io(self, func, *args):
+        """在线程池中执行 func(*args)，出错时打印，不影响渲染"""
+        future = self.io_executor.submit(func, *args)
+        future.add_done_callback(self._io_done)
+        return future
+
+    @staticmethod
+    def _io_done(future):
+        error = future.exception()
+        if error is not None:
+            print(f"[AsyncRunner] 后台任务失败: {error}")
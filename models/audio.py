@@ -1,17 +1,38 @@
 """音频监控模块"""
 import pyaudio
+import json
 import math
+import os
 import struct
 from collections import deque
 
 from config import AUDIO_RMS_DIVISOR, AUDIO_MAX_VOLUME, AUDIO_BUFFER_SIZE, AUDIO_SAMPLE_RATE
+from models.autosave import atomic_write_json
 
 
 class AudioMonitor:
-    def __init__(self, smooth_frames=30):
+    def __init__(self, smooth_frames=30, recorder=None, device_cache=None):
         self.pa = pyaudio.PyAudio()
-        
-        # 查找可用的输入设备
+        # 记录上次成功打开的输入设备，下次启动不用再枚举所有设备
+        self.device_cache = device_cache
+
+        cached_index = self._cached_device()
+        device_index = cached_index if cached_index is not None else self._find_device()
+        self.stream = self._open_stream(device_index)
+        if self.stream is None and cached_index is not None:
+            # 缓存的设备打不开了，重新枚举
+            device_index = self._find_device()
+            self.stream = self._open_stream(device_index)
+        if self.stream is not None and device_index is not None and device_index != cached_index:
+            self._save_device(device_index)
+
+        self.volume_history = deque(maxlen=smooth_frames)
+        self.current_volume = 0
+        # 可选的音量记录器（VolumeRecorder），记录平滑前的原始音量
+        self.recorder = recorder
+
+    def _find_device(self):
+        """枚举所有设备，返回第一个输入设备的索引"""
         device_index = None
         for i in range(self.pa.get_device_count()):
             info = self.pa.get_device_info_by_index(i)
@@ -19,9 +40,34 @@ class AudioMonitor:
                 print(f"[AudioMonitor] 找到音频输入设备: {info['name']} (索引: {i})")
                 if device_index is None:
                     device_index = i
-        
+        return device_index
+
+    def _cached_device(self):
+        """缓存的设备仍然存在且名字一致时返回其索引"""
+        if not self.device_cache or not os.path.exists(self.device_cache):
+            return None
         try:
-            self.stream = self.pa.open(
+            with open(self.device_cache, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            info = self.pa.get_device_info_by_index(cached["index"])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+        if info['name'] != cached.get("name") or info['maxInputChannels'] <= 0:
+            return None
+        print(f"[AudioMonitor] 使用上次的音频输入设备: {info['name']} (索引: {cached['index']})")
+        return cached["index"]
+
+    def _save_device(self, device_index):
+        try:
+            info = self.pa.get_device_info_by_index(device_index)
+            atomic_write_json(self.device_cache, {"index": device_index, "name": info['name']},
+                              ensure_ascii=False)
+        except (IOError, OSError, ValueError, TypeError) as e:
+            print(f"[AudioMonitor] 无法保存设备缓存: {e}")
+
+    def _open_stream(self, device_index):
+        try:
+            stream = self.pa.open(
                 format=pyaudio.paInt16,
                 channels=1,
                 rate=AUDIO_SAMPLE_RATE,
@@ -30,12 +76,10 @@ class AudioMonitor:
                 frames_per_buffer=AUDIO_BUFFER_SIZE
             )
             print("[AudioMonitor] 音频流初始化成功")
+            return stream
         except Exception as e:
             print(f"[AudioMonitor] 警告: 无法打开音频流: {e}")
-            self.stream = None
-            
-        self.volume_history = deque(maxlen=smooth_frames)
-        self.current_volume = 0
+            return None
 
     def get_volume(self):
         """获取当前麦克风音量 (0-100)"""
@@ -63,6 +107,8 @@ class AudioMonitor:
             volume = min(AUDIO_MAX_VOLUME, int(rms / AUDIO_RMS_DIVISOR))
             
             self.volume_history.append(volume)
+            if self.recorder is not None:
+                self.recorder.add(volume)
             self.current_volume = sum(self.volume_history) / len(self.volume_history)
             
             return self.current_volume
@@ -89,3 +135,5 @@ class AudioMonitor:
             pass  # 流可能已经关闭
         finally:
             self.pa.terminate()
+            if self.recorder is not None:
+                self.recorder.close()
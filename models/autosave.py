@@ -0,0 +1,139 @@
+"""后台自动保存
+
+- atomic_write_json / atomic_write_bytes：写临时文件 -> fsync -> 原子替换，
+  写到一半崩溃也不会损坏旧文件
+- AutoSaver：主线程只负责标记“脏”数据，每隔一段时间拍一次快照交给后台线程写盘，
+  同一份数据多次修改只会写一次，磁盘 IO 不会阻塞渲染循环
+"""
+import copy
+import json
+import os
+import threading
+import time
+
+from config import AUTOSAVE_INTERVAL_SECONDS
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """原子写入 JSON 文件"""
+    _atomic_write(path, 'w', lambda f: json.dump(data, f, **dump_kwargs))
+
+
+def atomic_write_bytes(path, data):
+    """原子写入二进制文件"""
+    _atomic_write(path, 'wb', lambda f: f.write(data))
+
+
+def _atomic_write(path, mode, write):
+    directory = os.path.dirname(path) or "."
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+    # 同步目录项，确保重命名本身落盘（Windows 不支持打开目录）
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+
+class AutoSaver:
+    def __init__(self, interval=AUTOSAVE_INTERVAL_SECONDS):
+        self.interval = interval
+        # 名称 -> (路径, 获取数据的函数, json.dump 参数)
+        self._targets = {}
+        self._dirty = set()
+        self._last_snapshot = time.monotonic()
+
+        # 等待写入的快照：名称 -> (路径, 数据, 参数)，新的快照覆盖旧的
+        self._pending = {}
+        self._writing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="AutoSaver", daemon=True)
+        self._thread.start()
+
+    def register(self, name, path, get_data, **dump_kwargs):
+        """get_data 返回 bytes 时按二进制原样写入，否则写为 JSON"""
+        self._targets[name] = (path, get_data, dump_kwargs)
+
+    def mark_dirty(self, name):
+        self._dirty.add(name)
+
+    def tick(self):
+        """在主线程中调用：到时间后把脏数据的快照交给后台线程"""
+        if self._dirty and time.monotonic() - self._last_snapshot >= self.interval:
+            self._submit()
+
+    def _submit(self):
+        self._last_snapshot = time.monotonic()
+        with self._cond:
+            names = list(self._dirty)
+            self._dirty.clear()
+        snapshots = {}
+        for name in names:
+            path, get_data, dump_kwargs = self._targets[name]
+            # 在主线程深拷贝，避免后台线程序列化时数据被修改
+            snapshots[name] = (path, copy.deepcopy(get_data()), dump_kwargs)
+        with self._cond:
+            self._pending.update(snapshots)
+            self._cond.notify_all()
+
+    def flush(self, wait=True):
+        """立即提交所有脏数据，wait 为 True 时等待写盘完成"""
+        if self._dirty:
+            self._submit()
+        if wait:
+            with self._cond:
+                while self._pending or self._writing:
+                    self._cond.wait()
+
+    def close(self):
+        self.flush(wait=True)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                batch = self._pending
+                self._pending = {}
+                self._writing = True
+
+            failed = []
+            for name, (path, data, dump_kwargs) in batch.items():
+                try:
+                    if isinstance(data, bytes):
+                        atomic_write_bytes(path, data)
+                    else:
+                        atomic_write_json(path, data, **dump_kwargs)
+                except (IOError, OSError, TypeError, ValueError) as e:
+                    print(f"[AutoSaver] 保存 {path} 失败: {e}")
+                    failed.append(name)
+
+            with self._cond:
+                # 写入失败的数据下次继续尝试
+                self._dirty.update(failed)
+                self._writing = False
+                self._cond.notify_all()
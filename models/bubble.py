@@ -1,33 +1,134 @@
-"""气泡粒子模块"""
-import pygame
-import random
+"""气泡粒子模块
+
+所有气泡存放在固定容量的数组里（结构体数组拆成按字段的数组），
+存活的粒子始终紧凑地排在前 count 个位置，死亡时与末尾交换，
+更新和绘制只遍历存活部分。气泡贴图按大小预先渲染，绘制时批量 blit。
+"""
 import math
+import random
+from array import array
 
+import pygame
 
-class Bubble:
-    def __init__(self, x, y, width):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.size = random.randint(3, 8)
-        self.speed = random.uniform(20, 45)
-        self.wobble_offset = random.uniform(0, math.pi * 2)
+from config import BUBBLE_CAPACITY, BUBBLE_TRAIL_RATE
 
-    def update(self, dt, water_top):
-        self.y -= self.speed * dt
-        self.x += math.sin(self.y * 0.03 + self.wobble_offset) * 0.8
 
-    def draw(self, surface, water_top):
-        if self.y < water_top:
+class BubbleEmitter:
+    """挂在鱼身上的气泡发射器"""
+
+    __slots__ = ("fish", "rate", "carry")
+
+    def __init__(self, fish, rate):
+        self.fish = fish
+        self.rate = rate      # 每秒发射的气泡数
+        self.carry = 0.0      # 累计的发射进度
+
+
+class BubbleSystem:
+    def __init__(self, capacity=BUBBLE_CAPACITY, min_size=3, max_size=8):
+        self.capacity = capacity
+        self.count = 0
+        self.min_size = min_size
+        self.max_size = max_size
+
+        self.x = array('f', bytes(4 * capacity))
+        self.y = array('f', bytes(4 * capacity))
+        self.speed = array('f', bytes(4 * capacity))
+        self.phase = array('f', bytes(4 * capacity))
+        self.size = array('B', bytes(capacity))
+
+        self.emitters = {}
+        self._last_dt = 0.0
+        self._sprites = None
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, size=None, speed=None):
+        """发射一个气泡，容量已满时丢弃并返回 False"""
+        i = self.count
+        if i >= self.capacity:
             return False
-        
-        x, y, size = int(self.x), int(self.y), self.size
-        
-        # 气泡外圈
-        pygame.draw.circle(surface, (200, 230, 255), (x, y), size, 1)
-        
-        # 高光
-        highlight = max(1, size // 4)
-        pygame.draw.circle(surface, (255, 255, 255),
-                          (int(x - size * 0.3), int(y - size * 0.3)), highlight)
+        self.x[i] = x
+        self.y[i] = y
+        self.size[i] = size if size is not None else random.randint(self.min_size, self.max_size)
+        self.speed[i] = speed if speed is not None else random.uniform(20, 45)
+        self.phase[i] = random.uniform(0, math.pi * 2)
+        self.count = i + 1
         return True
+
+    def attach(self, fish):
+        """按鱼的稀有度挂载气泡拖尾（没有配置拖尾的稀有度忽略）"""
+        rate = BUBBLE_TRAIL_RATE.get(fish.rarity)
+        if rate:
+            self.emitters[fish] = BubbleEmitter(fish, rate)
+
+    def detach(self, fish):
+        self.emitters.pop(fish, None)
+
+    def clear(self):
+        self.count = 0
+        self.emitters.clear()
+
+    def update(self, dt, water_top):
+        """上升并剔除浮出水面的气泡，然后让发射器发射新气泡"""
+        self._last_dt = dt
+        xs, ys, speeds, phases, sizes = self.x, self.y, self.speed, self.phase, self.size
+        n = self.count
+        i = 0
+        while i < n:
+            y = ys[i] - speeds[i] * dt
+            if y < water_top:
+                # 与最后一个存活粒子交换，保持数组紧凑
+                n -= 1
+                xs[i] = xs[n]
+                ys[i] = ys[n]
+                speeds[i] = speeds[n]
+                phases[i] = phases[n]
+                sizes[i] = sizes[n]
+                continue
+            ys[i] = y
+            i += 1
+        self.count = n
+
+        for emitter in self.emitters.values():
+            emitter.carry += emitter.rate * dt
+            if emitter.carry >= 1:
+                fish = emitter.fish
+                mouth_x = fish.x + fish.size * 0.8 * fish.direction
+                while emitter.carry >= 1:
+                    emitter.carry -= 1
+                    self.spawn(mouth_x, fish.y - fish.size * 0.1,
+                               size=random.randint(2, 4), speed=random.uniform(30, 55))
+
+    def _build_sprites(self):
+        sprites = {}
+        for size in range(1, max(self.max_size, 4) + 1):
+            surf = pygame.Surface((size * 2 + 2, size * 2 + 2), pygame.SRCALPHA)
+            center = (size + 1, size + 1)
+            # 气泡外圈
+            pygame.draw.circle(surf, (200, 230, 255), center, size, 1)
+            # 高光
+            highlight = max(1, size // 4)
+            pygame.draw.circle(surf, (255, 255, 255),
+                               (int(center[0] - size * 0.3), int(center[1] - size * 0.3)), highlight)
+            sprites[size] = surf
+        return sprites
+
+    def draw(self, surface, alpha=1.0):
+        """批量绘制所有气泡，alpha 为渲染插值比例"""
+        if self._sprites is None:
+            self._sprites = self._build_sprites()
+        sprites = self._sprites
+        xs, ys, speeds, phases, sizes = self.x, self.y, self.speed, self.phase, self.size
+        back = self._last_dt * (1 - alpha)
+        sin = math.sin
+
+        blits = []
+        for i in range(self.count):
+            y = ys[i] + speeds[i] * back
+            size = sizes[i]
+            # 左右摇摆
+            x = xs[i] + sin(y * 0.03 + phases[i]) * 4
+            blits.append((sprites[size], (int(x) - size - 1, int(y) - size - 1)))
+        surface.blits(blits, False)
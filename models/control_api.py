@@ -0,0 +1,272 @@
+"""本机控制接口（Unix 域套接字，JSON Lines）
+
+config.CONTROL_API_ENABLED 打开后，在 data/control.sock 上监听，台灯、脚本、浏览器扩展等
+可以读取安静状态、开关番茄钟，订阅后状态变化时会收到推送，不需要轮询。
+
+每行一个 JSON 请求，每行一个 JSON 回复（请求中带 "id" 时原样带回）：
+  {"cmd": "status"}            -> {"ok": true, "status": {...}}
+  {"cmd": "toggle_pomodoro"}   -> {"ok": true, "status": {...}}（另有 start_pomodoro / stop_pomodoro）
+  {"cmd": "subscribe"}         -> {"ok": true, "status": {...}}，之后每次状态变化推送
+                                  {"event": "changed", "changed": [...], "status": {...}}
+  {"cmd": "unsubscribe"}       -> {"ok": true}
+
+套接字和所有连接都在后台线程的 asyncio 事件循环中处理，不占用渲染线程：
+- 主线程每帧调用 update()：执行排队的命令，状态变化或到刷新间隔时生成新的状态快照
+  （新建一个字典整体替换，后台线程只读取引用）
+- 命令在主线程执行完后才回复，回复里是执行后的状态
+- 推送合并短时间内的多次变化；读得太慢的订阅者（缓冲区积压）会被断开
+"""
+import asyncio
+import concurrent.futures
+import json
+import os
+import queue
+import socket
+import stat
+import threading
+import time
+
+from config import CONTROL_STATUS_INTERVAL, CONTROL_NOTIFY_INTERVAL, CONTROL_MAX_CLIENTS
+
+# 等待主线程执行命令的最长时间（秒）
+COMMAND_TIMEOUT = 2.0
+# 订阅者未发送出去的数据超过这个字节数就断开
+MAX_PENDING_BYTES = 64 * 1024
+# 单行请求的最大长度
+MAX_LINE_BYTES = 4096
+
+COMMANDS = ("toggle_pomodoro", "start_pomodoro", "stop_pomodoro")
+# 状态键各项对应的字段名，推送的 "changed" 中列出变化的字段
+_KEY_FIELDS = ("is_quiet", "fish", "pomodoro", "level")
+
+
+def _encode(message):
+    return (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _state_key(app):
+    """推送用的状态键：音量和倒计时一直在变，不算状态变化"""
+    pomodoro = app.pomodoro
+    return (app.is_quiet, tuple(app.population.counts.values()),
+            (pomodoro["active"], pomodoro["is_break"]), app.stats.get_level()["level"])
+
+
+def status_snapshot(app):
+    """当前状态（只包含 JSON 能表示的值）"""
+    pomodoro = app.pomodoro
+    level = app.stats.get_level()
+    counts = dict(app.population.counts)
+    remaining = max(0, pomodoro["end_time"] - app.ticks) / 1000 if pomodoro["active"] else 0
+    return {
+        "time": round(time.time(), 3),
+        "volume": round(float(app.volume), 1),
+        "is_quiet": bool(app.is_quiet),
+        "fish": counts,
+        "fish_total": sum(counts.values()),
+        "pomodoro": {
+            "active": bool(pomodoro["active"]),
+            "is_break": bool(pomodoro["is_break"]),
+            "remaining_seconds": round(remaining, 1),
+        },
+        "level": {"level": level["level"], "name": level["name"]},
+        "points": app.stats.stats["points"],
+    }
+
+
+def _remove_stale_socket(path):
+    """上次异常退出留下的套接字文件：连不上就删掉，能连上说明已有程序在用"""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} 已存在且不是套接字")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(f"{path} 正在被另一个程序使用")
+    finally:
+        probe.close()
+
+
+class ControlServer:
+    def __init__(self, path, status_interval=CONTROL_STATUS_INTERVAL,
+                 notify_interval=CONTROL_NOTIFY_INTERVAL, max_clients=CONTROL_MAX_CLIENTS):
+        self.path = path
+        self.status_interval = status_interval
+        self.notify_interval = notify_interval
+        self.max_clients = max_clients
+        # 交给主线程的命令：(命令名, concurrent.futures.Future)，status / subscribe 只等待状态快照
+        self.commands = queue.Queue()
+        self.status = {}
+        self.loop = None
+
+        self._key = None
+        self._changed = set()
+        self._next_refresh = 0.0
+        self._next_notify = 0.0
+        self._thread = None
+        self._server = None
+        self._ready = threading.Event()
+        # 以下只在后台线程中访问
+        self._writers = set()
+        self._subscribers = set()
+
+    # ---------- 主线程 ----------
+
+    def start(self):
+        if not hasattr(socket, "AF_UNIX"):
+            print("[ControlAPI] 当前系统不支持 Unix 域套接字，控制接口未启动")
+            return self
+        self._thread = threading.Thread(target=self._run, name="ControlAPI", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def update(self, app):
+        """每帧调用：执行排队的命令，必要时刷新状态快照并推送变化"""
+        if self.loop is None:
+            return
+        done = []
+        while True:
+            try:
+                command, future = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            active = app.pomodoro["active"]
+            if (command == "toggle_pomodoro" or (command == "start_pomodoro" and not active)
+                    or (command == "stop_pomodoro" and active)):
+                app.toggle_pomodoro()
+            done.append(future)
+
+        key = _state_key(app)
+        now = time.monotonic()
+        if self._key is not None and key != self._key:
+            self._changed.update(name for name, old, new in zip(_KEY_FIELDS, self._key, key) if old != new)
+        self._key = key
+        notify = self._changed and now >= self._next_notify
+        if not (done or notify or now >= self._next_refresh):
+            return
+
+        status = status_snapshot(app)
+        self.status = status
+        self._next_refresh = now + self.status_interval
+        for future in done:
+            future.set_result(status)
+        if notify:
+            message = {"event": "changed", "changed": sorted(self._changed), "status": status}
+            self._changed = set()
+            self._next_notify = now + self.notify_interval
+            self.loop.call_soon_threadsafe(self._broadcast, _encode(message))
+
+    def close(self):
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    # ---------- 后台线程 ----------
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            _remove_stale_socket(self.path)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._server = loop.run_until_complete(asyncio.start_unix_server(
+                self._handle_client, path=self.path, limit=MAX_LINE_BYTES))
+            # 只允许当前用户连接
+            os.chmod(self.path, 0o600)
+        except OSError as e:
+            print(f"[ControlAPI] 无法监听 {self.path}: {e}")
+            loop.close()
+            self._ready.set()
+            return
+        self.loop = loop
+        print(f"[ControlAPI] 控制接口: {self.path}")
+        self._ready.set()
+
+        loop.run_forever()
+        loop.run_until_complete(self._shutdown())
+        loop.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    async def _shutdown(self):
+        self._server.close()
+        for writer in self._writers:
+            writer.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _handle_client(self, reader, writer):
+        if len(self._writers) >= self.max_clients:
+            writer.write(_encode({"ok": False, "error": "too many clients"}))
+            writer.close()
+            return
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self._handle_request(line, writer)
+                writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            # 连接断开或单行过长
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._subscribers.discard(writer)
+            writer.close()
+
+    async def _handle_request(self, line, writer):
+        try:
+            request = json.loads(line)
+            command = request["cmd"]
+        except (ValueError, KeyError, TypeError):
+            return {"ok": False, "error": "bad request"}
+
+        reply = {"ok": True}
+        try:
+            if command in ("status", "subscribe"):
+                # 第一帧之前还没有状态快照，等主线程生成
+                reply["status"] = self.status or await self._on_main_thread(command)
+                if command == "subscribe":
+                    self._subscribers.add(writer)
+            elif command == "unsubscribe":
+                self._subscribers.discard(writer)
+            elif command in COMMANDS:
+                reply["status"] = await self._on_main_thread(command)
+            else:
+                reply = {"ok": False, "error": f"unknown command: {command}"}
+        except asyncio.TimeoutError:
+            reply = {"ok": False, "error": "timeout"}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+    async def _on_main_thread(self, command):
+        """把命令交给主线程，等它执行完返回执行后的状态"""
+        future = concurrent.futures.Future()
+        self.commands.put((command, future))
+        return await asyncio.wait_for(asyncio.wrap_future(future), COMMAND_TIMEOUT)
+
+    def _broadcast(self, data):
+        for writer in list(self._subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+                # 读得太慢的订阅者直接断开，不让积压的数据无限增长
+                self._subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(data)
@@ -0,0 +1,191 @@
+"""会话事件日志
+
+每个事件是一行紧凑的 JSON 数组：[时间戳, 类型, 详情]，例如
+  [1760860800.25,"fish_caught","rare"]
+
+- 事件先写入内存缓冲区，攒够一批或超过一定时间才追加到日志文件
+- 日志超过一定大小后，在后台线程中压缩：
+  把计数折叠进快照（总计 + 按天统计），原始事件按月归档到 gzip 文件
+"""
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from config import EVENT_LOG_BUFFER_SIZE, EVENT_LOG_FLUSH_SECONDS, EVENT_LOG_COMPACT_BYTES
+from models.autosave import atomic_write_json
+
+# 事件类型
+FISH_CAUGHT = "fish_caught"
+FISH_LOST = "fish_lost"
+QUIET = "quiet"
+NOISY = "noisy"
+POMODORO = "pomodoro"
+LEVEL_UP = "level_up"
+
+
+def empty_snapshot():
+    return {"version": 1, "last_ts": 0, "totals": {}, "daily": {}}
+
+
+def fold_events(snapshot, lines):
+    """把日志行折叠进快照，返回折叠的事件数"""
+    totals = snapshot["totals"]
+    daily = snapshot["daily"]
+    count = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            ts, kind, detail = json.loads(line)
+        except (ValueError, TypeError):
+            continue  # 跳过写了一半的行
+
+        day = datetime.fromtimestamp(ts).date().isoformat()
+        day_counts = daily.setdefault(day, {})
+        keys = [kind] if detail is None else [kind, f"{kind}:{detail}"]
+        for key in keys:
+            totals[key] = totals.get(key, 0) + 1
+            day_counts[key] = day_counts.get(key, 0) + 1
+        if ts > snapshot["last_ts"]:
+            snapshot["last_ts"] = ts
+        count += 1
+    return count
+
+
+class EventLog:
+    def __init__(self, path, snapshot_path):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.archive_dir = os.path.dirname(path) or "."
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._compactor = None
+
+        # 上次运行遗留的待压缩日志
+        if os.path.exists(self._pending_path()):
+            self._start_compaction()
+
+    def _pending_path(self):
+        return self.path + ".compacting"
+
+    def append(self, kind, detail=None, ts=None):
+        """记录一个事件（只写入缓冲区）"""
+        if ts is None:
+            ts = time.time()
+        self._buffer.append(json.dumps([round(ts, 2), kind, detail], separators=(',', ':')))
+        if len(self._buffer) >= EVENT_LOG_BUFFER_SIZE:
+            self.flush()
+
+    def maybe_flush(self):
+        """距离上次写入超过 EVENT_LOG_FLUSH_SECONDS 时写入缓冲区"""
+        if self._buffer and time.monotonic() - self._last_flush >= EVENT_LOG_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """把缓冲区追加到日志文件，必要时触发后台压缩"""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = "\n".join(self._buffer) + "\n"
+        self._buffer = []
+        try:
+            with self._lock:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(data)
+                size = os.path.getsize(self.path)
+        except IOError as e:
+            print(f"[EventLog] 写入失败: {e}")
+            return
+
+        if size >= EVENT_LOG_COMPACT_BYTES:
+            self.compact()
+
+    def compact(self):
+        """把当前日志移交给后台线程压缩，正在压缩时跳过"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        with self._lock:
+            # 上一次的待压缩文件还在时不轮换，先处理它
+            if not os.path.exists(self._pending_path()):
+                if not os.path.exists(self.path):
+                    return
+                os.replace(self.path, self._pending_path())
+        self._start_compaction()
+
+    def _start_compaction(self):
+        self._compactor = threading.Thread(target=self._compact_pending, name="EventLogCompactor",
+                                           daemon=True)
+        self._compactor.start()
+
+    def _compact_pending(self):
+        """压缩待处理日志，中途崩溃后重新执行也只计数、归档一次：
+
+        1. 计数折叠进快照，快照里同时记下这批日志的标识和归档文件当前的大小（一次原子写入）
+        2. 归档文件截回记下的大小再追加（上次追加了一半或已经追加过都会被截掉）
+        3. 删除待处理日志
+        重启时快照里的标识与待处理日志相同，说明第 1 步已经完成，只重做第 2、3 步。
+        """
+        pending = self._pending_path()
+        try:
+            with open(pending, 'rb') as f:
+                data = f.read()
+        except IOError:
+            return
+        batch_id = f"{len(data)}:{zlib.crc32(data):08x}"
+        lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+
+        try:
+            snapshot = self.load_snapshot()
+            compacting = snapshot.get("compacting")
+            if compacting is None or compacting["batch"] != batch_id:
+                # 原始事件按月归档（gzip 支持追加多个成员）
+                archive = os.path.join(self.archive_dir,
+                                       f"events-{datetime.now().strftime('%Y-%m')}.log.gz")
+                archive_size = os.path.getsize(archive) if os.path.exists(archive) else 0
+                fold_events(snapshot, lines)
+                compacting = {"batch": batch_id, "archive": archive, "archive_size": archive_size}
+                snapshot["compacting"] = compacting
+                atomic_write_json(self.snapshot_path, snapshot,
+                                  ensure_ascii=False, separators=(',', ':'))
+
+            archive = compacting["archive"]
+            with open(archive, 'ab') as f:
+                f.truncate(compacting["archive_size"])
+            with gzip.open(archive, 'at', encoding='utf-8') as f:
+                f.writelines(lines)
+            os.remove(pending)
+        except (IOError, OSError) as e:
+            print(f"[EventLog] 压缩失败: {e}")
+
+    def load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return empty_snapshot()
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return empty_snapshot()
+
+    def summary(self):
+        """快照 + 尚未压缩的日志 + 缓冲区，合并后的完整统计"""
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+        snapshot = self.load_snapshot()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                fold_events(snapshot, f)
+        return snapshot
+
+    def close(self):
+        """写入剩余事件并等待后台压缩结束"""
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
@@ -5,24 +5,37 @@ import math
 import time
 
 from config import (
-    RARITY, RARITY_WEIGHTS, WIDTH, HEIGHT, 
-    SILENCE_THRESHOLD, FISH_FLEE_SPEED, FISH_GLOW_AGE_THRESHOLD
+    RARITY, WIDTH, HEIGHT,
+    SILENCE_THRESHOLD, FISH_FLEE_SPEED, FISH_GLOW_AGE_THRESHOLD,
+    SCHOOL_RADIUS, SCHOOL_SEPARATION, SCHOOL_MAX_NEIGHBORS, SCHOOL_COHESION,
+    SCHOOL_ALIGNMENT, SCHOOL_AVOIDANCE, SCHOOL_MAX_VY, SCHOOL_TURN_RATE
 )
 
+from models.spawn_table import RARITY_SAMPLER
+
+_SCHOOL_RADIUS_SQ = SCHOOL_RADIUS * SCHOOL_RADIUS
+_SCHOOL_SEPARATION_SQ = SCHOOL_SEPARATION * SCHOOL_SEPARATION
+
 
 class Fish:
+    # 预渲染的精灵图集（SpriteAtlas），为 None 时直接绘制
+    atlas = None
+
     def __init__(self):
         self.x = random.randint(50, WIDTH - 50)
         self.y = random.randint(130, HEIGHT - 80)
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.direction = random.choice([-1, 1])
+        self.vy = 0.0  # 鱼群行为带来的上下速度
         self.wobble = random.uniform(0, math.pi * 2)
         self.is_fleeing = False
         self.flee_timer = 0
         self.spawn_time = time.time()
         self.age = 0  # 在屏幕上的时间（秒）
 
-        # 使用预计算的权重列表快速选择稀有度
-        self.rarity = random.choice(RARITY_WEIGHTS)
+        # 使用别名表按权重快速选择稀有度
+        self.rarity = RARITY_SAMPLER.sample(random)
         data = RARITY[self.rarity]
 
         self.color = random.choice(data["colors"])
@@ -37,7 +50,11 @@ class Fish:
         self.tail_phase = random.uniform(0, math.pi * 2)
         self.fin_phase = random.uniform(0, math.pi * 2)
 
-    def update(self, volume, dt, water_top):
+    def update(self, volume, dt, water_top, neighbors=None):
+        """更新鱼的状态，neighbors 为附近的鱼（来自空间网格），用于鱼群行为"""
+        # 记录上一步位置，用于渲染插值
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.age += dt
         self.wobble += 4 * dt
         self.tail_phase += 8 * dt  # 尾巴摆动
@@ -55,182 +72,266 @@ class Fish:
 
         if self.is_fleeing:
             self.x += self.speed * FISH_FLEE_SPEED * self.direction * 60 * dt
-            self.y += random.uniform(-0.8, 0.8)
+            # 随机抖动按 60 帧/秒的手感折算到当前步长
+            self.y += random.uniform(-0.8, 0.8) * math.sqrt(60 * dt)
         else:
             self.x += self.speed * self.direction * 30 * dt
-            self.y += math.sin(self.wobble) * 0.25
+            self.y += math.sin(self.wobble) * 15 * dt
+            if neighbors:
+                self._school(neighbors, dt)
+
+        # 鱼群带来的上下游动，逐渐衰减
+        if self.vy:
+            self.y += self.vy * dt
+            self.vy *= max(0.0, 1 - 1.5 * dt)
+            if self.y < water_top + 30 or self.y > HEIGHT - 40:
+                self.y = min(max(self.y, water_top + 30), HEIGHT - 40)
+                self.vy = 0.0
 
         # 边界检测
         if self.x > WIDTH + 60:
             self.x = -60
             self.y = random.randint(int(water_top + 40), HEIGHT - 80)
             self.direction = 1
+            self.prev_x, self.prev_y = self.x, self.y
         elif self.x < -60:
             self.x = WIDTH + 60
             self.y = random.randint(int(water_top + 40), HEIGHT - 80)
             self.direction = -1
+            self.prev_x, self.prev_y = self.x, self.y
+
+    def _school(self, neighbors, dt):
+        """鱼群行为：同品质的鱼对齐、聚拢，所有鱼之间互相避让"""
+        x, y = self.x, self.y
+        rarity, direction = self.rarity, self.direction
+        avoid = 0.0
+        same = opposite = 0
+        sum_y = sum_vy = 0.0
+        considered = 0
+
+        for other in neighbors:
+            if other is self:
+                continue
+            dx = other.x - x
+            dy = other.y - y
+            dist_sq = dx * dx + dy * dy
+            if dist_sq > _SCHOOL_RADIUS_SQ:
+                continue
+
+            # 分离：离得太近就上下错开
+            if dist_sq < _SCHOOL_SEPARATION_SQ:
+                push = 1 - math.sqrt(dist_sq) / SCHOOL_SEPARATION
+                avoid += -push if dy > 0 else push
+
+            if other.rarity == rarity:
+                if other.direction == direction:
+                    same += 1
+                    sum_y += other.y
+                    sum_vy += other.vy
+                else:
+                    opposite += 1
+
+            considered += 1
+            if considered >= SCHOOL_MAX_NEIGHBORS:
+                break
+
+        accel = avoid * SCHOOL_AVOIDANCE
+        if same:
+            # 聚拢 + 对齐
+            accel += (sum_y / same - y) * SCHOOL_COHESION
+            accel += (sum_vy / same - self.vy) * SCHOOL_ALIGNMENT
+        vy = self.vy + accel * dt
+        self.vy = max(-SCHOOL_MAX_VY, min(SCHOOL_MAX_VY, vy))
+
+        # 同品质的鱼大多往另一个方向游时，偶尔掉头跟上
+        if opposite > same and random.random() < SCHOOL_TURN_RATE * dt:
+            self.direction = -direction
 
-    def draw(self, surface):
+    def draw(self, surface, alpha=1.0):
+        """绘制鱼，alpha 为上一个模拟步到当前模拟步之间的插值比例"""
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
         size = self.size
         d = 1 if self.direction > 0 else -1
-        
-        # 计算摆动
-        tail_wag = math.sin(self.tail_phase) * 8
-        fin_wag = math.sin(self.fin_phase) * 3
-        
+        atlas = Fish.atlas
+
         # 发光效果
         if self.has_glow and self.age > FISH_GLOW_AGE_THRESHOLD:
-            glow_size = size * 2.5
-            glow_surf = pygame.Surface((glow_size * 2, glow_size * 2), pygame.SRCALPHA)
-            # 多层发光
-            for layer in range(3):
-                layer_alpha = self.glow_color[3] // (layer + 1)
-                layer_size = glow_size * (1 + layer * 0.3)
-                glow_color = (*self.glow_color[:3], layer_alpha)
-                pygame.draw.ellipse(glow_surf, glow_color,
-                                   (glow_size * 0.3, glow_size * 0.3, 
-                                    glow_size * 1.4 - layer * 10, 
-                                    glow_size * 1.4 - layer * 10))
-            surface.blit(glow_surf, (self.x - glow_size * 0.8, self.y - glow_size * 0.8))
-
-        # 背鳍 - 带摆动
-        fin_base_x = self.x + size * 0.2 * d
-        fin_tip_x = fin_base_x + size * 0.5 * d + tail_wag * 0.3 * d
-        fin_points = [
-            (self.x + size * 0.3 * d, self.y),
-            (fin_tip_x, self.y - size * 0.7 + fin_wag * d),
-            (self.x + size * 0.1 * d, self.y + size * 0.15)
-        ]
-        pygame.draw.polygon(surface, self._darken_color(self.color, 30), fin_points)
-
-        # 身体 - 使用渐变效果
-        body_width = size * 1.7
-        body_height = size * 0.9
-        body_x = self.x - body_width // 2 + tail_wag * 0.2 * d
-        body_y = self.y - body_height // 2
-
-        # 绘制渐变身体（从上到下渐变）
-        self._draw_gradient_body(surface, body_x, body_y, body_width, body_height, self.color, d)
-
-        # 身体高光（让鱼看起来更有立体感）
-        highlight_rect = (
-            self.x - body_width // 3 + tail_wag * 0.2 * d,
-            self.y - body_height // 3,
-            body_width // 2,
-            body_height // 3
+            glow = atlas.glow(self.rarity, size) if atlas is not None else None
+            if glow is None:
+                glow = render_glow(size, self.glow_color)
+            glow_surf, ox, oy = glow
+            surface.blit(glow_surf, (x - ox, y - oy))
+
+        # 预渲染的精灵：按尾巴相位取最接近的一帧
+        if atlas is not None:
+            sprite = atlas.fish(self.rarity, self.color, size, d, self.tail_phase)
+            if sprite is not None:
+                sprite_surf, ox, oy = sprite
+                surface.blit(sprite_surf, (int(x) - ox, int(y) - oy))
+                return
+
+        draw_fish_shape(surface, x, y, size, self.color, d,
+                        math.sin(self.tail_phase) * 8, math.sin(self.fin_phase) * 3)
+
+
+def render_glow(size, glow_color):
+    """绘制发光层，返回 (Surface, 相对鱼中心的偏移x, 偏移y)"""
+    glow_size = size * 2.5
+    glow_surf = pygame.Surface((glow_size * 2, glow_size * 2), pygame.SRCALPHA)
+    # 多层发光
+    for layer in range(3):
+        layer_alpha = glow_color[3] // (layer + 1)
+        color = (*glow_color[:3], layer_alpha)
+        pygame.draw.ellipse(glow_surf, color,
+                           (glow_size * 0.3, glow_size * 0.3,
+                            glow_size * 1.4 - layer * 10,
+                            glow_size * 1.4 - layer * 10))
+    offset = glow_size * 0.8
+    return glow_surf, offset, offset
+
+
+def draw_fish_shape(surface, x, y, size, color, d, tail_wag, fin_wag):
+    """以 (x, y) 为中心绘制一条鱼，d 为朝向（1 向右，-1 向左）"""
+    # 背鳍 - 带摆动
+    fin_base_x = x + size * 0.2 * d
+    fin_tip_x = fin_base_x + size * 0.5 * d + tail_wag * 0.3 * d
+    fin_points = [
+        (x + size * 0.3 * d, y),
+        (fin_tip_x, y - size * 0.7 + fin_wag * d),
+        (x + size * 0.1 * d, y + size * 0.15)
+    ]
+    pygame.draw.polygon(surface, _darken(color, 30), fin_points)
+
+    # 身体 - 使用渐变效果
+    body_width = size * 1.7
+    body_height = size * 0.9
+    body_x = x - body_width // 2 + tail_wag * 0.2 * d
+    body_y = y - body_height // 2
+
+    # 绘制渐变身体（从上到下渐变）
+    _draw_gradient_body(surface, body_x, body_y, body_width, body_height, color, d)
+
+    # 身体高光（让鱼看起来更有立体感）
+    highlight_rect = (
+        x - body_width // 3 + tail_wag * 0.2 * d,
+        y - body_height // 3,
+        body_width // 2,
+        body_height // 3
+    )
+    highlight_color = tuple(min(255, c + 60) for c in color)
+    pygame.draw.ellipse(surface, highlight_color, highlight_rect)
+
+    # 鱼鳞纹理效果
+    _draw_scales(surface, body_x, body_y, body_width, body_height, color, d)
+
+    # 尾巴 - 带摆动动画
+    tail_base_x = x - size * 0.7 * d
+    tail_points = [
+        (tail_base_x, y),
+        (tail_base_x - size * 1.0 * d + tail_wag, y - size * 0.7),
+        (tail_base_x - size * 1.2 * d + tail_wag * 1.5, y),
+        (tail_base_x - size * 1.0 * d + tail_wag, y + size * 0.7)
+    ]
+    pygame.draw.polygon(surface, _darken(color, 15), tail_points)
+
+    # 腮红 - 侧边
+    cheek_x = x + size * 0.5 * d
+    cheek_rect = (cheek_x - size * 0.2, y - size * 0.1, size * 0.3, size * 0.25)
+    cheek_color = (255, 130, 130, 80)
+    pygame.draw.ellipse(surface, cheek_color, cheek_rect)
+
+    # 眼睛
+    eye_x = x + size * 0.55 * d
+    eye_size = max(4, size // 4)
+    
+    # 眼白
+    pygame.draw.circle(surface, (255, 255, 255), (int(eye_x), int(y - 2)), eye_size)
+    
+    # 瞳孔
+    pupil_x = eye_x + size * 0.08 * d
+    pygame.draw.circle(surface, (20, 20, 40), (int(pupil_x), int(y - 2)), eye_size // 2)
+    
+    # 眼神高光
+    pygame.draw.circle(surface, (255, 255, 255), 
+                      (int(pupil_x + size * 0.05 * d), int(y - 4)), eye_size // 4)
+
+    # 胸鳍 - 带摆动
+    fin_start_x = x + size * 0.1 * d
+    fin_points = [
+        (fin_start_x, y + size * 0.2),
+        (fin_start_x + size * 0.4 * d + fin_wag * d, y + size * 0.5),
+        (fin_start_x + size * 0.1 * d, y + size * 0.4)
+    ]
+    pygame.draw.polygon(surface, _darken(color, 25), fin_points)
+
+    # 腹鳍
+    belly_x = x - size * 0.2 * d
+    belly_points = [
+        (belly_x, y + size * 0.35),
+        (belly_x + size * 0.25 * d, y + size * 0.55),
+        (belly_x - size * 0.1 * d, y + size * 0.5)
+    ]
+    pygame.draw.polygon(surface, _darken(color, 35), belly_points)
+
+
+def _darken(color, amount):
+    """使颜色变暗"""
+    return tuple(max(0, c - amount) for c in color)
+
+def _lighten(color, amount):
+    """使颜色变亮"""
+    return tuple(min(255, c + amount) for c in color)
+
+def _draw_gradient_body(surface, x, y, width, height, color, direction):
+    """绘制渐变色鱼身体"""
+    # 创建渐变表面
+    body_surf = pygame.Surface((int(width), int(height)), pygame.SRCALPHA)
+
+    # 顶部颜色（较亮）
+    top_color = _lighten(color, 30)
+    # 底部颜色（较暗）
+    bottom_color = _darken(color, 20)
+
+    # 垂直渐变
+    for row in range(int(height)):
+        ratio = row / height
+        # 线性插值
+        grad_color = tuple(
+            int(top_color[i] * (1 - ratio) + bottom_color[i] * ratio)
+            for i in range(3)
         )
-        highlight_color = tuple(min(255, c + 60) for c in self.color)
-        pygame.draw.ellipse(surface, highlight_color, highlight_rect)
-
-        # 鱼鳞纹理效果
-        self._draw_scales(surface, body_x, body_y, body_width, body_height, self.color, d)
-
-        # 尾巴 - 带摆动动画
-        tail_base_x = self.x - size * 0.7 * d
-        tail_points = [
-            (tail_base_x, self.y),
-            (tail_base_x - size * 1.0 * d + tail_wag, self.y - size * 0.7),
-            (tail_base_x - size * 1.2 * d + tail_wag * 1.5, self.y),
-            (tail_base_x - size * 1.0 * d + tail_wag, self.y + size * 0.7)
-        ]
-        pygame.draw.polygon(surface, self._darken_color(self.color, 15), tail_points)
-
-        # 腮红 - 侧边
-        cheek_x = self.x + size * 0.5 * d
-        cheek_rect = (cheek_x - size * 0.2, self.y - size * 0.1, size * 0.3, size * 0.25)
-        cheek_color = (255, 130, 130, 80)
-        pygame.draw.ellipse(surface, cheek_color, cheek_rect)
-
-        # 眼睛
-        eye_x = self.x + size * 0.55 * d
-        eye_size = max(4, size // 4)
-        
-        # 眼白
-        pygame.draw.circle(surface, (255, 255, 255), (int(eye_x), int(self.y - 2)), eye_size)
-        
-        # 瞳孔
-        pupil_x = eye_x + size * 0.08 * d
-        pygame.draw.circle(surface, (20, 20, 40), (int(pupil_x), int(self.y - 2)), eye_size // 2)
-        
-        # 眼神高光
-        pygame.draw.circle(surface, (255, 255, 255), 
-                          (int(pupil_x + size * 0.05 * d), int(self.y - 4)), eye_size // 4)
-
-        # 胸鳍 - 带摆动
-        fin_start_x = self.x + size * 0.1 * d
-        fin_points = [
-            (fin_start_x, self.y + size * 0.2),
-            (fin_start_x + size * 0.4 * d + fin_wag * d, self.y + size * 0.5),
-            (fin_start_x + size * 0.1 * d, self.y + size * 0.4)
-        ]
-        pygame.draw.polygon(surface, self._darken_color(self.color, 25), fin_points)
-
-        # 腹鳍
-        belly_x = self.x - size * 0.2 * d
-        belly_points = [
-            (belly_x, self.y + size * 0.35),
-            (belly_x + size * 0.25 * d, self.y + size * 0.55),
-            (belly_x - size * 0.1 * d, self.y + size * 0.5)
-        ]
-        pygame.draw.polygon(surface, self._darken_color(self.color, 35), belly_points)
-
-    def _darken_color(self, color, amount):
-        """使颜色变暗"""
-        return tuple(max(0, c - amount) for c in color)
-
-    def _lighten_color(self, color, amount):
-        """使颜色变亮"""
-        return tuple(min(255, c + amount) for c in color)
-
-    def _draw_gradient_body(self, surface, x, y, width, height, color, direction):
-        """绘制渐变色鱼身体"""
-        # 创建渐变表面
-        body_surf = pygame.Surface((int(width), int(height)), pygame.SRCALPHA)
-
-        # 顶部颜色（较亮）
-        top_color = self._lighten_color(color, 30)
-        # 底部颜色（较暗）
-        bottom_color = self._darken_color(color, 20)
-
-        # 垂直渐变
-        for row in range(int(height)):
-            ratio = row / height
-            # 线性插值
-            grad_color = tuple(
-                int(top_color[i] * (1 - ratio) + bottom_color[i] * ratio)
-                for i in range(3)
-            )
-            pygame.draw.line(body_surf, grad_color, (0, row), (width, row))
-
-        # 裁剪成椭圆形状
-        mask = pygame.Surface((int(width), int(height)), pygame.SRCALPHA)
-        pygame.draw.ellipse(mask, (255, 255, 255, 255), (0, 0, width, height))
-        body_surf.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-
-        surface.blit(body_surf, (int(x), int(y)))
-
-    def _draw_scales(self, surface, x, y, width, height, color, direction):
-        """绘制鱼鳞纹理"""
-        scale_color = (*self._lighten_color(color, 40)[:3], 40)  # 半透明的亮色
-        scale_size = min(width, height) * 0.12
-
-        # 只绘制部分鱼鳞，避免太密集
-        rows = 3
-        cols = 4
-        for row in range(rows):
-            for col in range(cols):
-                # 交错排列
-                offset_x = (row % 2) * (scale_size * 0.5)
-                scale_x = x + width * 0.2 + col * scale_size * 1.2 + offset_x
-                scale_y = y + height * 0.25 + row * scale_size * 0.8
-
-                # 确保在身体范围内
-                if scale_x + scale_size < x + width * 0.8 and scale_y + scale_size < y + height * 0.8:
-                    # 绘制单个鱼鳞（小椭圆）
-                    scale_rect = (
-                        int(scale_x),
-                        int(scale_y),
-                        int(scale_size),
-                        int(scale_size * 0.6)
-                    )
-                    pygame.draw.ellipse(surface, scale_color, scale_rect)
+        pygame.draw.line(body_surf, grad_color, (0, row), (width, row))
+
+    # 裁剪成椭圆形状
+    mask = pygame.Surface((int(width), int(height)), pygame.SRCALPHA)
+    pygame.draw.ellipse(mask, (255, 255, 255, 255), (0, 0, width, height))
+    body_surf.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+
+    surface.blit(body_surf, (int(x), int(y)))
+
+def _draw_scales(surface, x, y, width, height, color, direction):
+    """绘制鱼鳞纹理"""
+    scale_color = (*_lighten(color, 40)[:3], 40)  # 半透明的亮色
+    scale_size = min(width, height) * 0.12
+
+    # 只绘制部分鱼鳞，避免太密集
+    rows = 3
+    cols = 4
+    for row in range(rows):
+        for col in range(cols):
+            # 交错排列
+            offset_x = (row % 2) * (scale_size * 0.5)
+            scale_x = x + width * 0.2 + col * scale_size * 1.2 + offset_x
+            scale_y = y + height * 0.25 + row * scale_size * 0.8
+
+            # 确保在身体范围内
+            if scale_x + scale_size < x + width * 0.8 and scale_y + scale_size < y + height * 0.8:
+                # 绘制单个鱼鳞（小椭圆）
+                scale_rect = (
+                    int(scale_x),
+                    int(scale_y),
+                    int(scale_size),
+                    int(scale_size * 0.6)
+                )
+                pygame.draw.ellipse(surface, scale_color, scale_rect)
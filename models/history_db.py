@@ -0,0 +1,264 @@
+"""SQLite 历史数据库
+
+stats.json 只保存累计总数，这里按会话、事件和天保存完整历史：
+- sessions：每次启动一行
+- events：每个事件一行（与事件日志相同的类型）
+- daily / daily_fish：按天预先汇总的安静时长、鱼和番茄钟数量
+
+主线程只把事件攒在内存里，定期整批交给后台线程写入（WAL 模式，一批一个事务），
+查询走按天汇总的表，几年的数据也能在毫秒级返回。
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from config import HISTORY_FLUSH_SECONDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    quiet_seconds REAL NOT NULL DEFAULT 0,
+    fish_caught INTEGER NOT NULL DEFAULT 0,
+    pomodoros INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events (kind, ts);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    quiet_seconds REAL NOT NULL DEFAULT 0,
+    fish_caught INTEGER NOT NULL DEFAULT 0,
+    fish_lost INTEGER NOT NULL DEFAULT 0,
+    pomodoros INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS daily_fish (
+    day TEXT NOT NULL,
+    rarity TEXT NOT NULL,
+    caught INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, rarity)
+);
+"""
+
+# 事件类型 -> daily 表中的计数列
+_DAILY_COLUMNS = {
+    "fish_caught": "fish_caught",
+    "fish_lost": "fish_lost",
+    "pomodoro": "pomodoros",
+}
+
+
+def _empty_day():
+    return {"quiet_seconds": 0.0, "fish_caught": 0, "fish_lost": 0, "pomodoros": 0}
+
+
+def _day(ts):
+    return datetime.fromtimestamp(ts).date().isoformat()
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        # 主线程侧的缓冲
+        self._events = []
+        self._quiet = {}  # 日期 -> 安静秒数
+        self._last_flush = time.monotonic()
+
+        # 后台写入线程独占写连接
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="HistoryWriter", daemon=True)
+        self._session_ready = threading.Event()
+        self.session_id = None
+        # 每写入一批数据加一，界面据此判断缓存的图表是否需要重画
+        self.data_version = 0
+        self._thread.start()
+        self._queue.put(("start", time.time()))
+        self._reader = None
+
+    # ---------- 主线程：记录 ----------
+
+    def record_event(self, kind, detail=None, ts=None):
+        self._events.append((ts if ts is not None else time.time(), kind,
+                             None if detail is None else str(detail)))
+
+    def record_quiet_time(self, seconds):
+        day = _day(time.time())
+        self._quiet[day] = self._quiet.get(day, 0.0) + seconds
+
+    def tick(self):
+        if time.monotonic() - self._last_flush >= HISTORY_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """把缓冲交给后台线程（不等待写入）"""
+        self._last_flush = time.monotonic()
+        if not self._events and not self._quiet:
+            return
+        self._queue.put(("batch", self._events, self._quiet))
+        self._events = []
+        self._quiet = {}
+
+    def close(self):
+        self.flush()
+        self._queue.put(("end", time.time()))
+        self._queue.put(None)
+        self._thread.join()
+        self.close_reader()
+
+    def close_reader(self):
+        """关闭查询连接（sqlite 连接只能在创建它的线程中关闭）"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    # ---------- 后台线程：写入 ----------
+
+    def _run(self):
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as e:
+            print(f"[HistoryStore] 无法打开数据库: {e}")
+            self._session_ready.set()
+            while self._queue.get() is not None:
+                pass
+            return
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                with conn:
+                    self._apply(conn, item)
+            except sqlite3.Error as e:
+                print(f"[HistoryStore] 写入失败: {e}")
+            else:
+                if item[0] == "batch":
+                    self.data_version += 1
+            if item[0] == "start":
+                self._session_ready.set()
+        conn.close()
+
+    def _apply(self, conn, item):
+        op = item[0]
+        if op == "start":
+            # 上次异常退出没有写入 ended_at 的会话：按最后一个事件的时间结束，
+            # 否则它们永远不算完成，增量导出会跳过
+            conn.execute(
+                """UPDATE sessions SET ended_at = COALESCE(
+                       (SELECT MAX(ts) FROM events WHERE session_id = sessions.id), started_at)
+                   WHERE ended_at IS NULL"""
+            )
+            cur = conn.execute("INSERT INTO sessions (started_at) VALUES (?)", (item[1],))
+            self.session_id = cur.lastrowid
+        elif op == "end":
+            conn.execute("UPDATE sessions SET ended_at = ? WHERE id = ?", (item[1], self.session_id))
+        elif op == "batch":
+            self._apply_batch(conn, item[1], item[2])
+
+    def _apply_batch(self, conn, events, quiet):
+        sid = self.session_id
+        conn.executemany(
+            "INSERT INTO events (ts, session_id, kind, detail) VALUES (?, ?, ?, ?)",
+            [(ts, sid, kind, detail) for ts, kind, detail in events]
+        )
+
+        # 先在内存中按天汇总，再合并进 daily 表
+        daily = {}
+        daily_fish = {}
+        for day, seconds in quiet.items():
+            daily.setdefault(day, _empty_day())
+            daily[day]["quiet_seconds"] += seconds
+        for ts, kind, detail in events:
+            column = _DAILY_COLUMNS.get(kind)
+            if column is None:
+                continue
+            day = _day(ts)
+            daily.setdefault(day, _empty_day())
+            daily[day][column] += 1
+            if kind == "fish_caught" and detail:
+                daily_fish[day, detail] = daily_fish.get((day, detail), 0) + 1
+
+        conn.executemany(
+            """INSERT INTO daily (day, quiet_seconds, fish_caught, fish_lost, pomodoros)
+               VALUES (:day, :quiet_seconds, :fish_caught, :fish_lost, :pomodoros)
+               ON CONFLICT(day) DO UPDATE SET
+                   quiet_seconds = quiet_seconds + excluded.quiet_seconds,
+                   fish_caught = fish_caught + excluded.fish_caught,
+                   fish_lost = fish_lost + excluded.fish_lost,
+                   pomodoros = pomodoros + excluded.pomodoros""",
+            [dict(row, day=day) for day, row in daily.items()]
+        )
+        conn.executemany(
+            """INSERT INTO daily_fish (day, rarity, caught) VALUES (?, ?, ?)
+               ON CONFLICT(day, rarity) DO UPDATE SET caught = caught + excluded.caught""",
+            [(day, rarity, n) for (day, rarity), n in daily_fish.items()]
+        )
+
+        # 会话汇总
+        conn.execute(
+            """UPDATE sessions SET
+                   quiet_seconds = quiet_seconds + ?,
+                   fish_caught = fish_caught + ?,
+                   pomodoros = pomodoros + ?
+               WHERE id = ?""",
+            (sum(quiet.values()),
+             sum(1 for _, kind, _ in events if kind == "fish_caught"),
+             sum(1 for _, kind, _ in events if kind == "pomodoro"),
+             sid)
+        )
+
+    # ---------- 查询 ----------
+
+    def _read(self):
+        if self._reader is None:
+            self._session_ready.wait()
+            self._reader = connect(self.path)
+        return self._reader
+
+    def quiet_minutes_by_day(self, start_day, end_day):
+        """[(日期, 安静分钟数), ...]，日期为 'YYYY-MM-DD'，包含两端"""
+        rows = self._read().execute(
+            "SELECT day, quiet_seconds / 60.0 FROM daily WHERE day BETWEEN ? AND ? ORDER BY day",
+            (start_day, end_day)
+        )
+        return rows.fetchall()
+
+    def fish_by_rarity_by_week(self, start_day, end_day):
+        """[(年-周, 稀有度, 数量), ...]"""
+        rows = self._read().execute(
+            """SELECT strftime('%Y-%W', day) AS week, rarity, SUM(caught)
+               FROM daily_fish WHERE day BETWEEN ? AND ?
+               GROUP BY week, rarity ORDER BY week""",
+            (start_day, end_day)
+        )
+        return rows.fetchall()
+
+    def daily_totals(self, start_day, end_day):
+        """[(日期, 安静秒数, 获得鱼, 失去鱼, 番茄钟), ...]"""
+        rows = self._read().execute(
+            """SELECT day, quiet_seconds, fish_caught, fish_lost, pomodoros
+               FROM daily WHERE day BETWEEN ? AND ? ORDER BY day""",
+            (start_day, end_day)
+        )
+        return rows.fetchall()
@@ -0,0 +1,223 @@
+"""本机监控指标（Prometheus 文本格式）
+
+config.METRICS_ENABLED 打开后：
+- 主线程每帧调用 AppMetrics.update()，只做几次赋值和加法，不加锁、不做 IO
+- 后台线程每隔 METRICS_INTERVAL_SECONDS 秒把所有指标渲染成 Prometheus 文本格式，
+  原子写入 data/metrics.prom（可以交给 node_exporter 的 textfile collector 收集）
+- METRICS_HTTP_PORT 大于 0 时，另起一个后台线程在 127.0.0.1 上提供 GET /metrics
+
+后台线程只读取指标的当前值，抓取再慢也不会阻塞渲染循环；读到的可能是某一帧中途的值，
+对监控来说没有影响。
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import (
+    DATA_DIR, METRICS_FILE, METRICS_INTERVAL_SECONDS, METRICS_HTTP_PORT, RARITY
+)
+from models.autosave import atomic_write_bytes
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# 每帧 CPU 时间的平滑系数
+CPU_SMOOTHING = 0.05
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value == value else "NaN"
+    return str(value)
+
+
+class Counter:
+    __slots__ = ("name", "help", "value")
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.value
+
+
+class Gauge(Counter):
+    __slots__ = ()
+    kind = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+
+class GaugeFamily:
+    """带一个标签的一组 gauge，例如按品质统计的鱼数量"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, label, values):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.values = dict.fromkeys(values, 0)
+
+    def set(self, label_value, value):
+        self.values[label_value] = value
+
+    def samples(self):
+        for label_value, value in list(self.values.items()):
+            yield f'{self.name}{{{self.label}="{label_value}"}}', value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self._add(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._add(Gauge(name, help_text))
+
+    def gauge_family(self, name, help_text, label, values):
+        return self._add(GaugeFamily(name, help_text, label, values))
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class AppMetrics:
+    """安静养鱼的各项指标，主线程每帧 update() 一次"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.frames = registry.counter("quietfish_frames_total", "渲染的帧数")
+        self.cpu_seconds = registry.counter("quietfish_cpu_seconds_total", "进程占用的 CPU 时间（秒）")
+        self.fps = registry.gauge("quietfish_fps", "最近的帧率")
+        self.frame_seconds = registry.gauge("quietfish_frame_seconds", "上一帧的间隔（秒）")
+        self.cpu_per_frame = registry.gauge("quietfish_cpu_seconds_per_frame", "平滑后每帧占用的 CPU 时间（秒）")
+        self.audio_level = registry.gauge("quietfish_audio_level", "当前音量（0-100）")
+        self.quiet = registry.gauge("quietfish_quiet", "当前是否安静（1 安静，0 吵闹）")
+        self.quiet_seconds = registry.counter("quietfish_quiet_seconds_total", "安静的累计时长（秒）")
+        self.run_seconds = registry.counter("quietfish_run_seconds_total", "运行的累计时长（秒）")
+        self.quiet_ratio = registry.gauge("quietfish_quiet_ratio", "本次运行中安静时间的比例")
+        self.fish = registry.gauge_family("quietfish_fish", "当前各品质鱼的数量", "rarity", RARITY)
+        self.pomodoro_state = registry.gauge("quietfish_pomodoro_state", "番茄钟状态（0 未开启，1 专注，2 休息）")
+        self.pomodoro_remaining = registry.gauge("quietfish_pomodoro_remaining_seconds", "番茄钟剩余时间（秒）")
+        self._last_cpu = time.process_time()
+
+    def update(self, app, frame_time):
+        """记录一帧（固定数量的赋值，和鱼的数量无关）"""
+        self.frames.inc()
+        cpu = time.process_time()
+        used = cpu - self._last_cpu
+        self._last_cpu = cpu
+        self.cpu_seconds.inc(used)
+        self.cpu_per_frame.set(self.cpu_per_frame.value + (used - self.cpu_per_frame.value) * CPU_SMOOTHING)
+        self.fps.set(app.clock.get_fps())
+        self.frame_seconds.set(frame_time)
+
+        self.audio_level.set(app.volume)
+        self.quiet.set(1 if app.is_quiet else 0)
+        self.run_seconds.inc(frame_time)
+        if app.is_quiet:
+            self.quiet_seconds.inc(frame_time)
+        if self.run_seconds.value > 0:
+            self.quiet_ratio.set(self.quiet_seconds.value / self.run_seconds.value)
+
+        fish = self.fish
+        for rarity, count in app.population.counts.items():
+            fish.set(rarity, count)
+
+        pomodoro = app.pomodoro
+        if pomodoro["active"]:
+            self.pomodoro_state.set(2 if pomodoro["is_break"] else 1)
+            self.pomodoro_remaining.set(max(0, pomodoro["end_time"] - app.ticks) / 1000)
+        else:
+            self.pomodoro_state.set(0)
+            self.pomodoro_remaining.set(0)
+
+
+class MetricsExporter:
+    """后台定期写文件，可选地提供 HTTP 接口"""
+
+    def __init__(self, registry, path=None, interval=METRICS_INTERVAL_SECONDS, http_port=METRICS_HTTP_PORT):
+        self.registry = registry
+        self.path = path or os.path.join(DATA_DIR, METRICS_FILE)
+        self.interval = interval
+        self.http_port = http_port
+        self.server = None
+        self._stop = threading.Event()
+        self._writer = None
+        self._server_thread = None
+
+    def start(self):
+        self._writer = threading.Thread(target=self._write_loop, name="MetricsWriter", daemon=True)
+        self._writer.start()
+        if self.http_port:
+            try:
+                self.server = ThreadingHTTPServer(("127.0.0.1", self.http_port), self._handler_class())
+            except OSError as e:
+                print(f"[Metrics] 无法监听端口 {self.http_port}: {e}")
+            else:
+                self.server.daemon_threads = True
+                self._server_thread = threading.Thread(target=self.server.serve_forever,
+                                                       name="MetricsHTTP", daemon=True)
+                self._server_thread.start()
+                print(f"[Metrics] 指标地址: http://127.0.0.1:{self.http_port}/metrics")
+        return self
+
+    def _handler_class(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def write(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            atomic_write_bytes(self.path, self.registry.render().encode("utf-8"))
+        except (IOError, OSError) as e:
+            print(f"[Metrics] 写入指标失败: {e}")
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def close(self):
+        """停止后台线程，并写入最后一次指标"""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.write()
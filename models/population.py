@@ -0,0 +1,163 @@
+"""鱼群数量引擎
+
+把加鱼/减鱼的规则从主循环中抽离出来：
+- 不依赖 pygame、time.time() 和全局 random，便于测试
+- 通过 seed 复现同一段会话
+- 输入 (dt, volume)，输出加鱼/减鱼事件
+"""
+import random
+
+from config import (
+    RARITY, SILENCE_THRESHOLD, AUDIO_MAX_VOLUME,
+    SPAWN_BASE_SCORE, SPAWN_SCORE_STEP, SPAWN_SCORE_STEP_MINUTES,
+    QUIET_SCORE_BASE_RATE, QUIET_SCORE_QUIET_RATE,
+    FISH_REMOVE_RATE, MAX_FISH_LIMIT
+)
+from models.spawn_table import SPAWN_TABLE
+
+# 事件类型
+SPAWN = "spawn"
+REMOVE = "remove"
+QUIET = "quiet"    # 从吵闹恢复安静
+NOISY = "noisy"    # 从安静变吵闹
+
+# 品质顺序（从低到高）
+RARITY_ORDER = list(RARITY.keys())
+
+_NO_EVENTS = ()
+
+# 开局的鱼只可能是普通或稀有
+INITIAL_RARITIES = ("common", "rare")
+INITIAL_RARITY_WEIGHTS = (70, 30)
+
+
+def initial_rarity(rng):
+    """抽一条开局鱼的品质（普通 70%，稀有 30%），rng 为 random 模块或 random.Random"""
+    return rng.choices(INITIAL_RARITIES, weights=INITIAL_RARITY_WEIGHTS)[0]
+
+
+class PopulationEngine:
+    def __init__(self, seed=None, max_fish=MAX_FISH_LIMIT, threshold=SILENCE_THRESHOLD,
+                 spawn_table=SPAWN_TABLE):
+        self.rng = random.Random(seed)
+        self.spawn_table = spawn_table
+        self.max_fish = max_fish
+        self.threshold = threshold
+
+        # 各品质当前数量
+        self.counts = {r: 0 for r in RARITY_ORDER}
+        self.total = 0
+
+        self.is_quiet = True
+        # 安静积分：用于计算加鱼的全局进度
+        self.quiet_score = 0.0
+        # 当前阶段需要的积分
+        self.current_required_score = SPAWN_BASE_SCORE
+        # 本次安静累计时间（秒）
+        self.session_quiet_time = 0.0
+        # 所有品质共享同一个累计权重（安静时积累，吵闹时清零）
+        self.weight = 0.0
+        # 引擎运行的总时长（秒）
+        self.elapsed = 0.0
+
+    @property
+    def fish_weights(self):
+        """每种鱼的累计权重值（兼容旧接口）"""
+        return {r: self.weight for r in RARITY_ORDER}
+
+    def add(self, rarity):
+        """登记一条已经存在的鱼（例如初始鱼）"""
+        self.counts[rarity] += 1
+        self.total += 1
+
+    def step(self, dt, volume):
+        """推进 dt 秒，返回本步产生的事件列表 [(类型, 品质), ...]
+
+        安静/吵闹切换事件的品质为 None
+        """
+        self.elapsed += dt
+        was_quiet = self.is_quiet
+        is_quiet = volume < self.threshold
+        self.is_quiet = is_quiet
+
+        # 安静度：0-1，越安静越接近1
+        normalized_volume = volume / AUDIO_MAX_VOLUME
+        if normalized_volume > 1.0:
+            normalized_volume = 1.0
+        quietness = 1 - normalized_volume ** 0.5
+
+        if not is_quiet:
+            # 吵闹环境：清零权重和安静积分，并按概率移除鱼
+            self.weight = 0.0
+            self.quiet_score = 0.0
+            removed = None
+            if self.total > 0:
+                remove_chance = (1 - quietness) * dt * FISH_REMOVE_RATE
+                if self.rng.random() < remove_chance:
+                    removed = self._remove_highest()
+            if was_quiet:
+                return [(NOISY, None), (REMOVE, removed)] if removed else [(NOISY, None)]
+            return [(REMOVE, removed)] if removed else _NO_EVENTS
+
+        events = _NO_EVENTS
+        if not was_quiet:
+            # 刚刚恢复安静，清零安静积分，但保留本次会话累计时间
+            self.quiet_score = 0.0
+            events = [(QUIET, None)]
+
+        gain = (QUIET_SCORE_BASE_RATE + quietness * QUIET_SCORE_QUIET_RATE) * dt
+        self.quiet_score += gain
+        self.session_quiet_time += dt
+        weight = self.weight + gain
+        self.weight = weight if weight < 100 else 100
+
+        # 根据累计时间调整加鱼难度（越往后越难加，但品质越高）
+        quiet_minutes = self.session_quiet_time / 60
+        self.current_required_score = (
+            SPAWN_BASE_SCORE
+            + int(quiet_minutes / SPAWN_SCORE_STEP_MINUTES) * SPAWN_SCORE_STEP
+        )
+
+        if (gain > 0 and self.total < self.max_fish
+                and self.quiet_score >= self.current_required_score):
+            rarity = self.spawn_table.sample(quiet_minutes, self.rng)
+            self.counts[rarity] += 1
+            self.total += 1
+            # 消耗安静积分，清零重新开始积累
+            self.quiet_score = 0.0
+            return events + [(SPAWN, rarity)] if events else [(SPAWN, rarity)]
+
+        return events
+
+    def _remove_highest(self):
+        """按稀有度从高到低移除一条鱼"""
+        counts = self.counts
+        for rarity in reversed(RARITY_ORDER):
+            if counts[rarity] > 0:
+                counts[rarity] -= 1
+                self.total -= 1
+                return rarity
+        return None
+
+    def fast_forward(self, seconds, volume=0, dt=1 / 30):
+        """快进模拟一段时间
+
+        volume 可以是固定音量，也可以是 f(经过秒数) -> 音量 的函数。
+        返回 {"spawned": {品质: 数量}, "removed": {品质: 数量}, "steps": 步数}
+        """
+        spawned = {r: 0 for r in RARITY_ORDER}
+        removed = {r: 0 for r in RARITY_ORDER}
+        step = self.step
+        volume_at = volume if callable(volume) else None
+        steps = int(seconds / dt)
+        t = 0.0
+        for _ in range(steps):
+            events = step(dt, volume_at(t) if volume_at else volume)
+            if events:
+                for kind, rarity in events:
+                    if kind == SPAWN:
+                        spawned[rarity] += 1
+                    elif kind == REMOVE:
+                        removed[rarity] += 1
+            t += dt
+        return {"spawned": spawned, "removed": removed, "steps": steps}
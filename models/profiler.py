@@ -0,0 +1,119 @@
+"""帧性能分析器
+
+主循环在每个阶段结束时调用 lap(名字)，记下从上一次 lap 到现在的耗时（perf_counter_ns），
+同一帧里多次出现的阶段（比如一帧跑了两个模拟步）累加在一起。end_frame() 把这一帧
+各阶段的耗时写进固定长度的环形缓冲区，只保留最近 window 帧，用来计算 p50/p95/p99。
+
+关闭时 begin_frame / lap / end_frame 都是空函数，主循环里只多几次空调用。
+"""
+import time
+from array import array
+
+from config import PROFILER_WINDOW
+
+_now = time.perf_counter_ns
+
+PERCENTILES = (0.50, 0.95, 0.99)
+
+
+def _noop(name=None):
+    pass
+
+
+def percentiles(samples, count):
+    """前 count 个样本（纳秒）的 p50/p95/p99，单位毫秒"""
+    if count <= 0:
+        return 0.0, 0.0, 0.0
+    ordered = sorted(samples[:count])
+    return tuple(ordered[min(count - 1, int(count * p))] / 1e6 for p in PERCENTILES)
+
+
+class FrameProfiler:
+    def __init__(self, window=PROFILER_WINDOW):
+        self.window = window
+        self.enabled = False
+        # 阶段名，按第一次出现的顺序
+        self.stages = []
+        # 阶段名 -> 最近 window 帧的耗时（纳秒）
+        self._samples = {}
+        # 整帧耗时（不含等待下一帧的时间）
+        self.frame_times = array('q', bytes(8 * window))
+        # 下一帧写入的位置，以及已写入的帧数（最多 window）
+        self.pos = 0
+        self.count = 0
+
+        # 当前帧：阶段名 -> 累计耗时
+        self._current = {}
+        self._frame_start = 0
+        self._mark = 0
+
+        self.begin_frame = self.lap = self.end_frame = _noop
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled:
+            self.reset()
+            self.begin_frame = self._begin_frame
+            self.lap = self._lap
+            self.end_frame = self._end_frame
+        else:
+            self.begin_frame = self.lap = self.end_frame = _noop
+
+    def reset(self):
+        """清空统计（重新打开时不混入很久以前的数据）"""
+        self.stages = []
+        self._samples = {}
+        self._current = {}
+        self.frame_times = array('q', bytes(8 * self.window))
+        self.pos = 0
+        self.count = 0
+        # 在一帧中途打开时，这一帧从打开的时刻算起
+        self._frame_start = self._mark = _now()
+
+    # ---------- 计时 ----------
+
+    def _begin_frame(self):
+        self._frame_start = self._mark = _now()
+
+    def _lap(self, name):
+        now = _now()
+        current = self._current
+        current[name] = current.get(name, 0) + now - self._mark
+        self._mark = now
+
+    def _end_frame(self):
+        pos = self.pos
+        samples = self._samples
+        for stage, elapsed in self._current.items():
+            buffer = samples.get(stage)
+            if buffer is None:
+                buffer = samples[stage] = array('q', bytes(8 * self.window))
+                self.stages.append(stage)
+            buffer[pos] = elapsed
+        # 本帧没有出现的阶段记为 0
+        for stage in self.stages:
+            if stage not in self._current:
+                samples[stage][pos] = 0
+        self._current.clear()
+
+        self.frame_times[pos] = _now() - self._frame_start
+        self.pos = (pos + 1) % self.window
+        if self.count < self.window:
+            self.count += 1
+
+    # ---------- 查询 ----------
+
+    def summary(self):
+        """[(阶段名, p50, p95, p99), ...]（毫秒），最后一行是整帧"""
+        rows = [(stage, *percentiles(self._samples[stage], self.count)) for stage in self.stages]
+        rows.append(("frame", *percentiles(self.frame_times, self.count)))
+        return rows
+
+    def recent_frame_times(self):
+        """按时间顺序排列的最近各帧耗时（纳秒）"""
+        if self.count < self.window:
+            return self.frame_times[:self.count]
+        return self.frame_times[self.pos:] + self.frame_times[:self.pos]
@@ -0,0 +1,94 @@
+"""多档案管理
+
+data/profiles.json 只记录档案列表（编号、名字、最近使用时间），启动时只读这一个小文件，
+档案再多启动也不会变慢；每个档案的统计、成就和历史在选中后才由 StatsManager 加载。
+
+默认档案直接使用 data/ 目录，其他档案使用 data/profiles/<编号>/。
+"""
+import json
+import os
+import time
+
+from config import (
+    DATA_DIR, PROFILE_INDEX_FILE, PROFILES_DIR, DEFAULT_PROFILE_ID, DEFAULT_PROFILE_NAME
+)
+from models.autosave import atomic_write_json
+
+
+def _default_index():
+    return {
+        "version": 1,
+        "last": DEFAULT_PROFILE_ID,
+        "next_id": 1,
+        "profiles": [{"id": DEFAULT_PROFILE_ID, "name": DEFAULT_PROFILE_NAME, "last_used": 0}],
+    }
+
+
+class ProfileIndex:
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, PROFILE_INDEX_FILE)
+        self.data = self._load()
+        self._by_id = {p["id"]: p for p in self.data["profiles"]}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return _default_index()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return _default_index()
+        for key, value in _default_index().items():
+            data.setdefault(key, value)
+        return data
+
+    def save(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        atomic_write_json(self.path, self.data, ensure_ascii=False, indent=2)
+
+    def __len__(self):
+        return len(self.data["profiles"])
+
+    @property
+    def last(self):
+        """上次使用的档案编号"""
+        last = self.data["last"]
+        return last if last in self._by_id else DEFAULT_PROFILE_ID
+
+    def profiles(self):
+        """按最近使用时间排序的档案列表"""
+        return sorted(self.data["profiles"], key=lambda p: p["last_used"], reverse=True)
+
+    def get(self, profile_id):
+        return self._by_id.get(profile_id)
+
+    def find(self, name):
+        """按名字或编号查找档案"""
+        if name in self._by_id:
+            return self._by_id[name]
+        for profile in self.data["profiles"]:
+            if profile["name"] == name:
+                return profile
+        return None
+
+    def data_dir_for(self, profile_id):
+        if profile_id == DEFAULT_PROFILE_ID:
+            return self.data_dir
+        return os.path.join(self.data_dir, PROFILES_DIR, profile_id)
+
+    def create(self, name):
+        """新建档案，返回编号（只修改内存，select() 时一起保存）"""
+        profile_id = f"p{self.data['next_id']:04d}"
+        self.data["next_id"] += 1
+        profile = {"id": profile_id, "name": name, "last_used": 0}
+        self.data["profiles"].append(profile)
+        self._by_id[profile_id] = profile
+        return profile_id
+
+    def select(self, profile_id, save=True):
+        """记录为最近使用的档案并保存列表（save=False 时只修改内存，由调用方安排写盘）"""
+        self._by_id[profile_id]["last_used"] = time.time()
+        self.data["last"] = profile_id
+        if save:
+            self.save()
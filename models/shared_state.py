@@ -0,0 +1,253 @@
+"""分进程模式下的共享状态（双缓冲）
+
+模拟进程每一步把鱼群、气泡和界面需要的数字写进一块 multiprocessing.shared_memory，
+渲染进程每帧读取最新的一份，只负责画图。
+
+内存布局：
+- 控制区：最新一份所在的槽位（0 或 1）
+- 两个槽位，每个槽位：文件头 + 鱼记录数组 + 气泡的各字段数组（和 BubbleSystem 一样按字段存放）
+
+模拟进程总是写另一个槽位，写完再切换控制区，渲染进程读到的是一份完整的状态。
+每个槽位的序号在写入前后各加一（顺序锁）：读取前后序号不同或为奇数，
+说明渲染进程读得太慢、模拟进程已经在改写这个槽位，重新读最新的一份即可。
+"""
+import struct
+from multiprocessing import shared_memory
+
+from config import ACHIEVEMENTS, BUBBLE_CAPACITY, MAX_FISH_LIMIT, RARITY
+from models.fish import Fish
+from models.population import PopulationEngine
+from models.stats import StatsManager
+
+CONTROL = struct.Struct("<I")
+# 序号, 模拟步数, 模拟时间(monotonic), 步长, 音量, 是否安静,
+# 安静积分, 当前所需积分, 鱼群上限, 本次安静时长, 累计权重,
+# 番茄钟开启, 休息中, 番茄钟剩余毫秒, 成就通知计时, 新成就位图, 已解锁成就位图,
+# 积分, 累计安静秒数, 完成番茄钟数, 连续天数, 累计获得鱼数, 鱼数量, 气泡数量
+SLOT_HEADER = struct.Struct("<IQdddB dd Hdd BBId II qdIII HI")
+# 品质, 颜色序号, 大小, 方向, 上一步 x, 上一步 y, x, y, 年龄, 尾巴相位, 鳍相位
+FISH_RECORD = struct.Struct("<BBBb7f")
+
+RARITY_KEYS = list(RARITY.keys())
+_RARITY_INDEX = {key: i for i, key in enumerate(RARITY_KEYS)}
+ACHIEVEMENT_KEYS = list(ACHIEVEMENTS.keys())
+_ACHIEVEMENT_BIT = {key: 1 << i for i, key in enumerate(ACHIEVEMENT_KEYS)}
+
+# 读到正在改写的槽位时最多重试几次
+READ_RETRIES = 3
+
+# 气泡字段：(BubbleSystem 属性名, 每个元素的字节数)
+BUBBLE_FIELDS = (("x", 4), ("y", 4), ("speed", 4), ("phase", 4), ("size", 1))
+
+
+def _mask(keys):
+    mask = 0
+    for key in keys:
+        mask |= _ACHIEVEMENT_BIT.get(key, 0)
+    return mask
+
+
+def _keys(mask):
+    return [key for key, bit in _ACHIEVEMENT_BIT.items() if mask & bit]
+
+
+class FishView(Fish):
+    """渲染进程中的鱼：只有绘制需要的字段，每次读取时从共享内存覆盖"""
+
+    def __init__(self):
+        pass
+
+
+class PopulationView:
+    """渲染进程中代替 PopulationEngine，只保存界面显示的数字"""
+    fish_weights = PopulationEngine.fish_weights
+
+    def __init__(self):
+        self.quiet_score = 0.0
+        self.current_required_score = 0
+        self.max_fish = MAX_FISH_LIMIT
+        self.session_quiet_time = 0.0
+        self.weight = 0.0
+        self.counts = {r: 0 for r in RARITY_KEYS}
+
+
+class StatsView:
+    """渲染进程中代替 StatsManager，只提供统计面板用的 get_summary()"""
+    get_level = StatsManager.get_level
+    get_summary = StatsManager.get_summary
+
+    def __init__(self):
+        self.stats = {"points": 0, "total_quiet_seconds": 0.0, "pomodoro_completed": 0,
+                      "streak_days": 0, "total_fish_caught": 0}
+        self.achievements = dict.fromkeys(ACHIEVEMENT_KEYS, False)
+
+
+class SharedTankState:
+    """模拟进程 publish()，渲染进程 read()"""
+
+    def __init__(self, name=None, fish_capacity=MAX_FISH_LIMIT, bubble_capacity=BUBBLE_CAPACITY):
+        self.fish_capacity = fish_capacity
+        self.bubble_capacity = bubble_capacity
+        self._fish_offset = SLOT_HEADER.size
+        offset = self._fish_offset + FISH_RECORD.size * fish_capacity
+        self._bubble_offsets = []
+        for field, itemsize in BUBBLE_FIELDS:
+            self._bubble_offsets.append((field, itemsize, offset))
+            offset += itemsize * bubble_capacity
+        # 槽位按 8 字节对齐
+        self.slot_size = (offset + 7) // 8 * 8
+
+        size = 8 + 2 * self.slot_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.owner = name is None
+        self.buf = self.shm.buf
+        self._seq = [0, 0]
+        self._latest = 0
+        self.last_step = -1
+
+    def _slot(self, index):
+        return 8 + index * self.slot_size
+
+    # ---------- 模拟进程 ----------
+
+    def publish(self, app, step, step_time, dt):
+        """把 app（QuietFishApp）当前的模拟状态写进空闲的槽位，然后切换"""
+        index = 1 - self._latest
+        base = self._slot(index)
+        buf = self.buf
+        seq = self._seq[index] + 1
+        # 奇数序号：正在写
+        struct.pack_into("<I", buf, base, seq)
+
+        fish_list = app.fish_list[:self.fish_capacity]
+        offset = base + self._fish_offset
+        for fish in fish_list:
+            colors = RARITY[fish.rarity]["colors"]
+            color_index = colors.index(fish.color) if fish.color in colors else 0
+            FISH_RECORD.pack_into(
+                buf, offset, _RARITY_INDEX[fish.rarity], color_index, fish.size, fish.direction,
+                fish.prev_x, fish.prev_y, fish.x, fish.y, fish.age, fish.tail_phase, fish.fin_phase
+            )
+            offset += FISH_RECORD.size
+
+        bubbles = app.bubbles
+        count = min(bubbles.count, self.bubble_capacity)
+        for field, itemsize, field_offset in self._bubble_offsets:
+            start = base + field_offset
+            size = count * itemsize
+            buf[start:start + size] = memoryview(getattr(bubbles, field)).cast('B')[:size]
+
+        population = app.population
+        pomodoro = app.pomodoro
+        stats = app.stats.stats
+        seq += 1
+        SLOT_HEADER.pack_into(
+            buf, base, seq, step, step_time, dt, app.volume, app.is_quiet,
+            population.quiet_score, population.current_required_score, population.max_fish,
+            population.session_quiet_time, population.weight,
+            pomodoro["active"], pomodoro["is_break"],
+            max(0, pomodoro["end_time"] - app.ticks) if pomodoro["active"] else 0,
+            app.achievement_flash_timer, _mask(app.new_achievements),
+            _mask(key for key, unlocked in app.stats.achievements.items() if unlocked),
+            stats["points"], stats["total_quiet_seconds"], stats["pomodoro_completed"],
+            stats["streak_days"], stats["total_fish_caught"], len(fish_list), count
+        )
+        self._seq[index] = seq
+        self._latest = index
+        CONTROL.pack_into(buf, 0, index)
+
+    # ---------- 渲染进程 ----------
+
+    def read(self, view):
+        """有新的模拟步时把它写进 view（QuietFishApp 的各显示字段），返回模拟时间；没有新步时返回 None
+
+        连续几次都碰上正在改写的槽位时也返回 None：模拟进程可能在写的过程中退出了，
+        序号会一直是奇数，由调用方检查模拟进程是否还在运行。
+        """
+        buf = self.buf
+        for _ in range(READ_RETRIES):
+            base = self._slot(CONTROL.unpack_from(buf, 0)[0])
+            header = SLOT_HEADER.unpack_from(buf, base)
+            seq, step = header[0], header[1]
+            if seq & 1:
+                continue
+            # 还没有写入过，或者没有新的模拟步
+            if seq == 0 or step == self.last_step:
+                return None
+            self._apply(view, base, header)
+            # 读的过程中槽位被改写了，重新读
+            if struct.unpack_from("<I", buf, base)[0] == seq:
+                self.last_step = step
+                return header[2]
+        return None
+
+    def _apply(self, view, base, header):
+        (_, _, _, dt, volume, is_quiet,
+         quiet_score, required_score, max_fish, session_quiet_time, weight,
+         pomodoro_active, is_break, remaining_ms, flash_timer, new_mask, unlocked_mask,
+         points, quiet_seconds, pomodoro_completed, streak, total_fish, fish_count, bubble_count) = header
+        buf = self.buf
+        fish_count = min(fish_count, self.fish_capacity)
+        bubble_count = min(bubble_count, self.bubble_capacity)
+
+        fish_list = view.fish_list
+        while len(fish_list) < fish_count:
+            fish_list.append(FishView())
+        del fish_list[fish_count:]
+        population = view.population
+        counts = dict.fromkeys(RARITY_KEYS, 0)
+        offset = base + self._fish_offset
+        for fish in fish_list:
+            (rarity_index, color_index, fish.size, fish.direction,
+             fish.prev_x, fish.prev_y, fish.x, fish.y, fish.age,
+             fish.tail_phase, fish.fin_phase) = FISH_RECORD.unpack_from(buf, offset)
+            offset += FISH_RECORD.size
+            rarity = RARITY_KEYS[rarity_index]
+            data = RARITY[rarity]
+            fish.rarity = rarity
+            fish.color = data["colors"][color_index] if color_index < len(data["colors"]) else data["colors"][0]
+            fish.has_glow = data["glow"]
+            fish.glow_color = data.get("glow_color", (255, 255, 255, 100))
+            counts[rarity] += 1
+
+        bubbles = view.bubbles
+        for field, itemsize, field_offset in self._bubble_offsets:
+            start = base + field_offset
+            size = bubble_count * itemsize
+            memoryview(getattr(bubbles, field)).cast('B')[:size] = buf[start:start + size]
+        bubbles.count = bubble_count
+        bubbles._last_dt = dt
+
+        view.volume = volume
+        view.is_quiet = bool(is_quiet)
+        population.quiet_score = quiet_score
+        population.current_required_score = required_score
+        population.max_fish = max_fish
+        population.session_quiet_time = session_quiet_time
+        population.weight = weight
+        population.counts = counts
+
+        pomodoro = view.pomodoro
+        pomodoro["active"] = bool(pomodoro_active)
+        pomodoro["is_break"] = bool(is_break)
+        pomodoro["end_time"] = view.ticks + remaining_ms
+        view.achievement_flash_timer = flash_timer
+        view.new_achievements = _keys(new_mask)
+
+        stats = view.stats
+        stats.stats.update(points=points, total_quiet_seconds=quiet_seconds,
+                           pomodoro_completed=pomodoro_completed, streak_days=streak,
+                           total_fish_caught=total_fish)
+        for key, bit in _ACHIEVEMENT_BIT.items():
+            stats.achievements[key] = bool(unlocked_mask & bit)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,92 @@
+"""分进程模式下的模拟进程
+
+config.SPLIT_PROCESS 打开后，主进程（窗口、字体、绘制）用 spawn 启动本进程：
+- 本进程读取麦克风、推进种群引擎和鱼群、记录统计和番茄钟，每个模拟步把状态发布到共享内存
+- 主进程每帧读取最新的状态画图，按键通过队列发过来（番茄钟开关、退出）
+
+麦克风读取会阻塞，画图又很占 CPU，两者放在不同进程里就不会抢同一个 GIL，
+画得慢时音量采样也不会断断续续。
+"""
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import SIM_DT, SIM_MAX_STEPS_PER_FRAME
+from models.profiles import ProfileIndex
+from models.shared_state import SharedTankState
+from models.stats import StatsManager
+
+
+def _simulation_app_class():
+    # main 在模块级别导入 pygame 和界面，只在模拟进程中用到时再导入
+    from main import QuietFishApp
+
+    class SimulationApp(QuietFishApp):
+        """没有窗口、字体和界面的 QuietFishApp，只推进模拟"""
+
+        def __init__(self, profile_id):
+            self._startup_t0 = time.perf_counter()
+            self.startup_timings = {}
+            self.sim_process = None
+            self.profiles = ProfileIndex()
+            self.profile_id = profile_id
+            self.stats = StatsManager(self.profiles.data_dir_for(profile_id))
+
+            # 探测麦克风较慢，先以音量 0 开始模拟
+            startup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Startup")
+            audio = startup.submit(self._open_audio)
+            startup.shutdown(wait=False)
+            self._init_state(audio)
+            self._ticks_t0 = time.monotonic()
+            self.ticks = 0
+            self._init_simulation()
+
+        def step(self):
+            """读取一次音量并推进一个模拟步"""
+            if self.audio is None:
+                self._poll_audio()
+            self.volume = self.audio.get_volume() if self.audio is not None else 0
+            self.ticks = int((time.monotonic() - self._ticks_t0) * 1000)
+            self.update(SIM_DT)
+
+    return SimulationApp
+
+
+def _handle_commands(app, commands):
+    """处理主进程发来的命令，收到 quit 时返回 False"""
+    while True:
+        try:
+            command = commands.get_nowait()
+        except queue.Empty:
+            return True
+        if command == "quit":
+            return False
+        if command == "toggle_pomodoro":
+            app.toggle_pomodoro()
+
+
+def run_simulation(shm_name, profile_id, commands):
+    """模拟进程入口：按 SIM_HZ 推进模拟，直到主进程发来 quit 或主进程已经退出"""
+    state = SharedTankState(shm_name)
+    app = _simulation_app_class()(profile_id)
+    parent = multiprocessing.parent_process()
+    max_lag = SIM_DT * SIM_MAX_STEPS_PER_FRAME
+
+    step = 0
+    next_step = time.perf_counter()
+    while _handle_commands(app, commands) and (parent is None or parent.is_alive()):
+        app.step()
+        step += 1
+        state.publish(app, step, time.monotonic(), SIM_DT)
+
+        next_step += SIM_DT
+        delay = next_step - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif -delay > max_lag:
+            # 落后太多时不再追赶
+            next_step = time.perf_counter()
+
+    app._close_simulation()
+    state.close()
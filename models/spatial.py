@@ -0,0 +1,79 @@
+"""均匀空间网格
+
+把水族箱（WATER_TOP 到 HEIGHT）划分成固定大小的格子，
+每个物体只登记在自己所在的格子里。邻居查询只需要检查周围 3x3 个格子，
+鱼多的时候也接近 O(n)。
+
+网格是增量维护的：物体移动后调用 move()，只有跨格时才更新登记。
+"""
+import math
+
+
+class SpatialGrid:
+    def __init__(self, width, top, bottom, cell_size):
+        self.top = top
+        self.cell_size = cell_size
+        self.cols = max(1, math.ceil(width / cell_size))
+        self.rows = max(1, math.ceil((bottom - top) / cell_size))
+        self.cells = {}
+        # 物体 -> 所在格子
+        self._where = {}
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, item):
+        return item in self._where
+
+    def _cell(self, x, y):
+        col = int(x // self.cell_size)
+        row = int((y - self.top) // self.cell_size)
+        # 屏幕外（例如刚游出边界的鱼）归入最近的格子
+        if col < 0:
+            col = 0
+        elif col >= self.cols:
+            col = self.cols - 1
+        if row < 0:
+            row = 0
+        elif row >= self.rows:
+            row = self.rows - 1
+        return col, row
+
+    def move(self, item, x, y):
+        """登记或更新物体位置，只有跨格时才改动格子"""
+        cell = self._cell(x, y)
+        old = self._where.get(item)
+        if old == cell:
+            return
+        if old is not None:
+            bucket = self.cells[old]
+            bucket.remove(item)
+            if not bucket:
+                del self.cells[old]
+        self.cells.setdefault(cell, []).append(item)
+        self._where[item] = cell
+
+    def remove(self, item):
+        old = self._where.pop(item, None)
+        if old is None:
+            return
+        bucket = self.cells[old]
+        bucket.remove(item)
+        if not bucket:
+            del self.cells[old]
+
+    def clear(self):
+        self.cells.clear()
+        self._where.clear()
+
+    def nearby(self, x, y):
+        """返回 (x, y) 周围 3x3 格子内的所有物体（未按距离过滤）"""
+        col, row = self._cell(x, y)
+        cells = self.cells
+        found = []
+        for c in (col - 1, col, col + 1):
+            for r in (row - 1, row, row + 1):
+                bucket = cells.get((c, r))
+                if bucket:
+                    found.extend(bucket)
+        return found
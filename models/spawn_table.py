@@ -0,0 +1,123 @@
+"""编译后的鱼群生成表
+
+启动时根据 config 一次性编译：
+- 品质解锁阶段：按解锁时间排序，用 bisect 查找当前阶段
+- 按安静分钟分桶的 Walker 别名表：每次抽取品质只需 O(1)
+
+种群引擎和 UI 共用同一个 SPAWN_TABLE，解锁规则只在这里定义一次。
+"""
+import math
+from bisect import bisect_right
+
+from config import (
+    RARITY, RARITY_UNLOCK_MINUTES, SPAWN_BASE_WEIGHTS, SPAWN_TIME_GROWTH,
+    SPAWN_TIME_FACTOR_MINUTES
+)
+
+
+class AliasTable:
+    """Walker 别名法：按权重 O(1) 抽样"""
+
+    __slots__ = ("items", "prob", "alias", "n")
+
+    def __init__(self, items, weights):
+        n = len(items)
+        if n == 0:
+            raise ValueError("AliasTable 至少需要一个元素")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("AliasTable 的权重之和必须大于0")
+
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # 剩余的元素由于浮点误差可能略小于1，直接视为1
+
+        self.items = list(items)
+        self.prob = prob
+        self.alias = alias
+        self.n = n
+
+    def sample(self, rng):
+        """用一个随机数完成抽样：整数部分选列，小数部分决定是否走别名"""
+        u = rng.random() * self.n
+        i = int(u)
+        if u - i < self.prob[i]:
+            return self.items[i]
+        return self.items[self.alias[i]]
+
+
+class SpawnTable:
+    def __init__(self, bucket_minutes=1):
+        self.bucket_minutes = bucket_minutes
+
+        # 解锁阶段：第 k 阶段解锁 stage_rarities[:k + 1]
+        stages = sorted(RARITY_UNLOCK_MINUTES.items(), key=lambda item: item[1])
+        self.stage_starts = [minutes for _, minutes in stages]
+        self.stage_rarities = [rarity for rarity, _ in stages]
+
+        # 超过最后一个桶后，time_factor 和解锁阶段都不再变化
+        last = max(SPAWN_TIME_FACTOR_MINUTES, self.stage_starts[-1])
+        self.max_bucket = int(last // bucket_minutes)
+
+        # (桶, 阶段) -> 别名表；一个桶内可能跨越多个解锁阶段
+        self._tables = {}
+        for bucket in range(self.max_bucket + 1):
+            start = bucket * bucket_minutes
+            end = start + bucket_minutes
+            first = self.stage(start)
+            last_stage = self.stage(math.nextafter(end, start))
+            for stage in range(first, last_stage + 1):
+                rarities, weights = self._weights(start, stage)
+                self._tables[bucket, stage] = AliasTable(rarities, weights)
+
+    def stage(self, quiet_minutes):
+        """当前安静时长所处的解锁阶段（0 表示只解锁了第一个品质）"""
+        return max(0, bisect_right(self.stage_starts, quiet_minutes) - 1)
+
+    def unlocked(self, quiet_minutes):
+        """已解锁的品质列表（从低到高）"""
+        return self.stage_rarities[:self.stage(quiet_minutes) + 1]
+
+    def next_unlock(self, quiet_minutes):
+        """下一个待解锁的品质及其解锁时间（分钟），全部解锁时返回 None"""
+        index = self.stage(quiet_minutes) + 1
+        if index >= len(self.stage_rarities):
+            return None
+        return self.stage_rarities[index], self.stage_starts[index]
+
+    def _weights(self, quiet_minutes, stage):
+        time_factor = min(1.0, quiet_minutes / SPAWN_TIME_FACTOR_MINUTES)
+        rarities = self.stage_rarities[:stage + 1]
+        weights = [SPAWN_BASE_WEIGHTS[r] * (1 + time_factor * SPAWN_TIME_GROWTH[r])
+                   for r in rarities]
+        return rarities, weights
+
+    def weights(self, quiet_minutes):
+        """精确（不分桶）的已解锁品质及权重，用于文档和分析"""
+        return self._weights(quiet_minutes, self.stage(quiet_minutes))
+
+    def sample(self, quiet_minutes, rng):
+        """按当前安静时长抽取一个品质"""
+        bucket = int(quiet_minutes // self.bucket_minutes)
+        if bucket > self.max_bucket:
+            bucket = self.max_bucket
+        return self._tables[bucket, self.stage(quiet_minutes)].sample(rng)
+
+
+SPAWN_TABLE = SpawnTable()
+
+# 不受解锁限制的稀有度抽样（按 RARITY 中的 weight）
+RARITY_SAMPLER = AliasTable(list(RARITY), [data["weight"] for data in RARITY.values()])
@@ -0,0 +1,209 @@
+"""鱼和发光层的预渲染精灵 + 磁盘缓存
+
+把 config.RARITY 中每种 (品质, 颜色, 大小, 尾巴相位) 组合预先画好（朝左的鱼由朝右的镜像得到），
+绘制时只需一次 blit。全部烘焙一遍需要一秒多，所以结果写入缓存目录：
+
+- sprites-<key>.bin   所有精灵的像素，每个精灵单独用 zlib 压缩后依次排列（鱼为 RGB + 色键，发光层为 RGBA）
+- sprites-<key>.json  索引：每个精灵在 .bin 中的偏移、压缩后长度、尺寸和锚点
+
+key 是渲染参数、RARITY 和绘制代码的哈希，任何一项改变都会生成新的缓存，旧缓存自动删除。
+之后启动时一次读入 .bin，逐个解压生成 Surface，不再烘焙。精灵大部分是色键和透明像素，
+压缩后只有原始像素的一小部分。
+"""
+import hashlib
+import inspect
+import json
+import math
+import os
+import zlib
+
+import pygame
+
+from config import RARITY, SPRITE_FRAMES
+from models import fish as fish_module
+from models.autosave import atomic_write_bytes, atomic_write_json
+
+# 缓存格式版本，修改文件布局时加一
+FORMAT_VERSION = 2
+# 鱼精灵的透明色键
+COLORKEY = (255, 0, 255)
+
+_tobytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+_frombytes = getattr(pygame.image, "frombytes", None) or pygame.image.fromstring
+
+
+def _source_hash():
+    """绘制代码的哈希：修改绘制函数后缓存自动失效（打包后拿不到源码时忽略）"""
+    try:
+        source = "".join(inspect.getsource(f) for f in (
+            fish_module.draw_fish_shape, fish_module.render_glow,
+            fish_module._draw_gradient_body, fish_module._draw_scales
+        ))
+    except (OSError, TypeError):
+        return ""
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def cache_key(frames=SPRITE_FRAMES):
+    params = (FORMAT_VERSION, frames, COLORKEY, RARITY, _source_hash())
+    return hashlib.sha1(repr(params).encode("utf-8")).hexdigest()[:16]
+
+
+def _glow_color(data):
+    return data.get("glow_color", (255, 255, 255, 100))
+
+
+class SpriteAtlas:
+    def __init__(self, frames=SPRITE_FRAMES):
+        self.frames = frames
+        self._phase_scale = frames / (2 * math.pi)
+        # (品质, 颜色, 大小, 朝向) -> [(Surface, 锚点x, 锚点y), ...]，按帧排列
+        self._fish = {}
+        # (品质, 大小) -> (Surface, 偏移x, 偏移y)
+        self._glow = {}
+
+    # ---------- 查询 ----------
+
+    def fish(self, rarity, color, size, direction, tail_phase):
+        frames = self._fish.get((rarity, color, size, direction))
+        if frames is None:
+            return None
+        return frames[int(tail_phase * self._phase_scale) % self.frames]
+
+    def glow(self, rarity, size):
+        return self._glow.get((rarity, size))
+
+    def __len__(self):
+        return len(self._fish) * self.frames + len(self._glow)
+
+    def _add_fish(self, rarity, color, size, frames):
+        """登记朝右的各帧，朝左的由水平镜像得到"""
+        self._fish[rarity, color, size, 1] = frames
+        mirrored = []
+        for surf, ox, oy in frames:
+            flipped = pygame.transform.flip(surf, True, False)
+            flipped.set_colorkey(COLORKEY)
+            mirrored.append((flipped, surf.get_width() - 1 - ox, oy))
+        self._fish[rarity, color, size, -1] = mirrored
+
+    # ---------- 烘焙 ----------
+
+    @classmethod
+    def bake(cls, frames=SPRITE_FRAMES):
+        """画出所有组合，返回 (图集, 像素数据, 索引)"""
+        atlas = cls(frames)
+        chunks = []
+        offset = 0
+        fish_index = []
+        glow_index = []
+
+        for rarity, data in RARITY.items():
+            low, high = data["size"]
+            for color_index, color in enumerate(data["colors"]):
+                for size in range(low, high + 1):
+                    sprites = []
+                    for frame in range(frames):
+                        surf, ox, oy = _bake_fish(size, color, frame, frames)
+                        pixels = zlib.compress(_tobytes(surf, "RGB"))
+                        chunks.append(pixels)
+                        fish_index.append((rarity, color_index, size, frame,
+                                           offset, len(pixels), surf.get_width(), surf.get_height(),
+                                           ox, oy))
+                        offset += len(pixels)
+                        sprites.append((surf, ox, oy))
+                    atlas._add_fish(rarity, color, size, sprites)
+
+            if data["glow"]:
+                for size in range(low, high + 1):
+                    surf, ox, oy = _crop_glow(*fish_module.render_glow(size, _glow_color(data)))
+                    pixels = zlib.compress(_tobytes(surf, "RGBA"))
+                    chunks.append(pixels)
+                    glow_index.append((rarity, size, offset, len(pixels),
+                                       surf.get_width(), surf.get_height(), ox, oy))
+                    offset += len(pixels)
+                    atlas._glow[rarity, size] = (surf, ox, oy)
+
+        index = {"version": FORMAT_VERSION, "frames": frames, "fish": fish_index, "glow": glow_index}
+        return atlas, b"".join(chunks), index
+
+    # ---------- 磁盘缓存 ----------
+
+    @classmethod
+    def load(cls, bin_path, index_path):
+        """从缓存加载：一次读入 .bin，逐个解压生成 Surface"""
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("version") != FORMAT_VERSION:
+            raise ValueError("sprite cache version mismatch")
+
+        atlas = cls(index["frames"])
+        with open(bin_path, 'rb') as f:
+            view = memoryview(f.read())
+
+        sprites = {}
+        for rarity, color_index, size, frame, offset, length, w, h, ox, oy in index["fish"]:
+            surf = _frombytes(zlib.decompress(view[offset:offset + length]), (w, h), "RGB")
+            surf.set_colorkey(COLORKEY)
+            color = RARITY[rarity]["colors"][color_index]
+            sprites.setdefault((rarity, color, size), [None] * atlas.frames)[frame] = (surf, ox, oy)
+        for (rarity, color, size), frames in sprites.items():
+            atlas._add_fish(rarity, color, size, frames)
+
+        for rarity, size, offset, length, w, h, ox, oy in index["glow"]:
+            surf = _frombytes(zlib.decompress(view[offset:offset + length]), (w, h), "RGBA")
+            atlas._glow[rarity, size] = (surf, ox, oy)
+        return atlas
+
+
+def _crop_glow(surf, ox, oy):
+    """裁掉发光层四周的透明区域，x、y 偏移分别随之调整"""
+    rect = surf.get_bounding_rect()
+    return surf.subsurface(rect).copy(), ox - rect.x, oy - rect.y
+
+
+def _bake_fish(size, color, frame, frames):
+    """画一帧朝右的鱼，裁掉空白，返回 (Surface, 锚点x, 锚点y)"""
+    phase = 2 * math.pi * frame / frames
+    # 足够容纳尾巴和鳍摆动的画布，鱼的中心在 (cx, cy)
+    width = int(size * 4.4) + 40
+    height = int(size * 2) + 20
+    cx, cy = width // 2, height // 2
+    canvas = pygame.Surface((width, height))
+    canvas.fill(COLORKEY)
+    canvas.set_colorkey(COLORKEY)
+    fish_module.draw_fish_shape(canvas, cx, cy, size, color, 1,
+                                math.sin(phase) * 8, math.sin(phase) * 3)
+
+    rect = canvas.get_bounding_rect()
+    sprite = pygame.Surface(rect.size)
+    sprite.fill(COLORKEY)
+    sprite.blit(canvas, (0, 0), rect)
+    sprite.set_colorkey(COLORKEY)
+    return sprite, cx - rect.x, cy - rect.y
+
+
+def load_or_bake(cache_dir, frames=SPRITE_FRAMES):
+    """优先从缓存加载；缓存不存在或失效时重新烘焙并写入缓存"""
+    key = cache_key(frames)
+    bin_path = os.path.join(cache_dir, f"sprites-{key}.bin")
+    index_path = os.path.join(cache_dir, f"sprites-{key}.json")
+
+    if os.path.exists(bin_path) and os.path.exists(index_path):
+        try:
+            return SpriteAtlas.load(bin_path, index_path)
+        except (IOError, OSError, ValueError, KeyError, TypeError, zlib.error) as e:
+            print(f"[SpriteCache] 缓存损坏，重新烘焙: {e}")
+
+    atlas, pixels, index = SpriteAtlas.bake(frames)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # 先写像素再写索引：索引存在就说明像素完整
+        atomic_write_bytes(bin_path, pixels)
+        atomic_write_json(index_path, index, separators=(',', ':'))
+        # 删除旧配置留下的缓存
+        for name in os.listdir(cache_dir):
+            if name.startswith("sprites-") and key not in name:
+                os.remove(os.path.join(cache_dir, name))
+    except (IOError, OSError) as e:
+        print(f"[SpriteCache] 无法写入缓存: {e}")
+    return atlas
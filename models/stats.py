@@ -1,9 +1,19 @@
 """数据统计模块"""
 import json
 import os
-from datetime import datetime, date
+import time
+from datetime import datetime, date, timedelta
 
-from config import ACHIEVEMENTS, LEVELS, DATA_DIR, STATS_FILE, ACHIEVEMENTS_FILE
+from config import (
+    ACHIEVEMENTS, LEVELS, DATA_DIR, STATS_FILE, ACHIEVEMENTS_FILE,
+    EVENT_LOG_FILE, EVENT_SNAPSHOT_FILE, HISTORY_DB_ENABLED, HISTORY_DB_FILE
+)
+from models.achievements import (
+    AchievementEngine, FISH_CAUGHT as ACH_FISH_CAUGHT, FISH_COUNT, QUIET_TIME,
+    POMODORO as ACH_POMODORO, HOUR, SESSION_START
+)
+from models.autosave import AutoSaver, atomic_write_json
+from models.event_log import EventLog, FISH_CAUGHT, FISH_LOST, QUIET, NOISY, POMODORO, LEVEL_UP
 
 
 class StatsManager:
@@ -16,6 +26,31 @@ class StatsManager:
         
         self.stats = self._load_stats()
         self.achievements = self._load_achievements()
+        self._level = self.get_level()["level"]
+
+        # 追加写入的事件日志
+        self.events = EventLog(os.path.join(data_dir, EVENT_LOG_FILE),
+                               os.path.join(data_dir, EVENT_SNAPSHOT_FILE))
+
+        # 可选的 SQLite 历史数据库
+        self.history = None
+        if HISTORY_DB_ENABLED:
+            from models.history_db import HistoryStore
+            self.history = HistoryStore(os.path.join(data_dir, HISTORY_DB_FILE))
+
+        # 后台自动保存：修改时只标记，定期在后台线程原子写入
+        self.saver = AutoSaver()
+        self.saver.register("stats", self.stats_file, lambda: self.stats,
+                            ensure_ascii=False, indent=2)
+        self.saver.register("achievements", self.achievements_file, lambda: self.achievements,
+                            ensure_ascii=False, indent=2)
+
+        # 事件驱动的成就引擎，新解锁的成就由主循环通过 pop_new_achievements() 取走
+        self.new_achievements = []
+        self.achievement_engine = AchievementEngine(self.stats, self.achievements)
+        self._unlock(self.achievement_engine.sweep())
+        # 下一次检查整点变化的时间戳
+        self._next_hour_check = 0.0
 
     def _load_stats(self):
         default = {
@@ -44,11 +79,11 @@ class StatsManager:
             return default
 
     def save_stats(self):
+        """立即（同步）保存统计数据"""
         try:
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.stats, f, ensure_ascii=False, indent=2)
-        except IOError:
-            pass  # 静默处理写入失败
+            atomic_write_json(self.stats_file, self.stats, ensure_ascii=False, indent=2)
+        except (IOError, OSError) as e:
+            print(f"[StatsManager] 保存统计失败: {e}")
 
     def _load_achievements(self):
         default = {k: False for k in ACHIEVEMENTS.keys()}
@@ -67,15 +102,49 @@ class StatsManager:
             return default
 
     def save_achievements(self):
+        """立即（同步）保存成就数据"""
         try:
-            with open(self.achievements_file, 'w', encoding='utf-8') as f:
-                json.dump(self.achievements, f, ensure_ascii=False, indent=2)
-        except IOError:
-            pass  # 静默处理写入失败
+            atomic_write_json(self.achievements_file, self.achievements, ensure_ascii=False, indent=2)
+        except (IOError, OSError) as e:
+            print(f"[StatsManager] 保存成就失败: {e}")
+
+    def _unlock(self, keys):
+        if keys:
+            self.new_achievements.extend(keys)
+            # 尽快在后台保存，不阻塞当前帧
+            self.saver.mark_dirty("achievements")
+            self.saver.mark_dirty("stats")
+            self.saver.flush(wait=False)
+
+    def pop_new_achievements(self):
+        """取出并清空新解锁的成就"""
+        if not self.new_achievements:
+            return []
+        keys = self.new_achievements
+        self.new_achievements = []
+        return keys
+
+    def _log_event(self, kind, detail=None):
+        self.events.append(kind, detail)
+        if self.history is not None:
+            self.history.record_event(kind, detail)
+
+    def _add_points(self, points):
+        self.stats["points"] += points
+        level = self.get_level()["level"]
+        if level > self._level:
+            self._level = level
+            self._log_event(LEVEL_UP, level)
 
     def record_quiet_time(self, seconds):
         self.stats["total_quiet_seconds"] += seconds
-        self.stats["points"] += seconds // 10  # 每10秒安静得1分
+        self.saver.mark_dirty("stats")
+        if self.history is not None:
+            self.history.record_quiet_time(seconds)
+        self._unlock(self.achievement_engine.emit(QUIET_TIME, self.stats["total_quiet_seconds"]))
+        points = seconds // 10  # 每10秒安静得1分
+        if points:
+            self._add_points(points)
 
     def record_fish(self, fish):
         self.stats["total_fish_caught"] += 1
@@ -83,12 +152,58 @@ class StatsManager:
         
         fish_by_rarity = self.stats["fish_by_rarity"]
         fish_by_rarity[rarity] = fish_by_rarity.get(rarity, 0) + 1
-        
-        self.stats["points"] += fish.points
+
+        self._log_event(FISH_CAUGHT, rarity)
+        self.saver.mark_dirty("stats")
+        self._add_points(fish.points)
+        self._unlock(self.achievement_engine.emit(ACH_FISH_CAUGHT))
+
+    def record_fish_count(self, count):
+        """鱼缸中的鱼数量变化时调用"""
+        self._unlock(self.achievement_engine.emit(FISH_COUNT, count))
+
+    def record_fish_lost(self, rarity):
+        self._log_event(FISH_LOST, rarity)
+
+    def record_quiet_change(self, is_quiet):
+        self._log_event(QUIET if is_quiet else NOISY)
 
     def record_pomodoro(self):
         self.stats["pomodoro_completed"] += 1
-        self.stats["points"] += 300  # 番茄钟完成得300分
+        self._log_event(POMODORO)
+        self.saver.mark_dirty("stats")
+        self._add_points(300)  # 番茄钟完成得300分
+        self._unlock(self.achievement_engine.emit(ACH_POMODORO))
+
+    def tick(self, poll_hour=True):
+        """每个模拟步调用，定期写入缓冲的事件和脏数据
+
+        poll_hour 为 False 时不检查整点，由调用方在整点定时调用 check_hour()。
+        """
+        self.events.maybe_flush()
+        self.saver.tick()
+        if self.history is not None:
+            self.history.tick()
+
+        # 整点变化时触发一次小时事件（只比较一个时间戳）
+        if poll_hour and time.time() >= self._next_hour_check:
+            self.check_hour()
+
+    def check_hour(self):
+        """触发当前小时的事件，返回下一个整点的时间戳"""
+        current = datetime.now()
+        next_hour = current.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        self._next_hour_check = next_hour.timestamp()
+        self._unlock(self.achievement_engine.emit(HOUR, current.hour))
+        return self._next_hour_check
+
+    def close(self):
+        """退出时保存所有数据"""
+        self.saver.mark_dirty("stats")
+        self.saver.close()
+        self.events.close()
+        if self.history is not None:
+            self.history.close()
 
     def check_streak(self):
         today = date.today()
@@ -100,7 +215,9 @@ class StatsManager:
             try:
                 last_date = date.fromisoformat(last_used)
                 if last_date == today:
-                    return  # 今天已经使用过，不重复计数
+                    # 今天已经使用过，不重复计数
+                    self._unlock(self.achievement_engine.emit(SESSION_START))
+                    return
                 elif (today - last_date).days == 1:
                     self.stats["streak_days"] += 1
                 else:
@@ -110,6 +227,8 @@ class StatsManager:
         
         self.stats["last_used_date"] = today.isoformat()
         self.stats["total_sessions"] += 1
+        self.saver.mark_dirty("stats")
+        self._unlock(self.achievement_engine.emit(SESSION_START))
 
     def get_level(self):
         points = self.stats["points"]
@@ -118,36 +237,6 @@ class StatsManager:
                 return level
         return LEVELS[0]
 
-    def check_achievements(self, fish_count, quiet_hours_total, is_night=False):
-        new_achievements = []
-        stats = self.stats
-        achievements = self.achievements
-
-        # 检查新成就
-        checks = [
-            ("first_fish", stats["total_fish_caught"] >= 1),
-            ("rare_hunter", stats["fish_by_rarity"].get("rare", 0) >= 1),
-            ("collector_10", fish_count >= 10),
-            ("collector_20", fish_count >= 20),
-            ("legendary_sight", stats["fish_by_rarity"].get("legendary", 0) >= 1),
-            ("quiet_master", quiet_hours_total >= 3600),
-            ("focus_warrior", stats["pomodoro_completed"] >= 5),
-            ("night_owl", is_night),
-            ("streak_3", stats["streak_days"] >= 3),
-            ("total_fish_100", stats["total_fish_caught"] >= 100),
-        ]
-
-        for key, condition in checks:
-            if condition and not achievements.get(key, False):
-                achievements[key] = True
-                new_achievements.append(key)
-
-        if new_achievements:
-            self.save_achievements()
-            self.save_stats()
-
-        return new_achievements
-
     def get_summary(self):
         stats = self.stats
         return {
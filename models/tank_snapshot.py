@@ -0,0 +1,123 @@
+"""鱼缸快照
+
+定期把鱼群和种群引擎的会话状态打包成紧凑的二进制文件（data/tank.bin），
+重启后如果快照足够新，直接恢复上次的鱼缸。
+
+格式（小端）：
+- 文件头：魔数 b"QFTS"、版本、保存时间、鱼的数量、种群引擎状态
+- 每条鱼一条 40 字节的定长记录
+- 末尾 4 字节 CRC32，校验失败时当作没有快照
+"""
+import struct
+import time
+import zlib
+
+from config import RARITY
+
+MAGIC = b"QFTS"
+VERSION = 1
+
+# 魔数, 版本, 保存时间, 鱼数量, 安静积分, 当前所需积分, 本次安静时长, 累计权重, 运行时长, 是否安静
+HEADER = struct.Struct("<4sHdHdddddB")
+# 品质, 颜色序号, 大小, 方向, x, y, vy, 速度, 摆动相位, 尾巴相位, 鳍相位, 年龄, 逃跑计时
+FISH_RECORD = struct.Struct("<BBBb9f")
+CRC = struct.Struct("<I")
+
+RARITY_KEYS = list(RARITY.keys())
+_RARITY_INDEX = {key: i for i, key in enumerate(RARITY_KEYS)}
+
+
+def pack(fish_list, population, saved_at=None):
+    """鱼群 + 种群引擎 -> bytes"""
+    parts = [HEADER.pack(
+        MAGIC, VERSION, time.time() if saved_at is None else saved_at, len(fish_list),
+        population.quiet_score, population.current_required_score,
+        population.session_quiet_time, population.weight, population.elapsed,
+        population.is_quiet
+    )]
+    for fish in fish_list:
+        colors = RARITY[fish.rarity]["colors"]
+        color_index = colors.index(fish.color) if fish.color in colors else 0
+        parts.append(FISH_RECORD.pack(
+            _RARITY_INDEX[fish.rarity], color_index, fish.size, fish.direction,
+            fish.x, fish.y, fish.vy, fish.speed,
+            fish.wobble, fish.tail_phase, fish.fin_phase, fish.age, fish.flee_timer
+        ))
+    body = b"".join(parts)
+    return body + CRC.pack(zlib.crc32(body))
+
+
+def unpack(data):
+    """bytes -> (文件头字典, [鱼记录元组, ...])，格式不对时返回 None"""
+    if len(data) < HEADER.size + CRC.size:
+        return None
+    body = data[:-CRC.size]
+    if CRC.unpack_from(data, len(body))[0] != zlib.crc32(body):
+        return None
+    (magic, version, saved_at, count, quiet_score, required_score,
+     session_quiet_time, weight, elapsed, is_quiet) = HEADER.unpack_from(body)
+    if magic != MAGIC or version != VERSION:
+        return None
+    if len(body) != HEADER.size + count * FISH_RECORD.size:
+        return None
+
+    header = {
+        "saved_at": saved_at,
+        "quiet_score": quiet_score,
+        "current_required_score": required_score,
+        "session_quiet_time": session_quiet_time,
+        "weight": weight,
+        "elapsed": elapsed,
+        "is_quiet": bool(is_quiet),
+    }
+    fish = [record for record in FISH_RECORD.iter_unpack(memoryview(body)[HEADER.size:])
+            if record[0] < len(RARITY_KEYS)]
+    return header, fish
+
+
+def load(path, max_age):
+    """读取快照，文件不存在、损坏或比 max_age 秒更旧时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    result = unpack(data)
+    if result is None:
+        print(f"[TankSnapshot] 快照损坏，忽略: {path}")
+        return None
+    if time.time() - result[0]["saved_at"] > max_age:
+        return None
+    return result
+
+
+def restore_population(population, header):
+    """把快照中的会话状态写回种群引擎"""
+    population.quiet_score = header["quiet_score"]
+    population.current_required_score = header["current_required_score"]
+    population.session_quiet_time = header["session_quiet_time"]
+    population.weight = header["weight"]
+    population.elapsed = header["elapsed"]
+    population.is_quiet = header["is_quiet"]
+
+
+def restore_fish(fish, record):
+    """把一条鱼记录写回已创建的 Fish（颜色、大小等覆盖随机值）"""
+    (rarity_index, color_index, size, direction, x, y, vy, speed,
+     wobble, tail_phase, fin_phase, age, flee_timer) = record
+    colors = RARITY[RARITY_KEYS[rarity_index]]["colors"]
+    fish.color = colors[color_index] if color_index < len(colors) else colors[0]
+    fish.size = size
+    fish.direction = direction
+    fish.x = fish.prev_x = x
+    fish.y = fish.prev_y = y
+    fish.vy = vy
+    fish.speed = speed
+    fish.wobble = wobble
+    fish.tail_phase = tail_phase
+    fish.fin_phase = fin_phase
+    fish.age = age
+    fish.spawn_time = time.time() - age
+    fish.flee_timer = flee_timer
+    fish.is_fleeing = flee_timer > 0
+    return fish
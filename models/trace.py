@@ -0,0 +1,181 @@
+"""会话轨迹录制与回放
+
+模拟用到的外部输入只有：每帧的时长、墙上时间、pygame ticks、音量、按键，以及全局 random。
+录制时在第一帧之前重新设定随机种子，并把当时的鱼缸（tank_snapshot 格式）写进文件头；
+之后每帧记录一条定长记录和这一帧的按键。回放时用同样的种子和鱼缸开始，
+逐帧喂回这些输入，模拟结果和录制时完全一致。
+
+文件是 gzip 压缩的二进制流（data/traces/trace-<时间>.qft）：
+- 文件头：魔数 b"QFTR"、版本、随机种子、录制时间、鱼缸快照长度，后面跟快照
+- 帧记录：b"F" + (帧时长, 墙上时间, ticks, 音量, 按键数) + 按键
+- 按键：(类型, 键码, 修饰键, 文本字节数) + UTF-8 文本
+- 结束记录：b"X" + (帧数, 最终鱼缸的 CRC32)，回放结束时用来校验是否一致
+
+程序崩溃时文件末尾可能不完整，回放读到不完整的记录就停止。
+"""
+import gzip
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+
+import pygame
+
+from models import tank_snapshot
+
+MAGIC = b"QFTR"
+VERSION = 1
+
+# 魔数, 版本, 随机种子, 录制时间, 快照长度
+HEADER = struct.Struct("<4sHIdI")
+# 帧时长, 墙上时间, pygame ticks, 音量, 按键数
+FRAME = struct.Struct("<ddIdB")
+# 类型, 键码, 修饰键, 文本字节数
+EVENT = struct.Struct("<BiHB")
+# 帧数, 最终鱼缸 CRC32
+END = struct.Struct("<II")
+
+FRAME_TAG = b"F"
+END_TAG = b"X"
+KEYDOWN = 1
+TEXTINPUT = 2
+# 每帧最多记录的按键数
+MAX_EVENTS = 255
+
+
+def state_digest(fish_list, population):
+    """鱼群和种群引擎状态的校验值（不含保存时间）"""
+    # 快照末尾已经是正文的 CRC32，直接取出（对整个快照再算 CRC 结果是常数）
+    data = tank_snapshot.pack(fish_list, population, saved_at=0)
+    return tank_snapshot.CRC.unpack_from(data, len(data) - tank_snapshot.CRC.size)[0]
+
+
+def new_trace_path(directory, keep):
+    """生成新的轨迹文件名，并只保留最近 keep - 1 个旧文件"""
+    os.makedirs(directory, exist_ok=True)
+    old = sorted(name for name in os.listdir(directory)
+                 if name.startswith("trace-") and name.endswith(".qft"))
+    for name in old[:max(0, len(old) - keep + 1)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+    return os.path.join(directory, f"trace-{datetime.now():%Y%m%d-%H%M%S}.qft")
+
+
+def _encode_events(events):
+    parts = []
+    for event in events:
+        if event.type == pygame.KEYDOWN:
+            text = event.unicode.encode("utf-8")[:255]
+            parts.append(EVENT.pack(KEYDOWN, event.key, event.mod & 0xFFFF, len(text)) + text)
+        elif event.type == pygame.TEXTINPUT:
+            text = event.text.encode("utf-8")[:255]
+            parts.append(EVENT.pack(TEXTINPUT, 0, 0, len(text)) + text)
+        if len(parts) == MAX_EVENTS:
+            break
+    return parts
+
+
+class TraceRecorder:
+    def __init__(self, path, seed, snapshot):
+        self.path = path
+        self.frames = 0
+        self._file = gzip.open(path, 'wb', compresslevel=6)
+        self._file.write(HEADER.pack(MAGIC, VERSION, seed, time.time(), len(snapshot)))
+        self._file.write(snapshot)
+
+    def frame(self, frame_time, wall_time, ticks, volume, events):
+        parts = _encode_events(events) if events else ()
+        self._file.write(FRAME_TAG + FRAME.pack(frame_time, wall_time, ticks, volume, len(parts)))
+        for part in parts:
+            self._file.write(part)
+        self.frames += 1
+
+    def close(self, digest):
+        self._file.write(END_TAG + END.pack(self.frames, digest))
+        self._file.close()
+        print(f"[Trace] 已录制 {self.frames} 帧: {self.path}")
+
+
+class TracePlayer:
+    """逐帧读出轨迹；realtime 为 True 时按录制时的节奏回放，否则尽快回放"""
+
+    def __init__(self, path, realtime=True):
+        self.path = path
+        self.realtime = realtime
+        self._file = gzip.open(path, 'rb')
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError("trace file too short")
+        magic, version, self.seed, self.recorded_at, snapshot_size = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a trace file or unsupported version")
+        self.snapshot = self._file.read(snapshot_size)
+        self.frames = 0
+        # 结束记录中的帧数和校验值（读到结束记录后才有）
+        self.expected_frames = None
+        self.expected_digest = None
+        self._last = None
+
+    def _read(self, size):
+        try:
+            data = self._file.read(size)
+        except (EOFError, OSError, zlib.error):
+            return None
+        return data if len(data) == size else None
+
+    def _read_frame(self):
+        tag = self._read(1)
+        if tag == END_TAG:
+            end = self._read(END.size)
+            if end is not None:
+                self.expected_frames, self.expected_digest = END.unpack(end)
+            return None
+        if tag != FRAME_TAG:
+            return None
+        data = self._read(FRAME.size)
+        if data is None:
+            return None
+        frame_time, wall_time, ticks, volume, count = FRAME.unpack(data)
+
+        events = []
+        for _ in range(count):
+            data = self._read(EVENT.size)
+            if data is None:
+                return None
+            kind, key, mod, size = EVENT.unpack(data)
+            text = self._read(size) if size else b""
+            if text is None:
+                return None
+            text = text.decode("utf-8", "replace")
+            if kind == KEYDOWN:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key, mod=mod, unicode=text))
+            elif kind == TEXTINPUT:
+                events.append(pygame.event.Event(pygame.TEXTINPUT, text=text))
+        return frame_time, wall_time, ticks, volume, events
+
+    def next_frame(self):
+        """返回 (帧时长, 墙上时间, ticks, 音量, 按键事件列表)，轨迹结束时返回 None"""
+        frame = self._read_frame()
+        if frame is None:
+            return None
+        if self.realtime:
+            # 按录制时的帧时长等待
+            now = time.perf_counter()
+            if self._last is not None:
+                delay = frame[0] - (now - self._last)
+                if delay > 0:
+                    time.sleep(delay)
+            self._last = time.perf_counter()
+        self.frames += 1
+        return frame
+
+    def finish(self):
+        """跳过剩下的帧，读出结束记录（按了退出键或关闭窗口时回放会提前结束）"""
+        while self.expected_digest is None and self._read_frame() is not None:
+            pass
+
+    def close(self):
+        self._file.close()
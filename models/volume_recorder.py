@@ -0,0 +1,260 @@
+"""音量时间序列记录器
+
+把麦克风音量按秒写入一个预先分配大小的内存映射环形文件（data/volume.ring），
+同时按分钟、小时汇总，几个 MB 就能保存几个月的历史：
+
+- 秒级记录：  <I B>      时间戳 + 平均音量（5 字节）
+- 分钟/小时： <I B B H H> 时间戳 + 平均音量 + 最大音量 + 安静秒数 + 覆盖秒数（10 字节）
+
+每个环的写入位置保存在文件头中，追加只是改写固定位置的几个字节（O(1)）；
+读取直接在 mmap 上返回 memoryview，不复制数据。
+"""
+import mmap
+import os
+import struct
+import time
+
+from config import (
+    SILENCE_THRESHOLD, VOLUME_RAW_SLOTS, VOLUME_MINUTE_SLOTS, VOLUME_HOUR_SLOTS
+)
+
+MAGIC = b"QFVR"
+VERSION = 1
+
+RAW = 0
+MINUTE = 1
+HOUR = 2
+
+RAW_RECORD = struct.Struct("<IB")
+ROLLUP_RECORD = struct.Struct("<IBBHH")
+
+# 文件头：魔数、版本、环的数量，之后每个环一组 (容量, 下一个写入位置, 记录数)
+_HEADER = struct.Struct("<4sHH")
+_RING_HEADER = struct.Struct("<III")
+_HEADER_SIZE = 64
+
+_RECORDS = (RAW_RECORD, ROLLUP_RECORD, ROLLUP_RECORD)
+
+
+class _Bucket:
+    """正在累计的一个分钟/小时"""
+    __slots__ = ("ts", "total", "peak", "quiet", "seconds", "slot")
+
+    def __init__(self, ts, total=0, peak=0, quiet=0, seconds=0, slot=None):
+        self.ts = ts
+        self.total = total
+        self.peak = peak
+        self.quiet = quiet
+        self.seconds = seconds
+        # 文件中已经有这个时段的记录时（重启后接着累计）为它在环中的位置，结束时原地改写
+        self.slot = slot
+
+    def add(self, level, seconds=1, peak=None, quiet=None):
+        self.total += level * seconds
+        self.seconds += seconds
+        peak = level if peak is None else peak
+        if peak > self.peak:
+            self.peak = peak
+        if quiet is None:
+            quiet = seconds if level < SILENCE_THRESHOLD else 0
+        self.quiet += quiet
+
+    def record(self):
+        avg = round(self.total / self.seconds) if self.seconds else 0
+        return self.ts, avg, self.peak, self.quiet, self.seconds
+
+
+class VolumeRecorder:
+    def __init__(self, path, raw_slots=VOLUME_RAW_SLOTS, minute_slots=VOLUME_MINUTE_SLOTS,
+                 hour_slots=VOLUME_HOUR_SLOTS):
+        self.path = path
+        self.capacities = (raw_slots, minute_slots, hour_slots)
+
+        # 每个环在文件中的起始偏移
+        self._offsets = []
+        offset = _HEADER_SIZE
+        for record, capacity in zip(_RECORDS, self.capacities):
+            self._offsets.append(offset)
+            offset += record.size * capacity
+        self.size = offset
+
+        self._file = None
+        self._mm = None
+        self._open()
+
+        # 当前这一秒的累计
+        self._second = None
+        self._second_total = 0
+        self._second_count = 0
+        # 当前分钟/小时：如果文件里最后一条就是当前时段（例如重启），接着累计
+        now = int(time.time())
+        self._minute = self._resume(MINUTE, now - now % 60)
+        self._hour = self._resume(HOUR, now - now % 3600)
+        if self._minute.seconds and self._hour.seconds:
+            # 小时记录里已经包含了这分钟的前半段，分钟结束时会整体再加一次
+            minute = self._minute
+            self._hour.total -= minute.total
+            self._hour.quiet -= minute.quiet
+            self._hour.seconds -= minute.seconds
+
+    # ---------- 文件 ----------
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        valid = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) == self.size:
+            with open(self.path, 'rb') as f:
+                header = f.read(_HEADER.size + _RING_HEADER.size * 3)
+            magic, version, rings = _HEADER.unpack_from(header)
+            valid = (magic == MAGIC and version == VERSION and rings == 3
+                     and all(_RING_HEADER.unpack_from(header, _HEADER.size + i * _RING_HEADER.size)[0]
+                             == capacity for i, capacity in enumerate(self.capacities)))
+
+        if not valid:
+            # 新建或容量配置变了：预先分配整个文件
+            if os.path.exists(self.path):
+                print(f"[VolumeRecorder] 文件格式不匹配，重新创建: {self.path}")
+            with open(self.path, 'wb') as f:
+                f.truncate(self.size)
+                f.write(_HEADER.pack(MAGIC, VERSION, 3))
+                for capacity in self.capacities:
+                    f.write(_RING_HEADER.pack(capacity, 0, 0))
+
+        self._file = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), self.size)
+
+    def _ring_state(self, ring):
+        _, head, count = _RING_HEADER.unpack_from(self._mm, _HEADER.size + ring * _RING_HEADER.size)
+        return head, count
+
+    def _append(self, ring, values):
+        record = _RECORDS[ring]
+        capacity = self.capacities[ring]
+        head, count = self._ring_state(ring)
+        record.pack_into(self._mm, self._offsets[ring] + head * record.size, *values)
+        _RING_HEADER.pack_into(self._mm, _HEADER.size + ring * _RING_HEADER.size,
+                               capacity, (head + 1) % capacity, min(count + 1, capacity))
+
+    def _write(self, ring, values, slot=None):
+        """slot 为 None 时追加，否则改写环中该位置的记录"""
+        if slot is None:
+            self._append(ring, values)
+            return
+        record = _RECORDS[ring]
+        record.pack_into(self._mm, self._offsets[ring] + slot * record.size, *values)
+
+    def _resume(self, ring, ts):
+        """文件中最后一条记录属于 ts 这个时段时，从它继续累计
+
+        记录留在文件里，时段结束时改写同一个位置：中途崩溃也只丢失重启后新累计的部分。
+        """
+        last = self.last(ring)
+        if last is None or last[0] != ts:
+            return _Bucket(ts)
+        head, _ = self._ring_state(ring)
+        _, avg, peak, quiet, seconds = last
+        return _Bucket(ts, avg * seconds, peak, quiet, seconds, slot=(head - 1) % self.capacities[ring])
+
+    # ---------- 写入 ----------
+
+    def add(self, level, ts=None):
+        """记录一次音量（每读一次麦克风调用一次）"""
+        if ts is None:
+            ts = time.time()
+        second = int(ts)
+        if second != self._second:
+            if self._second_count:
+                self._close_second()
+            self._second = second
+        self._second_total += level
+        self._second_count += 1
+
+    def _close_second(self):
+        second = self._second
+        level = round(self._second_total / self._second_count)
+        if level > 255:
+            level = 255
+        self._second_total = 0
+        self._second_count = 0
+        self._append(RAW, (second, level))
+
+        minute = second - second % 60
+        if minute != self._minute.ts:
+            self._close_minute()
+            self._minute = _Bucket(minute)
+        self._minute.add(level)
+
+    def _close_minute(self):
+        bucket = self._minute
+        if not bucket.seconds:
+            return
+        record = bucket.record()
+        self._write(MINUTE, record, bucket.slot)
+
+        hour = bucket.ts - bucket.ts % 3600
+        if hour != self._hour.ts:
+            self._close_hour()
+            self._hour = _Bucket(hour)
+        self._hour.add(record[1], bucket.seconds, bucket.peak, bucket.quiet)
+
+    def _close_hour(self):
+        if self._hour.seconds:
+            self._write(HOUR, self._hour.record(), self._hour.slot)
+            # 每小时同步一次到磁盘
+            self._mm.flush()
+
+    def close(self):
+        """把还没结束的秒/分钟/小时也写入文件（下次启动会接着累计）"""
+        if self._mm is None:
+            return
+        if self._second_count:
+            self._close_second()
+        self._close_minute()
+        self._close_hour()
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+        self._mm = None
+        self._file = None
+
+    # ---------- 读取 ----------
+
+    def views(self, ring):
+        """按时间顺序返回该环的数据，(较旧的一段, 较新的一段) 两个 memoryview
+
+        memoryview 直接指向 mmap，close() 之前要释放
+        """
+        record = _RECORDS[ring]
+        capacity = self.capacities[ring]
+        head, count = self._ring_state(ring)
+        base = self._offsets[ring]
+        data = memoryview(self._mm)
+        if count < capacity:
+            return data[base:base], data[base:base + count * record.size]
+        split = base + head * record.size
+        end = base + capacity * record.size
+        return data[split:end], data[base:split]
+
+    def records(self, ring, since=0):
+        """按时间顺序迭代记录元组，只返回时间戳 >= since 的记录"""
+        record = _RECORDS[ring]
+        for view in self.views(ring):
+            for values in record.iter_unpack(view):
+                if values[0] >= since:
+                    yield values
+
+    def last(self, ring):
+        head, count = self._ring_state(ring)
+        if not count:
+            return None
+        record = _RECORDS[ring]
+        index = (head - 1) % self.capacities[ring]
+        return record.unpack_from(self._mm, self._offsets[ring] + index * record.size)
+
+    def minutes(self, since=0):
+        """[(时间戳, 平均, 最大, 安静秒数, 秒数), ...]"""
+        return list(self.records(MINUTE, since))
+
+    def hours(self, since=0):
+        """[(时间戳, 平均, 最大, 安静秒数, 秒数), ...]"""
+        return list(self.records(HOUR, since))
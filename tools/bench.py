@@ -0,0 +1,361 @@
+"""无窗口性能基准测试
+
+在离屏（SDL dummy 驱动）中驱动 QuietFishApp，用脚本生成的音量代替麦克风，
+依次跑几个固定场景，统计：
+- 各阶段和整帧耗时的 p50/p95/p99（来自 FrameProfiler）
+- 每帧创建的 Surface 数、临时分配的内存（AllocTracker）和每千帧触发的第 0 代垃圾回收次数
+- 只跑模拟、不画图时每秒能推进多少个模拟步
+
+结果写成 JSON；指定 --baseline 时与基线比较，超出允许范围就以非零状态退出，
+可以放进发布前的检查里。
+
+使用方法（在项目根目录执行）:
+  python -m tools.bench                                  # 跑全部场景，结果输出到 bench.json
+  python -m tools.bench mythic50 bubbles --frames 300
+  python -m tools.bench --save-baseline bench_baseline.json
+  python -m tools.bench --baseline bench_baseline.json --margin 0.25
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from config import (
+    DATA_DIR, FPS, SIM_DT, SIM_HZ, RARITY, SPRITE_CACHE_DIR, WIDTH, HEIGHT, WATER_TOP
+)
+from models.autosave import atomic_write_json
+from models.alloc_tracker import AllocTracker
+from models.fish import Fish
+from models.population import PopulationEngine
+from models.profiler import FrameProfiler
+
+DEFAULT_FRAMES = 600
+ALLOC_FRAMES = 120
+SIM_STEPS = 600
+SEED = 1234
+QUIET_VOLUME = 10
+NOISY_VOLUME = 80
+# 吵闹/安静每隔多少帧切换一次
+TOGGLE_FRAMES = 15
+BUBBLE_LOAD = 3000
+
+
+class SyntheticAudio:
+    """按脚本返回音量的假麦克风：volume(帧序号) -> 音量"""
+
+    def __init__(self, volume):
+        self.volume = volume
+        self.frame = 0
+
+    def get_volume(self):
+        level = self.volume(self.frame)
+        self.frame += 1
+        return level
+
+    def close(self):
+        pass
+
+
+def _bench_app_class():
+    # main 会初始化 pygame，放到设置好 dummy 驱动之后再导入
+    from main import QuietFishApp
+
+    class BenchApp(QuietFishApp):
+        def _open_audio(self):
+            return None, SyntheticAudio(lambda frame: QUIET_VOLUME)
+
+        def _load_sprites(self):
+            # 精灵在开始前统一加载，避免后台加载完成的时间点影响测量
+            pass
+
+    return BenchApp
+
+
+# ---------- 场景 ----------
+
+def _clear_tank(app, seed):
+    """清掉初始鱼和从快照恢复的鱼，每个场景都从同样的空鱼缸开始"""
+    app.fish_list.clear()
+    app.fish_grid.clear()
+    app.bubbles.clear()
+    app.population = PopulationEngine(seed=seed)
+
+
+def _fill(app, rarities):
+    for rarity in rarities:
+        fish = app._create_fish(rarity)
+        app.fish_list.append(fish)
+        app.population.add(fish.rarity)
+        app.bubbles.attach(fish)
+
+
+def _fixed_tank(app, rarities):
+    """放入指定的鱼，并禁止种群引擎加鱼（安静时也不会减鱼）"""
+    _fill(app, rarities)
+    app.population.max_fish = len(app.fish_list)
+
+
+def _setup_empty(app, rng):
+    _fixed_tank(app, [])
+
+
+def _setup_mixed(app, rng):
+    _fixed_tank(app, rng.choices(list(RARITY), k=50))
+
+
+def _setup_mythic(app, rng):
+    _fixed_tank(app, ["mythic"] * 50)
+
+
+def _setup_toggle(app, rng):
+    _fill(app, rng.choices(list(RARITY), k=25))
+
+
+def _setup_bubbles(app, rng):
+    _fixed_tank(app, rng.choices(list(RARITY), k=20))
+
+
+def _toggle_volume(frame):
+    return NOISY_VOLUME if (frame // TOGGLE_FRAMES) % 2 else QUIET_VOLUME
+
+
+def _top_up_bubbles(app, rng):
+    bubbles = app.bubbles
+    while len(bubbles) < BUBBLE_LOAD:
+        bubbles.spawn(rng.uniform(0, WIDTH), rng.uniform(WATER_TOP, HEIGHT))
+
+
+# 场景名 -> (说明, 初始化, 音量脚本, 每帧开始前的额外操作)
+SCENARIOS = {
+    "empty": ("空鱼缸", _setup_empty, lambda frame: QUIET_VOLUME, None),
+    "mixed50": ("50 条随机品质的鱼", _setup_mixed, lambda frame: QUIET_VOLUME, None),
+    "mythic50": ("50 条发光的神话鱼", _setup_mythic, lambda frame: QUIET_VOLUME, None),
+    "toggle": ("安静/吵闹快速切换", _setup_toggle, _toggle_volume, None),
+    "bubbles": (f"{BUBBLE_LOAD} 个气泡", _setup_bubbles, lambda frame: QUIET_VOLUME, _top_up_bubbles),
+}
+
+
+# ---------- 运行 ----------
+
+class FrameDriver:
+    """按真实主循环的顺序推进一帧：事件、音量、固定步长模拟、绘制"""
+
+    def __init__(self, app, before_frame=None, rng=None):
+        self.app = app
+        self.before_frame = before_frame
+        self.rng = rng
+        self.accumulator = 0.0
+
+    def frame(self):
+        app = self.app
+        if self.before_frame is not None:
+            self.before_frame(app, self.rng)
+        profiler = app.profiler
+        profiler.begin_frame()
+        pygame.event.pump()
+        profiler.lap("events")
+        app.volume = app.audio.get_volume()
+        profiler.lap("audio")
+
+        self.accumulator += 1 / FPS
+        while self.accumulator >= SIM_DT:
+            app.update(SIM_DT)
+            self.accumulator -= SIM_DT
+        app.render_alpha = self.accumulator / SIM_DT
+        app.draw()
+        profiler.end_frame()
+
+
+def _summary_dict(p50, p95, p99):
+    return {"p50": round(p50, 4), "p95": round(p95, 4), "p99": round(p99, 4)}
+
+
+def run_scenario(app_class, name, frames, alloc_frames=ALLOC_FRAMES, sim_steps=SIM_STEPS, seed=SEED):
+    _, setup, volume, before_frame = SCENARIOS[name]
+    random.seed(seed)
+    rng = random.Random(seed)
+    # 钩子要在创建字体之前装好；计数只在 begin_frame/end_frame 之间进行
+    tracker = AllocTracker(window=alloc_frames)
+    tracker.install_hooks()
+    app = app_class()
+    app._poll_audio(wait=True)
+    app.audio = SyntheticAudio(volume)
+    _clear_tank(app, seed)
+    setup(app, rng)
+
+    driver = FrameDriver(app, before_frame, rng)
+    # 预热：填满各种缓存
+    app.profiler = FrameProfiler(window=frames)
+    for _ in range(min(60, frames)):
+        driver.frame()
+
+    # 计时
+    app.profiler.set_enabled(True)
+    gc_before = gc.get_stats()[0]["collections"]
+    for _ in range(frames):
+        driver.frame()
+    gc_collections = gc.get_stats()[0]["collections"] - gc_before
+    fish_count, bubble_count = len(app.fish_list), len(app.bubbles)
+    profiler = app.profiler
+    rows = profiler.summary()
+    profiler.set_enabled(False)
+
+    # 内存：tracemalloc 本身很慢，单独跑一段，不影响上面的计时
+    tracker.start()
+    for _ in range(alloc_frames):
+        tracker.begin_frame()
+        driver.frame()
+        tracker.end_frame()
+    alloc = tracker.frame_stats()
+    tracker.stop()
+
+    # 只跑模拟
+    t0 = time.perf_counter()
+    for _ in range(sim_steps):
+        app.volume = app.audio.get_volume()
+        app.update(SIM_DT)
+    sim_rate = sim_steps / (time.perf_counter() - t0)
+
+    result = {
+        "description": SCENARIOS[name][0],
+        "frames": frames,
+        "fish": fish_count,
+        "bubbles": bubble_count,
+        "frame_ms": _summary_dict(*rows[-1][1:]),
+        "frame_mean_ms": round(sum(profiler.frame_times) / profiler.count / 1e6, 4),
+        "stages_ms": {stage: _summary_dict(*values) for stage, *values in rows[:-1]},
+        "alloc_kb_per_frame": {"p50": round(alloc["kb"][0], 2), "p95": round(alloc["kb"][1], 2)},
+        "surfaces_per_frame": {"p50": alloc["surfaces"][0], "p95": alloc["surfaces"][1]},
+        "gc_gen0_per_1k_frames": round(gc_collections * 1000 / frames, 2),
+        "sim_steps_per_sec": round(sim_rate, 1),
+    }
+    app.stats.close()
+    app.tank_saver.close()
+    return result
+
+
+def compare(results, baseline, margin, min_ms):
+    """与基线比较，返回超出允许范围的项目列表
+
+    耗时和内存超过基线 (1 + margin) 倍、且绝对差值超过 min_ms 毫秒（内存为 KB）才算退步；
+    模拟速度低于基线 (1 - margin) 倍算退步。
+    """
+    failures = []
+
+    def check(label, value, base):
+        if value > base * (1 + margin) and value - base > min_ms:
+            failures.append(f"{label}: {value:.3f} > 基线 {base:.3f}")
+
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for key in ("p95", "p99"):
+            check(f"{name} frame {key}", result["frame_ms"][key], base["frame_ms"][key])
+        for stage, values in result["stages_ms"].items():
+            if stage in base["stages_ms"]:
+                check(f"{name} {stage} p95", values["p95"], base["stages_ms"][stage]["p95"])
+        check(f"{name} alloc p50", result["alloc_kb_per_frame"]["p50"],
+              base["alloc_kb_per_frame"]["p50"])
+        rate, base_rate = result["sim_steps_per_sec"], base["sim_steps_per_sec"]
+        if rate < base_rate * (1 - margin):
+            failures.append(f"{name} sim steps/s: {rate:.0f} < 基线 {base_rate:.0f}")
+    return failures
+
+
+def print_report(results):
+    for name, result in results.items():
+        frame = result["frame_ms"]
+        print(f"\n== {name}（{result['description']}）: {result['fish']} 条鱼, {result['bubbles']} 个气泡")
+        print(f"  {'frame':<14}{frame['p50']:8.2f}{frame['p95']:8.2f}{frame['p99']:8.2f}  ms")
+        for stage, values in result["stages_ms"].items():
+            print(f"  {stage:<14}{values['p50']:8.2f}{values['p95']:8.2f}{values['p99']:8.2f}")
+        alloc = result["alloc_kb_per_frame"]
+        print(f"  分配 {alloc['p50']:.1f} KB/帧 (p95 {alloc['p95']:.1f}), "
+              f"Surface {result['surfaces_per_frame']['p50']} 个/帧, "
+              f"gen0 GC {result['gc_gen0_per_1k_frames']:.1f} 次/千帧, "
+              f"模拟 {result['sim_steps_per_sec']:.0f} 步/秒")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无窗口性能基准测试")
+    parser.add_argument("scenarios", nargs="*",
+                        help=f"要跑的场景（默认全部）: {', '.join(SCENARIOS)}")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="每个场景计时的帧数")
+    parser.add_argument("-o", "--output", default="bench.json", help="结果文件")
+    parser.add_argument("--baseline", help="与该基线比较，退步时以状态 1 退出")
+    parser.add_argument("--save-baseline", help="把本次结果另存为基线")
+    parser.add_argument("--margin", type=float, default=0.25, help="允许比基线慢的比例")
+    parser.add_argument("--min-ms", type=float, default=0.2,
+                        help="绝对差值小于该值（毫秒）时不算退步，避免很快的阶段被噪声误判")
+    parser.add_argument("--procedural", action="store_true", help="不使用预渲染精灵，逐帧绘制鱼")
+    args = parser.parse_args(argv)
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+
+    # 路径都先转成绝对路径，再切换到临时目录，程序的存档写在临时目录里，不碰真实数据
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    save_baseline = os.path.abspath(args.save_baseline) if args.save_baseline else None
+    sprite_dir = os.path.abspath(os.path.join(DATA_DIR, SPRITE_CACHE_DIR))
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="quietfish-bench-") as workdir:
+        os.chdir(workdir)
+        app_class = _bench_app_class()
+        if not args.procedural:
+            from models.sprite_cache import load_or_bake
+            Fish.atlas = load_or_bake(sprite_dir)
+
+        results = {}
+        for name in names:
+            print(f"[bench] {name} ...", file=sys.stderr)
+            results[name] = run_scenario(app_class, name, args.frames)
+        pygame.quit()
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "fps": FPS,
+            "sim_hz": SIM_HZ,
+            "sprites": not args.procedural,
+        },
+        "scenarios": results,
+    }
+    print_report(results)
+    atomic_write_json(output, report, ensure_ascii=False, indent=2)
+    if save_baseline:
+        atomic_write_json(save_baseline, report, ensure_ascii=False, indent=2)
+    print(f"\n[bench] 结果已写入 {output}", file=sys.stderr)
+
+    if baseline is not None:
+        failures = compare(results, baseline, args.margin, args.min_ms)
+        if failures:
+            print(f"\n[bench] 超出基线 {args.margin:.0%} 的项目:", file=sys.stderr)
+            for line in failures:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"[bench] 没有超出基线 {args.margin:.0%} 的项目", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
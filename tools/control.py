@@ -0,0 +1,53 @@
+"""命令行控制正在运行的程序
+
+需要先把 config.CONTROL_API_ENABLED 改为 True。连接 data/control.sock，
+发送一行 JSON 请求并打印回复；watch 订阅后持续打印状态变化，直到 Ctrl+C。
+
+使用方法（在项目根目录执行）:
+  python -m tools.control status             # 当前音量、是否安静、鱼数量、番茄钟、等级
+  python -m tools.control toggle_pomodoro    # 开始/停止番茄钟（另有 start_pomodoro / stop_pomodoro）
+  python -m tools.control watch              # 订阅状态变化
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+
+from config import DATA_DIR, CONTROL_SOCKET
+
+COMMANDS = ("status", "toggle_pomodoro", "start_pomodoro", "stop_pomodoro", "watch")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="控制正在运行的静音鱼缸")
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("--socket", default=os.path.join(DATA_DIR, CONTROL_SOCKET),
+                        help="控制接口的套接字路径")
+    args = parser.parse_args(argv)
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(args.socket)
+    except OSError as e:
+        print(f"无法连接 {args.socket}: {e}（程序是否在运行、CONTROL_API_ENABLED 是否打开？）", file=sys.stderr)
+        return 1
+
+    command = "subscribe" if args.command == "watch" else args.command
+    stream = client.makefile("r", encoding="utf-8")
+    client.sendall((json.dumps({"cmd": command}) + "\n").encode("utf-8"))
+    try:
+        for line in stream:
+            message = json.loads(line)
+            print(json.dumps(message, ensure_ascii=False, indent=None if args.command == "watch" else 2))
+            if args.command != "watch" or not message.get("ok", True):
+                return 0 if message.get("ok") else 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""导出统计和历史数据
+
+把 data/history.db 中的会话、事件、按天汇总以及 stats.json 的累计数据
+导出为 CSV 或 JSON Lines，方便把多台机器的数据汇总到表格里。
+数据逐行从数据库游标读出、逐行写出，不会把整个历史读进内存。
+
+使用方法（在项目根目录执行）:
+  python -m tools.export daily                          # 按天汇总，CSV 输出到屏幕
+  python -m tools.export events --format jsonl -o events.jsonl
+  python -m tools.export sessions --since 2025-09-01 --until 2025-09-30
+  python -m tools.export events --cursor export_cursor.json --host   # 只导出上次之后的新数据
+  python -m tools.export summary --profile 小明                        # 指定档案
+
+--cursor 指定的文件记录每种数据上次导出到的位置，导出成功后才会更新；
+增量导出时只输出已经结束的会话和已经过去的日期，避免同一行被导出两次。
+"""
+import argparse
+import csv
+import json
+import os
+import socket
+import sqlite3
+import sys
+from datetime import date, datetime
+
+from config import DATA_DIR, HISTORY_DB_FILE, STATS_FILE
+from models.autosave import atomic_write_json
+from models.profiles import ProfileIndex
+
+BATCH_SIZE = 1000
+
+# 数据集 -> (列名, 时间过滤列, 游标列)
+DATASETS = {
+    "sessions": (("id", "started_at", "ended_at", "quiet_seconds", "fish_caught", "pomodoros"),
+                 "started_at", "id"),
+    "events": (("id", "ts", "session_id", "kind", "detail"), "ts", "id"),
+    "daily": (("day", "quiet_seconds", "fish_caught", "fish_lost", "pomodoros"), "day", "day"),
+    "daily_fish": (("day", "rarity", "caught"), "day", "day"),
+}
+
+
+def _parse_time(text):
+    """'YYYY-MM-DD' 或 ISO 时间 -> datetime"""
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无法识别的时间: {text}")
+
+
+def _bound(dataset, moment):
+    """把时间转换为该数据集过滤列的取值（时间戳或日期字符串）"""
+    if DATASETS[dataset][1] == "day":
+        return moment.date().isoformat()
+    return moment.timestamp()
+
+
+def connect_readonly(path):
+    """只读打开历史数据库（WAL 模式下不会阻塞正在运行的程序写入）"""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def iter_rows(conn, dataset, since=None, until=None, after=None, complete_only=False):
+    """按顺序逐批读取某个数据集，生成 dict
+
+    after: 只读取游标列大于该值的行；complete_only: 只读取不会再变化的行
+    """
+    columns, time_column, cursor_column = DATASETS[dataset]
+    where = []
+    params = []
+    if since is not None:
+        where.append(f"{time_column} >= ?")
+        params.append(_bound(dataset, since))
+    if until is not None:
+        where.append(f"{time_column} < ?")
+        params.append(_bound(dataset, until))
+    if after is not None:
+        where.append(f"{cursor_column} > ?")
+        params.append(after)
+    if complete_only:
+        if dataset == "sessions":
+            where.append("ended_at IS NOT NULL")
+        elif time_column == "day":
+            where.append("day < ?")
+            params.append(date.today().isoformat())
+
+    sql = f"SELECT {', '.join(columns)} FROM {dataset}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {cursor_column}"
+
+    cur = conn.execute(sql, params)
+    while True:
+        batch = cur.fetchmany(BATCH_SIZE)
+        if not batch:
+            break
+        for row in batch:
+            yield dict(zip(columns, row))
+
+
+def iter_summary(data_dir):
+    """stats.json 的累计数据（一行，各品质数量展开成单独的列）"""
+    path = os.path.join(data_dir, STATS_FILE)
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        stats = json.load(f)
+    row = {key: value for key, value in stats.items() if not isinstance(value, dict)}
+    for rarity, count in stats.get("fish_by_rarity", {}).items():
+        row[f"fish_{rarity}"] = count
+    yield row
+
+
+def write_csv(rows, out, columns=None):
+    """逐行写出 CSV，返回行数；columns 为 None 时取第一行的键"""
+    writer = None
+    count = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(out, fieldnames=columns or list(row), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow(row)
+        count += 1
+    if writer is None and columns:
+        csv.DictWriter(out, fieldnames=columns).writeheader()
+    return count
+
+
+def write_jsonl(rows, out):
+    count = 0
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def _tracked(rows, state, key):
+    """边输出边记录最后一行的游标值"""
+    for row in rows:
+        state["last"] = row[key]
+        yield row
+
+
+def _with_host(rows, host):
+    for row in rows:
+        yield dict(host=host, **row)
+
+
+def load_cursor(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="导出统计和历史数据")
+    parser.add_argument("dataset", choices=list(DATASETS) + ["summary"], help="要导出的数据")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="输出格式")
+    parser.add_argument("-o", "--output", help="输出文件（默认输出到屏幕）")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="数据目录")
+    parser.add_argument("--profile", help="要导出的档案（名字或编号，默认为默认档案）")
+    parser.add_argument("--since", type=_parse_time, help="起始时间（包含），如 2025-09-01")
+    parser.add_argument("--until", type=_parse_time, help="结束时间（不包含）")
+    parser.add_argument("--cursor", help="增量导出的游标文件，只导出上次之后的新数据")
+    parser.add_argument("--host", nargs="?", const=socket.gethostname(),
+                        help="在每行前加一列 host（默认为本机名）")
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir
+    if args.profile is not None:
+        index = ProfileIndex(args.data_dir)
+        profile = index.find(args.profile)
+        if profile is None:
+            parser.error(f"找不到档案: {args.profile}")
+        data_dir = index.data_dir_for(profile["id"])
+
+    cursor = load_cursor(args.cursor)
+    state = {"last": None}
+    conn = None
+
+    if args.dataset == "summary":
+        rows = iter_summary(data_dir)
+        columns = None
+    else:
+        db_path = os.path.join(data_dir, HISTORY_DB_FILE)
+        if not os.path.exists(db_path):
+            parser.error(f"找不到历史数据库: {db_path}")
+        conn = connect_readonly(db_path)
+        columns, _, cursor_column = DATASETS[args.dataset]
+        columns = list(columns)
+        rows = iter_rows(conn, args.dataset, args.since, args.until,
+                         cursor.get(args.dataset), complete_only=bool(args.cursor))
+        rows = _tracked(rows, state, cursor_column)
+
+    if args.host is not None:
+        rows = _with_host(rows, args.host)
+        if columns is not None:
+            columns = ["host"] + columns
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            count = write_csv(rows, out, columns)
+        else:
+            count = write_jsonl(rows, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if conn is not None:
+            conn.close()
+
+    # 全部写出后才推进游标，中途失败下次会重新导出
+    if args.cursor and state["last"] is not None:
+        cursor[args.dataset] = state["last"]
+        atomic_write_json(args.cursor, cursor, indent=2)
+
+    print(f"[export] {args.dataset}: {count} 行", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""回放录制的会话轨迹
+
+把 config.TRACE_RECORD 改为 True 后运行程序，每次运行都会在 data/traces/ 下录制一个轨迹文件。
+回放时用轨迹中的随机种子和起始鱼缸重建程序，逐帧喂回当时的帧时长、音量和按键，
+鱼群的变化和录制时完全一致，可以用来复现卡顿、对比优化前后的性能。
+回放结束时比较最终鱼缸的校验值，不一致说明模拟中混入了没有录制的输入。
+
+程序的存档写在临时目录里，不会改动真实数据。
+
+使用方法（在项目根目录执行）:
+  python -m tools.replay data/traces/trace-20251001-093000.qft            # 按原速在窗口中回放
+  python -m tools.replay data/traces/trace-20251001-093000.qft --fast --headless --profile
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+
+def _replay_app_class():
+    # main 会初始化 pygame，放到设置好驱动之后再导入
+    from main import QuietFishApp
+
+    class ReplayApp(QuietFishApp):
+        def _open_audio(self):
+            # 音量来自轨迹，不打开麦克风
+            return None, None
+
+        def _load_sprites(self):
+            # 精灵在创建程序前已经加载
+            pass
+
+    return ReplayApp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="回放录制的会话轨迹")
+    parser.add_argument("trace", help="轨迹文件（data/traces/*.qft）")
+    parser.add_argument("--fast", action="store_true", help="尽快回放，不按录制时的节奏等待")
+    parser.add_argument("--headless", action="store_true", help="不打开窗口")
+    parser.add_argument("--profile", action="store_true", help="回放时统计各阶段耗时，结束后打印")
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    from config import DATA_DIR, SPRITE_CACHE_DIR
+    from models.fish import Fish
+    from models.sprite_cache import load_or_bake
+    from models.trace import TracePlayer, state_digest
+
+    try:
+        player = TracePlayer(os.path.abspath(args.trace), realtime=not args.fast)
+    except (OSError, ValueError) as e:
+        print(f"[replay] 无法读取轨迹: {e}", file=sys.stderr)
+        return 2
+    recorded = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(player.recorded_at))
+    print(f"[replay] 轨迹录制于 {recorded}，随机种子 {player.seed}", file=sys.stderr)
+
+    sprite_dir = os.path.abspath(os.path.join(DATA_DIR, SPRITE_CACHE_DIR))
+    with tempfile.TemporaryDirectory(prefix="quietfish-replay-") as workdir:
+        os.chdir(workdir)
+        app_class = _replay_app_class()
+        Fish.atlas = load_or_bake(sprite_dir)
+        app = app_class(replay=player)
+        if args.profile:
+            app.profiler.set_enabled(True)
+        t0 = time.perf_counter()
+        app.run()
+        elapsed = time.perf_counter() - t0
+        player.finish()
+        player.close()
+
+    print(f"[replay] 回放 {player.frames} 帧，用时 {elapsed:.1f} 秒", file=sys.stderr)
+    if args.profile:
+        print(f"{'阶段':<14}{'p50':>8}{'p95':>8}{'p99':>8}  (ms)")
+        for stage, p50, p95, p99 in app.profiler.summary():
+            print(f"{stage:<14}{p50:8.2f}{p95:8.2f}{p99:8.2f}")
+
+    if player.expected_digest is None:
+        print("[replay] 轨迹没有正常结束（程序可能崩溃了），无法校验最终状态", file=sys.stderr)
+        return 0
+    if player.frames != player.expected_frames:
+        print(f"[replay] 回放在第 {player.frames} 帧结束（轨迹共 {player.expected_frames} 帧）",
+              file=sys.stderr)
+        return 1
+    if state_digest(app.fish_list, app.population) != player.expected_digest:
+        print("[replay] 最终鱼缸与录制时不一致", file=sys.stderr)
+        return 1
+    print("[replay] 最终鱼缸与录制时一致", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
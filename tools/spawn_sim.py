@@ -0,0 +1,289 @@
+"""鱼群生成蒙特卡洛模拟
+
+用多进程批量模拟不同安静/吵闹场景下的会话，统计：
+- 每个会话各品质鱼的期望数量
+- 每小时获得的鱼积分
+- 首条传说鱼出现时间的分布
+
+使用方法（在项目根目录执行）:
+  python -m tools.spawn_sim
+  python -m tools.spawn_sim --sessions 4000 --hours 3 --workers 8
+  python -m tools.spawn_sim --update-doc   # 重新生成 doc/fish_probability.md 中的表格
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import re
+import time
+
+from config import RARITY, SPAWN_TIME_FACTOR_MINUTES, FISH_INITIAL_COUNT
+from models.population import PopulationEngine, SPAWN, RARITY_ORDER, initial_rarity
+from models.spawn_table import SPAWN_TABLE
+
+DOC_FILE = os.path.join("doc", "fish_probability.md")
+
+# 场景：(安静段平均时长秒, 安静音量范围, 吵闹段平均时长秒, 吵闹音量范围)
+# 安静段时长为 None 表示全程安静
+PROFILES = {
+    "silent": (None, (0, 10), 0, (0, 0)),
+    "library": (600, (5, 30), 10, (45, 80)),
+    "classroom": (120, (10, 35), 20, (45, 90)),
+    "noisy": (30, (15, 38), 30, (50, 100)),
+}
+
+
+def volume_schedule(profile, seconds, rng):
+    """生成一个会话的音量分段 [(时长, 音量), ...]"""
+    quiet_mean, quiet_range, noise_mean, noise_range = PROFILES[profile]
+    if quiet_mean is None:
+        return [(seconds, rng.uniform(*quiet_range))]
+
+    schedule = []
+    remaining = seconds
+    quiet = True
+    while remaining > 0:
+        if quiet:
+            duration = rng.expovariate(1 / quiet_mean)
+            volume = rng.uniform(*quiet_range)
+        else:
+            duration = rng.expovariate(1 / noise_mean)
+            volume = rng.uniform(*noise_range)
+        duration = min(duration, remaining)
+        schedule.append((duration, volume))
+        remaining -= duration
+        quiet = not quiet
+    return schedule
+
+
+def simulate_session(profile, seconds, dt, seed):
+    """模拟单个会话，返回 (各品质生成数, 结束时各品质数量, 鱼积分, 首条传说鱼时间)"""
+    rng = random.Random(seed)
+    engine = PopulationEngine(seed=rng.getrandbits(32))
+    # 和程序一样从开局的几条鱼开始
+    for _ in range(FISH_INITIAL_COUNT):
+        engine.add(initial_rarity(rng))
+    step = engine.step
+    spawned = dict.fromkeys(RARITY_ORDER, 0)
+    first_legendary = None
+    steps = 0
+    t = 0.0
+
+    # 分段结束时间累加计算，不足一步的零头留给下一段，总时长与 seconds 一致
+    segment_end = 0.0
+    for duration, volume in volume_schedule(profile, seconds, rng):
+        segment_end += duration
+        while t < segment_end:
+            events = step(dt, volume)
+            steps += 1
+            t = steps * dt
+            for kind, rarity in events:
+                if kind == SPAWN:
+                    spawned[rarity] += 1
+                    if rarity == "legendary" and first_legendary is None:
+                        first_legendary = t
+
+    points = sum(RARITY[r].get("points", 10) * n for r, n in spawned.items())
+    return spawned, dict(engine.counts), points, first_legendary
+
+
+def _run_batch(args):
+    """进程池任务：模拟一批会话并在进程内先行汇总"""
+    profile, seconds, dt, seeds = args
+    spawned_sum = dict.fromkeys(RARITY_ORDER, 0)
+    final_sum = dict.fromkeys(RARITY_ORDER, 0)
+    points = []
+    first_legendary = []
+    for seed in seeds:
+        spawned, final, pts, first = simulate_session(profile, seconds, dt, seed)
+        for r in RARITY_ORDER:
+            spawned_sum[r] += spawned[r]
+            final_sum[r] += final[r]
+        points.append(pts)
+        first_legendary.append(first)
+    return profile, spawned_sum, final_sum, points, first_legendary
+
+
+def run_simulation(profiles, sessions, hours, dt, workers, seed, batch_size=50):
+    """在进程池中运行所有场景，返回 {场景: 汇总结果}"""
+    seconds = hours * 3600
+    master = random.Random(seed)
+    tasks = []
+    for profile in profiles:
+        seeds = [master.getrandbits(32) for _ in range(sessions)]
+        for i in range(0, sessions, batch_size):
+            tasks.append((profile, seconds, dt, seeds[i:i + batch_size]))
+
+    results = {
+        p: {
+            "sessions": 0,
+            "spawned": dict.fromkeys(RARITY_ORDER, 0),
+            "final": dict.fromkeys(RARITY_ORDER, 0),
+            "points": [],
+            "first_legendary": [],
+        }
+        for p in profiles
+    }
+
+    with multiprocessing.Pool(workers) as pool:
+        for profile, spawned, final, points, first in pool.imap_unordered(_run_batch, tasks):
+            result = results[profile]
+            result["sessions"] += len(points)
+            for r in RARITY_ORDER:
+                result["spawned"][r] += spawned[r]
+                result["final"][r] += final[r]
+            result["points"].extend(points)
+            result["first_legendary"].extend(first)
+
+    return results
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _format_minutes(seconds):
+    return "-" if seconds is None else f"{seconds / 60:.1f}"
+
+
+def rarity_window_tables():
+    """根据当前配置计算各解锁时间段的品质概率（解析解）"""
+    starts = sorted(set(SPAWN_TABLE.stage_starts))
+    ends = starts[1:] + [max(SPAWN_TIME_FACTOR_MINUTES, starts[-1])]
+    lines = []
+
+    for index, (start, end) in enumerate(zip(starts, ends), 1):
+        unlocked = SPAWN_TABLE.unlocked(start)
+        names = " + ".join(RARITY[r]["name"] for r in unlocked)
+        lines.append(f"#### 时间段 {index}: {start}-{end}分钟（{names}）")
+        lines.append("")
+        lines.append(f"**时间因子**: {min(1.0, start / SPAWN_TIME_FACTOR_MINUTES):.3f} - "
+                     f"{min(1.0, end / SPAWN_TIME_FACTOR_MINUTES):.3f}")
+        lines.append("")
+        lines.append("| 品质 | 权重 | 概率 |")
+        lines.append("|-----|------|------|")
+
+        rarities_a, weights_a = SPAWN_TABLE.weights(start)
+        rarities_b, weights_b = SPAWN_TABLE.weights(end)
+        # 区间末端仍属于当前时间段（不含下一阶段新解锁的品质）
+        weights_b = [w for r, w in zip(rarities_b, weights_b) if r in rarities_a]
+        total_a, total_b = sum(weights_a), sum(weights_b)
+        for r in RARITY_ORDER:
+            name = RARITY[r]["name"]
+            if r not in rarities_a:
+                lines.append(f"| {name} | 未解锁 | 0% |")
+                continue
+            i = rarities_a.index(r)
+            lo_w, hi_w = sorted((weights_a[i], weights_b[i]))
+            lo_p, hi_p = sorted((weights_a[i] / total_a, weights_b[i] / total_b))
+            weight_text = f"{lo_w:.1f}" if abs(hi_w - lo_w) < 0.05 else f"{lo_w:.1f} - {hi_w:.1f}"
+            prob_text = (f"**{lo_p:.0%}**" if abs(hi_p - lo_p) < 0.005
+                         else f"**{lo_p:.0%} - {hi_p:.0%}**")
+            lines.append(f"| {name} | {weight_text} | {prob_text} |")
+        lines.append("")
+
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def simulation_tables(results, hours, dt):
+    """把模拟结果格式化为 Markdown 表格"""
+    lines = []
+    header = " | ".join(RARITY[r]["name"] for r in RARITY_ORDER)
+    divider = "|".join("------" for _ in RARITY_ORDER)
+
+    lines.append(f"每个场景模拟 {next(iter(results.values()))['sessions']} 个 {hours:g} 小时的会话，"
+                 f"步长 {dt:g} 秒。")
+    lines.append("")
+    lines.append("#### 每个会话获得的鱼（期望值）")
+    lines.append("")
+    lines.append(f"| 场景 | {header} |")
+    lines.append(f"|------|{divider}|")
+    for profile, result in results.items():
+        n = result["sessions"]
+        cells = " | ".join(f"{result['spawned'][r] / n:.2f}" for r in RARITY_ORDER)
+        lines.append(f"| {profile} | {cells} |")
+    lines.append("")
+
+    lines.append("#### 会话结束时鱼缸中的鱼（期望值）")
+    lines.append("")
+    lines.append(f"| 场景 | {header} |")
+    lines.append(f"|------|{divider}|")
+    for profile, result in results.items():
+        n = result["sessions"]
+        cells = " | ".join(f"{result['final'][r] / n:.2f}" for r in RARITY_ORDER)
+        lines.append(f"| {profile} | {cells} |")
+    lines.append("")
+
+    lines.append("#### 每小时鱼积分与首条传说鱼时间")
+    lines.append("")
+    lines.append("| 场景 | 积分/小时 | 出现传说鱼的会话 | P10(分钟) | P50(分钟) | P90(分钟) |")
+    lines.append("|------|----------|----------------|----------|----------|----------|")
+    for profile, result in results.items():
+        n = result["sessions"]
+        points_per_hour = sum(result["points"]) / n / hours
+        reached = sorted(t for t in result["first_legendary"] if t is not None)
+        lines.append(
+            f"| {profile} | {points_per_hour:,.0f} | {len(reached) / n:.0%} | "
+            f"{_format_minutes(_percentile(reached, 0.1))} | "
+            f"{_format_minutes(_percentile(reached, 0.5))} | "
+            f"{_format_minutes(_percentile(reached, 0.9))} |"
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def replace_generated(text, name, content):
+    """替换文档中 <!-- BEGIN GENERATED: name --> 与 END 标记之间的内容"""
+    pattern = re.compile(
+        rf"(<!-- BEGIN GENERATED: {name} -->\n).*?(<!-- END GENERATED: {name} -->)",
+        re.S
+    )
+    if not pattern.search(text):
+        raise ValueError(f"文档中缺少生成标记: {name}")
+    return pattern.sub(lambda m: m.group(1) + "\n" + content + "\n" + m.group(2), text)
+
+
+def update_doc(window_tables, sim_tables, path=DOC_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    text = replace_generated(text, "rarity_windows", window_tables)
+    text = replace_generated(text, "spawn_sim", sim_tables)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="鱼群生成蒙特卡洛模拟")
+    parser.add_argument("--sessions", type=int, default=500, help="每个场景模拟的会话数")
+    parser.add_argument("--hours", type=float, default=2.0, help="每个会话的时长（小时）")
+    parser.add_argument("--dt", type=float, default=0.25, help="模拟步长（秒）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数")
+    parser.add_argument("--seed", type=int, default=2024, help="随机种子")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES),
+                        choices=list(PROFILES), help="要模拟的场景")
+    parser.add_argument("--update-doc", action="store_true",
+                        help=f"把结果写回 {DOC_FILE}")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = run_simulation(args.profiles, args.sessions, args.hours, args.dt,
+                             args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+
+    window_tables = rarity_window_tables()
+    sim_tables = simulation_tables(results, args.hours, args.dt)
+    print(window_tables)
+    print(sim_tables)
+    print(f"[spawn_sim] 完成，用时 {elapsed:.1f} 秒（{args.workers} 个进程）")
+
+    if args.update_doc:
+        update_doc(window_tables, sim_tables)
+        print(f"[spawn_sim] 已更新 {DOC_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""历史数据面板
+
+按 [H] 打开，展示：
+- 每日安静时长热力图（近 26 周）
+- 每周获得的各品质鱼数量
+- 每日完成的番茄钟数量
+- 近 24 小时每小时的平均音量
+
+数据全部来自预先汇总好的表（history.db 的按天汇总、volume.ring 的小时汇总），
+不扫描原始事件。整个面板画在一张缓存的 Surface 上，只有数据变化时才重画，
+平时打开面板只需要一次 blit。
+"""
+from datetime import date, datetime, timedelta
+
+import pygame
+
+from config import RARITY, SILENCE_THRESHOLD, WIDTH, HEIGHT
+from models.volume_recorder import HOUR
+
+HEATMAP_WEEKS = 26
+FISH_WEEKS = 12
+POMODORO_DAYS = 30
+
+PANEL_RECT = pygame.Rect(40, 40, WIDTH - 80, HEIGHT - 80)
+BORDER_COLOR = (100, 200, 255)
+LABEL_COLOR = (200, 220, 255)
+DIM_COLOR = (140, 150, 170)
+EMPTY_CELL = (40, 55, 80)
+QUIET_COLOR = (100, 255, 200)
+NOISY_COLOR = (255, 120, 120)
+POMODORO_COLOR = (255, 150, 100)
+
+
+def _heat_color(minutes, max_minutes):
+    """安静分钟数 -> 热力图颜色（越安静越亮）"""
+    if minutes <= 0 or max_minutes <= 0:
+        return EMPTY_CELL
+    t = min(1.0, minutes / max_minutes)
+    return (int(40 + 60 * t), int(90 + 165 * t), int(110 + 90 * t))
+
+
+class HistoryDashboard:
+    def __init__(self, font_manager, history=None, volume_recorder=None):
+        self.history = history
+        self.volume_recorder = volume_recorder
+        self.visible = False
+
+        self.title_font = font_manager.get_font(22)
+        self.font = font_manager.get_font(16)
+        self.tiny_font = font_manager.get_font(14)
+
+        # 缓存的面板和生成它时的数据版本
+        self._surface = None
+        self._version = None
+
+    def set_history(self, history):
+        """切换档案后改用新的历史数据库"""
+        self.history = history
+        self._surface = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible and self.history is not None:
+            # 把还在缓冲里的记录交给后台写入，写完后数据版本变化，面板会自动重画
+            self.history.flush()
+
+    def _data_version(self):
+        history_version = self.history.data_version if self.history is not None else None
+        last_hour = None
+        if self.volume_recorder is not None:
+            last_hour = self.volume_recorder.last(HOUR)
+        return history_version, last_hour, date.today()
+
+    def draw(self, surface):
+        if not self.visible:
+            return
+        version = self._data_version()
+        if self._surface is None or version != self._version:
+            self._surface = self._render(version[2])
+            self._version = version
+        surface.blit(self._surface, PANEL_RECT.topleft)
+
+    # ---------- 渲染 ----------
+
+    def _render(self, today):
+        panel = pygame.Surface(PANEL_RECT.size, pygame.SRCALPHA)
+        panel.fill((15, 25, 45, 235))
+        pygame.draw.rect(panel, BORDER_COLOR, panel.get_rect(), 2, border_radius=10)
+
+        title = self.title_font.render("历史记录", True, BORDER_COLOR)
+        panel.blit(title, ((PANEL_RECT.width - title.get_width()) // 2, 10))
+        hint = self.tiny_font.render("[H] 返回", True, DIM_COLOR)
+        panel.blit(hint, (PANEL_RECT.width - hint.get_width() - 14, 14))
+
+        if self.history is None:
+            text = self.font.render("历史数据库未启用（config.HISTORY_DB_ENABLED）", True, DIM_COLOR)
+            panel.blit(text, ((PANEL_RECT.width - text.get_width()) // 2, PANEL_RECT.height // 2))
+            return panel
+
+        # 从 HEATMAP_WEEKS 周前的周一开始，每列一周
+        start = today - timedelta(days=(HEATMAP_WEEKS - 1) * 7 + today.weekday())
+        rows = self.history.daily_totals(start.isoformat(), today.isoformat())
+        daily = {row[0]: row for row in rows}
+
+        self._draw_heatmap(panel, pygame.Rect(20, 50, 440, 150), start, today, daily)
+        self._draw_summary(panel, pygame.Rect(480, 50, PANEL_RECT.width - 500, 150), rows)
+        self._draw_fish_chart(panel, pygame.Rect(20, 220, 390, 160), today)
+        self._draw_pomodoro_chart(panel, pygame.Rect(430, 220, PANEL_RECT.width - 450, 160),
+                                  today, daily)
+        self._draw_volume_chart(panel, pygame.Rect(20, 400, PANEL_RECT.width - 40, 150))
+        return panel
+
+    def _label(self, panel, text, rect):
+        label = self.font.render(text, True, LABEL_COLOR)
+        panel.blit(label, (rect.x, rect.y))
+        return rect.y + label.get_height() + 6
+
+    def _draw_heatmap(self, panel, rect, start, today, daily):
+        top = self._label(panel, f"每日安静时长（近 {HEATMAP_WEEKS} 周）", rect)
+        cell, gap = 14, 2
+        max_minutes = max((row[1] / 60 for row in daily.values()), default=0)
+
+        day = start
+        column = 0
+        while day <= today:
+            row = day.weekday()
+            minutes = daily[day.isoformat()][1] / 60 if day.isoformat() in daily else 0
+            x = rect.x + column * (cell + gap)
+            y = top + row * (cell + gap)
+            pygame.draw.rect(panel, _heat_color(minutes, max_minutes), (x, y, cell, cell),
+                             border_radius=3)
+            if row == 6:
+                column += 1
+            day += timedelta(days=1)
+
+    def _draw_summary(self, panel, rect, rows):
+        top = self._label(panel, "汇总", rect)
+        quiet_hours = sum(row[1] for row in rows) / 3600
+        best = max(rows, key=lambda row: row[1], default=None)
+        lines = [
+            f"安静总时长: {quiet_hours:.1f} 小时",
+            f"有记录的天数: {sum(1 for row in rows if row[1] > 0)}",
+            f"获得鱼: {sum(row[2] for row in rows)}  失去鱼: {sum(row[3] for row in rows)}",
+            f"番茄钟: {sum(row[4] for row in rows)}",
+        ]
+        if best is not None and best[1] > 0:
+            lines.append(f"最安静的一天: {best[0]}（{best[1] / 60:.0f} 分钟）")
+        for line in lines:
+            text = self.tiny_font.render(line, True, (255, 255, 255))
+            panel.blit(text, (rect.x, top))
+            top += 22
+
+    def _draw_fish_chart(self, panel, rect, today):
+        top = self._label(panel, f"每周获得的鱼（近 {FISH_WEEKS} 周）", rect)
+        # 与 SQLite 的 strftime('%Y-%W') 一致的周编号
+        weeks = []
+        for i in range(FISH_WEEKS * 7 - 1, -1, -1):
+            key = (today - timedelta(days=i)).strftime('%Y-%W')
+            if not weeks or weeks[-1] != key:
+                weeks.append(key)
+        start = today - timedelta(days=FISH_WEEKS * 7 - 1)
+        counts = {}
+        for week, rarity, n in self.history.fish_by_rarity_by_week(start.isoformat(),
+                                                                    today.isoformat()):
+            counts.setdefault(week, {})[rarity] = n
+
+        chart_height = rect.bottom - top - 4
+        peak = max((sum(c.values()) for c in counts.values()), default=0)
+        bar_width = (rect.width - 4) // len(weeks) - 4
+        for i, week in enumerate(weeks):
+            x = rect.x + i * (bar_width + 4)
+            y = rect.bottom - 4
+            for rarity, data in RARITY.items():
+                n = counts.get(week, {}).get(rarity, 0)
+                if not n:
+                    continue
+                h = max(1, int(chart_height * n / peak))
+                y -= h
+                pygame.draw.rect(panel, data["colors"][0], (x, y, bar_width, h))
+        pygame.draw.line(panel, DIM_COLOR, (rect.x, rect.bottom - 3), (rect.right, rect.bottom - 3))
+
+    def _draw_pomodoro_chart(self, panel, rect, today, daily):
+        top = self._label(panel, f"每日番茄钟（近 {POMODORO_DAYS} 天）", rect)
+        days = [(today - timedelta(days=i)).isoformat() for i in range(POMODORO_DAYS - 1, -1, -1)]
+        values = [daily[d][4] if d in daily else 0 for d in days]
+        peak = max(values)
+        chart_height = rect.bottom - top - 4
+        bar_width = (rect.width - 4) // len(days) - 2
+        for i, n in enumerate(values):
+            if not n:
+                continue
+            h = max(1, int(chart_height * n / peak))
+            x = rect.x + i * (bar_width + 2)
+            pygame.draw.rect(panel, POMODORO_COLOR, (x, rect.bottom - 4 - h, bar_width, h))
+        if peak:
+            text = self.tiny_font.render(f"最多 {peak}", True, DIM_COLOR)
+            panel.blit(text, (rect.right - text.get_width(), top))
+        pygame.draw.line(panel, DIM_COLOR, (rect.x, rect.bottom - 3), (rect.right, rect.bottom - 3))
+
+    def _draw_volume_chart(self, panel, rect):
+        top = self._label(panel, "近 24 小时平均音量", rect)
+        if self.volume_recorder is None:
+            text = self.tiny_font.render("音量记录未启用", True, DIM_COLOR)
+            panel.blit(text, (rect.x, top))
+            return
+
+        last = self.volume_recorder.last(HOUR)
+        hours = self.volume_recorder.hours(since=last[0] - 23 * 3600) if last else []
+        if not hours:
+            text = self.tiny_font.render("暂无数据（每小时汇总一次）", True, DIM_COLOR)
+            panel.blit(text, (rect.x, top))
+            return
+
+        chart_height = rect.bottom - top - 22
+        bar_width = (rect.width - 4) // 24 - 4
+        base_ts = last[0] - 23 * 3600
+        for ts, avg, peak, quiet, seconds in hours:
+            slot = (ts - base_ts) // 3600
+            h = max(1, int(chart_height * avg / 100))
+            x = rect.x + slot * (bar_width + 4)
+            color = QUIET_COLOR if avg < SILENCE_THRESHOLD else NOISY_COLOR
+            pygame.draw.rect(panel, color, (x, rect.bottom - 20 - h, bar_width, h))
+            if slot % 3 == 0:
+                label = self.tiny_font.render(f"{datetime.fromtimestamp(ts).hour}时", True, DIM_COLOR)
+                panel.blit(label, (x, rect.bottom - 16))
+        # 阈值线
+        y = rect.bottom - 20 - int(chart_height * SILENCE_THRESHOLD / 100)
+        pygame.draw.line(panel, DIM_COLOR, (rect.x, y), (rect.right, y))
+        pygame.draw.line(panel, DIM_COLOR, (rect.x, rect.bottom - 19), (rect.right, rect.bottom - 19))
@@ -1,6 +1,7 @@
 """字体管理器"""
 import os
 import sys
+import threading
 import pygame
 
 
@@ -29,6 +30,8 @@ class FontManager:
             ]
         
         self.cache = {}
+        # 启动时在后台线程预加载字体，和主线程的 get_font 互斥
+        self._lock = threading.Lock()
         
         # 预检查可用字体
         self._available_fonts = [p for p in self.font_paths if os.path.exists(p)]
@@ -39,11 +42,23 @@ class FontManager:
         else:
             print("[FontManager] 警告: 未找到中文字体，将使用系统默认字体")
 
+    def preload(self, sizes):
+        """预先加载多个字号（可以在后台线程中调用）"""
+        for size in sizes:
+            self.get_font(size)
+        return self
+
     def get_font(self, size):
         """获取指定大小的字体"""
-        if size in self.cache:
-            return self.cache[size]
+        font = self.cache.get(size)
+        if font is not None:
+            return font
+        with self._lock:
+            if size in self.cache:
+                return self.cache[size]
+            return self._load_font(size)
 
+    def _load_font(self, size):
         font = None
         
         # 尝试使用可用字体
@@ -1,6 +1,7 @@
 """UI面板模块"""
 import pygame
 from config import RARITY, ACHIEVEMENTS, POMODORO_WORK_MINUTES, POMODORO_BREAK_MINUTES, SILENCE_THRESHOLD, WIDTH
+from models.spawn_table import SPAWN_TABLE
 
 
 class UIPanel:
@@ -138,28 +139,15 @@ class UIPanel:
         surface.blit(time_text, (panel_x + 12, y_offset))
         y_offset += 22
 
-        # 已解锁品质（简洁显示）
+        # 已解锁品质（简洁显示），解锁规则来自共享的生成表
         quiet_minutes = session_time / 60
-        if quiet_minutes < 2:
-            unlocked = "普通"
-            next_unlock = "稀有"
-            next_time = 2
-        elif quiet_minutes < 5:
-            unlocked = "普通/稀有"
-            next_unlock = "史诗"
-            next_time = 5
-        elif quiet_minutes < 10:
-            unlocked = "普通/稀有/史诗"
-            next_unlock = "传说"
-            next_time = 10
-        elif quiet_minutes < 20:
-            unlocked = "普通/稀有/史诗/传说"
-            next_unlock = "神话"
-            next_time = 20
+        unlocked_rarities = SPAWN_TABLE.unlocked(quiet_minutes)
+        next_unlock = SPAWN_TABLE.next_unlock(quiet_minutes)
+        if next_unlock:
+            unlocked = "/".join(RARITY[r]["name"] for r in unlocked_rarities)
+            next_rarity, next_time = next_unlock
         else:
             unlocked = "全部解锁"
-            next_unlock = None
-            next_time = 0
 
         unlocked_text = self.small_font.render(f"已解锁: {unlocked}", True, (200, 255, 200))
         surface.blit(unlocked_text, (panel_x + 12, y_offset))
@@ -168,7 +156,7 @@ class UIPanel:
         # 下一个解锁提示
         if next_unlock:
             remain = next_time - quiet_minutes
-            next_text = self.tiny_font.render(f"距{next_unlock}解锁: 约{remain:.0f}分钟", True, (180, 180, 180))
+            next_text = self.tiny_font.render(f"距{RARITY[next_rarity]['name']}解锁: 约{remain:.0f}分钟", True, (180, 180, 180))
             surface.blit(next_text, (panel_x + 12, y_offset))
         else:
             next_text = self.tiny_font.render("已解锁全部品质", True, (255, 215, 0))
@@ -221,15 +209,17 @@ class UIPanel:
             hint_text = self.tiny_font.render("提示: 保持安静，专注学习", True, (255, 150, 150))
             surface.blit(hint_text, (panel_x + 12, y_offset))
 
-    def draw_pomodoro(self, surface, pomodoro_state):
-        """番茄钟面板"""
+    def draw_pomodoro(self, surface, pomodoro_state, now=None):
+        """番茄钟面板（now 为当前 pygame ticks，回放轨迹时由调用方传入）"""
         panel_width, panel_height = 180, 100
         panel_x = WIDTH - panel_width - 15
         panel_y = 15
         self.draw_panel(surface, panel_x, panel_y, panel_width, panel_height, "番茄钟", (255, 150, 100))
 
         if pomodoro_state["active"]:
-            remaining = max(0, pomodoro_state["end_time"] - pygame.time.get_ticks())
+            if now is None:
+                now = pygame.time.get_ticks()
+            remaining = max(0, pomodoro_state["end_time"] - now)
             minutes = remaining // 60000
             seconds = (remaining % 60000) // 1000
 
@@ -294,7 +284,7 @@ class UIPanel:
 
     def draw_help(self, surface):
         """帮助提示 - 简化版"""
-        help_text = "[空格]番茄钟 [Q]退出 [S]截图"
+        help_text = "[空格]番茄钟 [H]历史 [P]档案 [F3]性能 [Q]退出 [S]截图"
         text_surf = self.small_font.render(help_text, True, (180, 180, 180))
         surface.blit(text_surf, (WIDTH // 2 - text_surf.get_width() // 2, 10))
 
@@ -0,0 +1,141 @@
+"""档案选择界面
+
+上下键选择，回车确认；选中“新建档案”后回车可输入名字，Esc 取消。
+档案很多时只显示当前选中项附近的一屏。
+"""
+import pygame
+
+from config import WIDTH, HEIGHT
+
+VISIBLE_ROWS = 12
+ROW_HEIGHT = 30
+PANEL_WIDTH = 360
+BORDER_COLOR = (100, 200, 255)
+SELECTED_COLOR = (255, 215, 0)
+TEXT_COLOR = (230, 230, 240)
+DIM_COLOR = (140, 150, 170)
+NAME_MAX_LENGTH = 16
+
+
+class ProfilePicker:
+    def __init__(self, font_manager, index):
+        self.index = index
+        self.visible = False
+        self.title_font = font_manager.get_font(22)
+        self.font = font_manager.get_font(18)
+        self.tiny_font = font_manager.get_font(14)
+
+        self.rows = []
+        self.selected = 0
+        self.editing = False
+        self.new_name = ""
+        # 编号 -> 渲染好的名字
+        self._name_cache = {}
+        # 高度 -> 面板背景
+        self._panel_cache = {}
+
+    def open(self, current=None):
+        self.rows = self.index.profiles()
+        self.selected = 0
+        for i, profile in enumerate(self.rows):
+            if profile["id"] == current:
+                self.selected = i
+        self.editing = False
+        self.new_name = ""
+        self.visible = True
+
+    def close(self):
+        self.visible = False
+        self._stop_editing()
+
+    def _stop_editing(self):
+        if self.editing:
+            self.editing = False
+            pygame.key.stop_text_input()
+
+    def handle_event(self, event):
+        """处理输入事件，选中档案时返回档案编号"""
+        if self.editing:
+            return self._handle_editing(event)
+        if event.type != pygame.KEYDOWN:
+            return None
+
+        if event.key == pygame.K_UP:
+            self.selected = (self.selected - 1) % (len(self.rows) + 1)
+        elif event.key == pygame.K_DOWN:
+            self.selected = (self.selected + 1) % (len(self.rows) + 1)
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            if self.selected == len(self.rows):
+                # 最后一行是“新建档案”
+                self.editing = True
+                self.new_name = ""
+                pygame.key.start_text_input()
+            else:
+                self.close()
+                return self.rows[self.selected]["id"]
+        elif event.key == pygame.K_ESCAPE:
+            self.close()
+        return None
+
+    def _handle_editing(self, event):
+        if event.type == pygame.TEXTINPUT:
+            self.new_name = (self.new_name + event.text)[:NAME_MAX_LENGTH]
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_BACKSPACE:
+                self.new_name = self.new_name[:-1]
+            elif event.key == pygame.K_ESCAPE:
+                self._stop_editing()
+            elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                name = self.new_name.strip()
+                if not name:
+                    return None
+                existing = self.index.find(name)
+                profile_id = existing["id"] if existing else self.index.create(name)
+                self.close()
+                return profile_id
+        return None
+
+    def _render_name(self, profile):
+        cached = self._name_cache.get(profile["id"])
+        if cached is None:
+            cached = self.font.render(profile["name"], True, TEXT_COLOR)
+            self._name_cache[profile["id"]] = cached
+        return cached
+
+    def draw(self, surface):
+        if not self.visible:
+            return
+        rows = min(len(self.rows) + 1, VISIBLE_ROWS)
+        height = 90 + rows * ROW_HEIGHT
+        x = (WIDTH - PANEL_WIDTH) // 2
+        y = (HEIGHT - height) // 2
+
+        panel = self._panel_cache.get(height)
+        if panel is None:
+            panel = pygame.Surface((PANEL_WIDTH, height), pygame.SRCALPHA)
+            panel.fill((15, 25, 45, 235))
+            self._panel_cache[height] = panel
+        surface.blit(panel, (x, y))
+        pygame.draw.rect(surface, BORDER_COLOR, (x, y, PANEL_WIDTH, height), 2, border_radius=10)
+
+        title = self.title_font.render("选择档案", True, BORDER_COLOR)
+        surface.blit(title, (x + (PANEL_WIDTH - title.get_width()) // 2, y + 10))
+
+        # 只显示选中项附近的一屏
+        first = min(max(0, self.selected - VISIBLE_ROWS // 2), len(self.rows) + 1 - rows)
+        row_y = y + 45
+        for i in range(first, first + rows):
+            if i == self.selected:
+                pygame.draw.rect(surface, (60, 80, 120), (x + 10, row_y - 2, PANEL_WIDTH - 20, ROW_HEIGHT - 2),
+                                 border_radius=6)
+            if i < len(self.rows):
+                text = self._render_name(self.rows[i])
+            elif self.editing:
+                text = self.font.render(f"名字: {self.new_name}_", True, SELECTED_COLOR)
+            else:
+                text = self.font.render("+ 新建档案", True, SELECTED_COLOR)
+            surface.blit(text, (x + 22, row_y + 2))
+            row_y += ROW_HEIGHT
+
+        hint = self.tiny_font.render("[↑↓] 选择  [回车] 确认  [Esc] 取消", True, DIM_COLOR)
+        surface.blit(hint, (x + (PANEL_WIDTH - hint.get_width()) // 2, y + height - 30))
@@ -0,0 +1,71 @@
+"""性能分析浮层
+
+按 [F3] 打开，左下角显示各阶段耗时的 p50/p95/p99 和最近每帧耗时的曲线。
+文字每隔几帧才重新渲染一次（渲染文字本身就不便宜），曲线每帧重画。
+"""
+import pygame
+
+from config import FPS, HEIGHT, PROFILER_REFRESH_FRAMES
+
+PANEL_WIDTH = 300
+ROW_HEIGHT = 16
+GRAPH_HEIGHT = 60
+MARGIN = 10
+TEXT_COLOR = (220, 230, 240)
+DIM_COLOR = (140, 150, 170)
+SLOW_COLOR = (255, 120, 120)
+GRAPH_COLOR = (100, 255, 200)
+BUDGET_COLOR = (255, 215, 0)
+
+
+class ProfilerOverlay:
+    def __init__(self, font_manager, profiler):
+        self.profiler = profiler
+        self.font = font_manager.get_font(14)
+        # 一帧的时间预算（毫秒），超过的阶段标红
+        self.budget_ms = 1000 / FPS
+        self._text = None
+        self._frames_since_render = 0
+
+    def _render_text(self, fps):
+        rows = self.profiler.summary()
+        surf = pygame.Surface((PANEL_WIDTH, (len(rows) + 2) * ROW_HEIGHT + 8), pygame.SRCALPHA)
+        surf.fill((10, 15, 30, 200))
+
+        header = self.font.render(f"FPS {fps:.0f}   p50 / p95 / p99 (ms)", True, DIM_COLOR)
+        surf.blit(header, (8, 4))
+        y = 4 + ROW_HEIGHT
+        for name, p50, p95, p99 in rows:
+            color = SLOW_COLOR if p95 > self.budget_ms else TEXT_COLOR
+            surf.blit(self.font.render(name, True, color), (8, y))
+            values = self.font.render(f"{p50:6.2f} {p95:6.2f} {p99:6.2f}", True, color)
+            surf.blit(values, (PANEL_WIDTH - values.get_width() - 8, y))
+            y += ROW_HEIGHT
+        return surf
+
+    def draw(self, surface, fps):
+        profiler = self.profiler
+        if not profiler.enabled:
+            return
+        self._frames_since_render += 1
+        if self._text is None or self._frames_since_render >= PROFILER_REFRESH_FRAMES:
+            self._text = self._render_text(fps)
+            self._frames_since_render = 0
+
+        x = MARGIN
+        graph_top = HEIGHT - MARGIN - GRAPH_HEIGHT
+        surface.blit(self._text, (x, graph_top - self._text.get_height()))
+
+        # 帧耗时曲线：满高度对应两倍的时间预算，黄线是一帧的预算
+        pygame.draw.rect(surface, (10, 15, 30), (x, graph_top, PANEL_WIDTH, GRAPH_HEIGHT))
+        scale = GRAPH_HEIGHT / (self.budget_ms * 2e6)
+        budget_y = graph_top + GRAPH_HEIGHT // 2
+        pygame.draw.line(surface, BUDGET_COLOR, (x, budget_y), (x + PANEL_WIDTH - 1, budget_y))
+
+        times = profiler.recent_frame_times()
+        if len(times) > 1:
+            step = PANEL_WIDTH / (profiler.window - 1)
+            bottom = graph_top + GRAPH_HEIGHT - 1
+            points = [(x + i * step, bottom - min(GRAPH_HEIGHT - 1, t * scale))
+                      for i, t in enumerate(times)]
+            pygame.draw.lines(surface, GRAPH_COLOR, False, points)